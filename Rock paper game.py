@@ -5,6 +5,8 @@ import json
 import os
 from datetime import datetime
 
+from profiling import profiled, timed, count_bytes, install
+
 class RockPaperScissorsGame:
     def __init__(self, root):
         self.root = root
@@ -49,6 +51,9 @@ class RockPaperScissorsGame:
         # Create GUI
         self.create_widgets()
         
+        # Opt-in instrumentation (CODSOFT_PROFILE=1); F12 shows the overlay
+        self.profiler = install(self.root, "rock_paper_scissors")
+        
     def create_widgets(self):
         # Main container
         main_container = tk.Frame(self.root, bg=self.bg_color)
@@ -230,6 +235,17 @@ class RockPaperScissorsGame:
     
     def play_round(self, player_choice):
         """Play a round of Rock Paper Scissors"""
+        # Only the round is timed, not the time a dialog stays open
+        with timed("RockPaperScissorsGame.play_round"):
+            self.update_round(player_choice)
+        
+        # Check for win streak
+        if self.user_score >= 5:
+            self.check_high_score()
+            messagebox.showinfo("🏆 Champion!", "You've reached 5 wins! You're a Rock Paper Scissors Champion!")
+    
+    def update_round(self, player_choice):
+        """Pick the computer's choice, score the round and record it"""
         # Get computer choice
         computer_choice = random.choice(list(self.choices.keys()))
         
@@ -271,11 +287,6 @@ class RockPaperScissorsGame:
         
         # Update round counter
         self.round += 1
-        
-        # Check for win streak
-        if self.user_score >= 5:
-            self.check_high_score()
-            messagebox.showinfo("🏆 Champion!", "You've reached 5 wins! You're a Rock Paper Scissors Champion!")
     
     def get_choice_emoji(self, choice):
         """Get emoji for choice"""
@@ -308,13 +319,14 @@ class RockPaperScissorsGame:
     
     def reset_game(self):
         """Reset the entire game"""
-        self.user_score = 0
-        self.computer_score = 0
-        self.ties = 0
-        self.round = 1
-        self.game_history = []
-        self.reset_round()
-        self.update_stats_display()
+        with timed("RockPaperScissorsGame.reset_game"):
+            self.user_score = 0
+            self.computer_score = 0
+            self.ties = 0
+            self.round = 1
+            self.game_history = []
+            self.reset_round()
+            self.update_stats_display()
         messagebox.showinfo("Game Reset", "Game has been reset to start!")
     
     def show_history(self):
@@ -322,7 +334,11 @@ class RockPaperScissorsGame:
         if not self.game_history:
             messagebox.showinfo("Game History", "No games played yet!")
             return
-        
+        self.open_history_window()
+    
+    @profiled
+    def open_history_window(self):
+        """Create the game history window"""
         # Create history window
         history_window = tk.Toplevel(self.root)
         history_window.title("📜 Game History")
@@ -364,7 +380,11 @@ class RockPaperScissorsGame:
         if not self.high_scores:
             messagebox.showinfo("High Scores", "No high scores yet!")
             return
-        
+        self.open_high_scores_window()
+    
+    @profiled
+    def open_high_scores_window(self):
+        """Create the high scores window"""
         # Create high scores window
         scores_window = tk.Toplevel(self.root)
         scores_window.title("🏆 High Scores")
@@ -417,11 +437,13 @@ class RockPaperScissorsGame:
         else:
             self.high_scores = []
     
+    @profiled
     def save_high_scores(self):
         """Save high scores to file"""
         try:
             with open(self.high_score_file, 'w') as f:
                 json.dump(self.high_scores, f, indent=2)
+                count_bytes(self.high_score_file, f.tell())
         except:
             pass
     
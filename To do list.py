@@ -1,12 +1,72 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import json
-import os
-from datetime import datetime
-import sys
+from tkinter import ttk, messagebox, simpledialog
+from datetime import datetime, timedelta
+import argparse
+import threading
+import time
+
+from todo_core import (Workspace, PRIORITIES, FILTERS, REPEAT_RULES, SORT_COLUMNS, task_row,
+                       write_json_atomic)
+from profiling import profiled, timed, install
+
+class SaveScheduler:
+    """Coalesces bursts of saves into one atomic background write"""
+
+    def __init__(self, root, filename, delay=500):
+        self.root = root
+        self.filename = filename
+        self.delay = delay
+        self.timer = None
+        self.pending = None
+        self.closing = False
+        self.condition = threading.Condition()
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def schedule(self, engine):
+        """Mark the tasks dirty and (re)start the debounce timer"""
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+        self.timer = self.root.after(self.delay, lambda: self.submit(engine))
+
+    def submit(self, engine):
+        """Hand an immutable snapshot of the tasks to the writer thread"""
+        self.timer = None
+        pending = (engine, engine.changes, engine.snapshot())
+        with self.condition:
+            # An unwritten older snapshot is simply replaced
+            self.pending = pending
+            self.condition.notify()
+
+    def run(self):
+        """Writer thread: always writes the newest pending snapshot"""
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closing:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                (engine, changes, snapshot), self.pending = self.pending, None
+            try:
+                with timed("SaveScheduler.write"):
+                    write_json_atomic(self.filename, snapshot, indent=4)
+                # Lets engine.close() skip rewriting the same file
+                engine.mark_saved(changes)
+            except Exception as e:
+                print(f"Error saving tasks: {e}")
+
+    def flush(self, engine):
+        """Write any scheduled save and stop the writer thread"""
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.submit(engine)
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        self.worker.join()
 
 class ToDoApp:
-    def __init__(self, root):
+    def __init__(self, root, storage="journal"):
         self.root = root
         self.root.title("To-Do List Manager")
         self.root.geometry("800x600")
@@ -19,12 +79,38 @@ class ToDoApp:
             pass
         
         # Variables
-        self.tasks = []
         self.filter_status = "All"  # All, Pending, Completed
-        self.filename = "tasks.json"
+        self.search_query = ""
+        self.search_timer = None
+        # Column sort order (primary first) kept across refreshes
+        self.sort_order = ()
+        self.sort_reverse = False
+        
+        # Storage backend: "journal", "shared", "json" or "sqlite"
+        self.storage = storage
+        self.journal_sync_pending = False
+        
+        # Workspace of named lists; only the active one is loaded
+        self.workspace = Workspace(storage=storage)
+        self.list_name = Workspace.DEFAULT_LIST
+        
+        # Treeview reconciliation state: task id -> item id / rendered row
+        self.tree_items = {}
+        self.tree_rows = {}
+        self.row_cache = {}
+        
+        # Virtual scrolling: only a window of the filtered tasks is materialized
+        self.visible_tasks = []
+        self.view_offset = 0
+        self.view_rows = 15
+        self.view_buffer = 5
         
-        # Load tasks from file
-        self.load_tasks()
+        # Load tasks from file; the engine owns the store, counters and current day
+        self.engine = self.workspace.open(self.list_name)
+        self.store = self.engine.store
+        self.stats = self.engine.stats
+        self.filename = self.engine.filename
+        self.autosaver = SaveScheduler(self.root, self.filename) if storage == "json" else None
         
         # Configure styles
         self.configure_styles()
@@ -34,6 +120,23 @@ class ToDoApp:
         
         # Bind window close event
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
+        # Keep overdue markers current across midnight
+        self.schedule_day_rollover()
+        
+        # One timer, always armed for the earliest due-date reminder
+        self.reminder_timer = None
+        self.reminder_deadline = None
+        self.reminder_message = ""
+        self.schedule_reminder()
+        
+        # Shared store: watch for changes saved by other windows
+        self.poll_interval = 1000
+        if storage == "shared":
+            self.root.after(self.poll_interval, self.poll_shared_store)
+        
+        # Opt-in instrumentation (CODSOFT_PROFILE=1); F12 shows the overlay
+        self.profiler = install(self.root, "todo")
 
     def configure_styles(self):
         """Configure custom styles for the application"""
@@ -74,6 +177,35 @@ class ToDoApp:
         main_container = tk.Frame(self.root, bg=self.bg_color)
         main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
+        # List selector Frame
+        list_select_frame = tk.Frame(main_container, bg=self.bg_color)
+        list_select_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        tk.Label(list_select_frame,
+                text="Task List:",
+                font=("Arial", 11, "bold"),
+                bg=self.bg_color).pack(side=tk.LEFT)
+        
+        self.list_var = tk.StringVar()
+        self.list_combo = ttk.Combobox(list_select_frame,
+                                     textvariable=self.list_var,
+                                     state="readonly",
+                                     width=40)
+        self.list_combo.pack(side=tk.LEFT, padx=(5, 10))
+        self.list_combo.bind("<<ComboboxSelected>>", lambda e: self.on_list_selected())
+        
+        tk.Button(list_select_frame,
+                 text="➕ New List",
+                 command=self.new_list,
+                 bg=self.primary_color,
+                 fg="white",
+                 font=("Arial", 10),
+                 padx=10,
+                 pady=3,
+                 bd=0,
+                 cursor="hand2").pack(side=tk.LEFT)
+        self.update_list_choices()
+        
         # Input Frame
         input_frame = tk.Frame(main_container, bg=self.bg_color)
         input_frame.pack(fill=tk.X, pady=(0, 10))
@@ -103,7 +235,7 @@ class ToDoApp:
         self.priority_var = tk.StringVar(value="Medium")
         priority_combo = ttk.Combobox(input_frame,
                                     textvariable=self.priority_var,
-                                    values=["High", "Medium", "Low"],
+                                    values=list(PRIORITIES),
                                     state="readonly",
                                     width=10)
         priority_combo.pack(side=tk.LEFT, padx=(0, 10))
@@ -121,6 +253,19 @@ class ToDoApp:
                                 width=15)
         due_date_entry.pack(side=tk.LEFT, padx=(0, 10))
         
+        # Repeat rule (blank for a one-off task)
+        tk.Label(input_frame, 
+                text="Repeat:", 
+                font=("Arial", 11),
+                bg=self.bg_color).pack(side=tk.LEFT, padx=(10, 5))
+        
+        self.repeat_var = tk.StringVar()
+        repeat_combo = ttk.Combobox(input_frame,
+                                  textvariable=self.repeat_var,
+                                  values=("",) + REPEAT_RULES,
+                                  width=12)
+        repeat_combo.pack(side=tk.LEFT, padx=(0, 10))
+        
         # Add button
         add_btn = tk.Button(input_frame,
                           text="➕ Add Task",
@@ -143,8 +288,7 @@ class ToDoApp:
                 font=("Arial", 11, "bold"),
                 bg=self.bg_color).pack(side=tk.LEFT)
         
-        filter_options = ["All", "Pending", "Completed", "High Priority", "Today"]
-        for option in filter_options:
+        for option in FILTERS:
             btn = tk.Button(filter_frame,
                           text=option,
                           command=lambda opt=option: self.filter_tasks(opt),
@@ -157,20 +301,32 @@ class ToDoApp:
                           cursor="hand2")
             btn.pack(side=tk.LEFT, padx=5)
         
+        # Search box, combined with the filter buttons
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(filter_frame,
+                              textvariable=self.search_var,
+                              font=("Arial", 11),
+                              width=20)
+        search_entry.pack(side=tk.RIGHT)
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
+        
+        tk.Label(filter_frame,
+                text="🔍 Search:",
+                font=("Arial", 11),
+                bg=self.bg_color).pack(side=tk.RIGHT, padx=(10, 5))
+        
         # Task List Frame
         list_frame = tk.Frame(main_container, bg=self.bg_color)
         list_frame.pack(fill=tk.BOTH, expand=True)
         
         # Create Treeview for tasks
-        columns = ("Status", "Task", "Priority", "Due Date", "Created")
-        self.tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=15)
+        self.columns = ("Status", "Task", "Priority", "Due Date", "Created")
+        self.tree = ttk.Treeview(list_frame, columns=self.columns, show="headings", height=15)
         
-        # Define headings
-        self.tree.heading("Status", text="Status")
-        self.tree.heading("Task", text="Task")
-        self.tree.heading("Priority", text="Priority")
-        self.tree.heading("Due Date", text="Due Date")
-        self.tree.heading("Created", text="Created")
+        # Define headings; clicking one sorts by that column
+        for column in self.columns:
+            self.tree.heading(column, text=column,
+                              command=lambda c=column: self.sort_by(c))
         
         # Define columns
         self.tree.column("Status", width=80, anchor=tk.CENTER)
@@ -179,17 +335,30 @@ class ToDoApp:
         self.tree.column("Due Date", width=100, anchor=tk.CENTER)
         self.tree.column("Created", width=120, anchor=tk.CENTER)
         
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # Add scrollbar (driven by the logical row count, not the Treeview)
+        self.scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.on_scroll)
         
         # Pack tree and scrollbar
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Mouse wheel and resize drive the virtual window
+        self.tree.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.tree.bind("<Button-4>", self.on_mouse_wheel)
+        self.tree.bind("<Button-5>", self.on_mouse_wheel)
+        self.tree.bind("<Configure>", self.on_tree_resize)
         
         # Bind double-click event
         self.tree.bind("<Double-1>", self.on_task_double_click)
         
+        # Undo/redo shortcuts
+        self.root.bind("<Control-z>", lambda e: self.undo())
+        self.root.bind("<Control-y>", lambda e: self.redo())
+        
+        # Configure tags
+        self.tree.tag_configure("completed", background="#d4edda")
+        self.tree.tag_configure("pending", background="#fff3cd")
+        
         # Action Buttons Frame
         action_frame = tk.Frame(main_container, bg=self.bg_color)
         action_frame.pack(fill=tk.X, pady=(10, 0))
@@ -198,7 +367,10 @@ class ToDoApp:
         actions = [
             ("✅ Mark Complete", self.mark_complete, "#28a745"),
             ("✏️ Edit Task", self.edit_task, "#17a2b8"),
+            ("📝 Bulk Edit", self.bulk_edit, "#17a2b8"),
             ("🗑️ Delete Task", self.delete_task, "#dc3545"),
+            ("↩️ Undo", self.undo, "#6f42c1"),
+            ("↪️ Redo", self.redo, "#6f42c1"),
             ("📊 Statistics", self.show_statistics, "#6c757d"),
             ("💾 Save & Exit", self.save_and_exit, "#343a40")
         ]
@@ -218,7 +390,7 @@ class ToDoApp:
         
         # Status bar
         self.status_bar = tk.Label(self.root,
-                                 text=f"Total Tasks: {len(self.tasks)} | "
+                                 text=f"Total Tasks: {self.stats.total} | "
                                       f"Pending: {self.count_pending()} | "
                                       f"Completed: {self.count_completed()}",
                                  bd=1,
@@ -239,36 +411,25 @@ class ToDoApp:
             messagebox.showwarning("Warning", "Please enter a task description!")
             return
         
-        priority = self.priority_var.get()
-        due_date = self.due_date_var.get().strip()
-        
-        # Validate date format
-        if due_date:
-            try:
-                datetime.strptime(due_date, "%Y-%m-%d")
-            except ValueError:
-                messagebox.showerror("Error", "Invalid date format! Use YYYY-MM-DD")
-                return
-        
-        task = {
-            "id": len(self.tasks) + 1,
-            "task": task_text,
-            "priority": priority,
-            "due_date": due_date,
-            "status": "Pending",
-            "created": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "completed_date": None
-        }
-        
-        self.tasks.append(task)
-        self.refresh_task_list()
-        
-        # Clear input fields
-        self.task_var.set("")
-        self.due_date_var.set("")
-        
-        # Update status bar
-        self.update_status_bar()
+        # Only the work is timed, not the time a dialog stays open
+        try:
+            with timed("ToDoApp.add_task"):
+                self.engine.add(task_text, self.priority_var.get(), self.due_date_var.get(),
+                                self.repeat_var.get())
+                
+                self.refresh_task_list()
+                
+                # Clear input fields
+                self.task_var.set("")
+                self.due_date_var.set("")
+                self.repeat_var.set("")
+                
+                # Update status bar
+                self.update_status_bar()
+                self.save_tasks()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
         
         messagebox.showinfo("Success", "Task added successfully!")
 
@@ -279,20 +440,19 @@ class ToDoApp:
             messagebox.showwarning("Warning", "Please select a task to mark as complete!")
             return
         
-        for item in selected:
-            task_id = int(self.tree.item(item)['values'][0])
-            for task in self.tasks:
-                if task["id"] == task_id:
-                    if task["status"] == "Pending":
-                        task["status"] = "Completed"
-                        task["completed_date"] = datetime.now().strftime("%Y-%m-%d %H:%M")
-                    else:
-                        task["status"] = "Pending"
-                        task["completed_date"] = None
-        
-        self.refresh_task_list()
-        self.update_status_bar()
-        self.save_tasks()
+        with timed("ToDoApp.mark_complete"):
+            total = self.stats.total
+            task_ids = [int(self.tree.item(item)['values'][0]) for item in selected]
+            before = {task_id: self.shown_key(self.store.get(task_id)) for task_id in task_ids}
+            changed = self.engine.toggle(task_ids)
+            
+            if self.stats.total != total:
+                # Completing a repeating task added its next instance
+                self.refresh_task_list()
+            else:
+                self.refresh_rows(changed, before)
+            self.update_status_bar()
+            self.save_tasks()
 
     def edit_task(self):
         """Edit selected task"""
@@ -304,18 +464,15 @@ class ToDoApp:
         item = selected[0]
         task_id = int(self.tree.item(item)['values'][0])
         
-        # Find the task
-        task_to_edit = None
-        for task in self.tasks:
-            if task["id"] == task_id:
-                task_to_edit = task
-                break
+        # Find the task; edits are merged against this version of it
+        task_to_edit = self.store.get(task_id)
+        base = self.engine.base_of(task_id)
         
         if task_to_edit:
             # Create edit dialog
             edit_window = tk.Toplevel(self.root)
             edit_window.title("Edit Task")
-            edit_window.geometry("400x300")
+            edit_window.geometry("400x360")
             edit_window.configure(bg=self.bg_color)
             edit_window.transient(self.root)
             edit_window.grab_set()
@@ -348,7 +505,7 @@ class ToDoApp:
             priority_var = tk.StringVar(value=task_to_edit["priority"])
             priority_combo = ttk.Combobox(edit_window,
                                         textvariable=priority_var,
-                                        values=["High", "Medium", "Low"],
+                                        values=list(PRIORITIES),
                                         state="readonly",
                                         width=15)
             priority_combo.pack(pady=(0, 15))
@@ -364,28 +521,44 @@ class ToDoApp:
                                     textvariable=due_date_var,
                                     font=("Arial", 11),
                                     width=15)
-            due_date_entry.pack(pady=(0, 20))
+            due_date_entry.pack(pady=(0, 15))
+            
+            # Repeat rule
+            tk.Label(edit_window, 
+                    text="Repeat:", 
+                    font=("Arial", 11),
+                    bg=self.bg_color).pack()
+            
+            repeat_var = tk.StringVar(value=task_to_edit.get("repeat") or "")
+            repeat_combo = ttk.Combobox(edit_window,
+                                      textvariable=repeat_var,
+                                      values=("",) + REPEAT_RULES,
+                                      width=15)
+            repeat_combo.pack(pady=(0, 20))
             
             # Save button
             def save_edits():
-                task_to_edit["task"] = task_text_var.get().strip()
-                task_to_edit["priority"] = priority_var.get()
-                due_date = due_date_var.get().strip()
-                
-                if due_date:
-                    try:
-                        datetime.strptime(due_date, "%Y-%m-%d")
-                        task_to_edit["due_date"] = due_date
-                    except ValueError:
-                        messagebox.showerror("Error", "Invalid date format! Use YYYY-MM-DD")
-                        return
-                else:
-                    task_to_edit["due_date"] = ""
-                
-                self.refresh_task_list()
-                self.save_tasks()
+                try:
+                    with timed("ToDoApp.edit_task.save_edits"):
+                        before = {task_to_edit["id"]:
+                                  self.shown_key(self.store.get(task_to_edit["id"]))}
+                        task = self.engine.edit(task_to_edit["id"], task_text_var.get(),
+                                                priority_var.get(), due_date_var.get(),
+                                                repeat_var.get(), base=base)
+                        
+                        self.refresh_rows([task], before)
+                        self.update_status_bar()
+                        self.save_tasks()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
                 edit_window.destroy()
-                messagebox.showinfo("Success", "Task updated successfully!")
+                if self.engine.conflicts:
+                    messagebox.showinfo("Success", "Task updated! Your " +
+                                        ", ".join(self.engine.conflicts).replace("_", " ") +
+                                        " replaced a change made in another window.")
+                else:
+                    messagebox.showinfo("Success", "Task updated successfully!")
             
             save_btn = tk.Button(edit_window,
                                text="💾 Save Changes",
@@ -398,6 +571,113 @@ class ToDoApp:
                                cursor="hand2")
             save_btn.pack()
 
+    def bulk_edit(self):
+        """Set status, priority or due date on many tasks at once"""
+        selected_ids = [int(self.tree.item(item)['values'][0]) for item in self.tree.selection()]
+        shown = len(self.visible_tasks)
+        if not selected_ids and not shown:
+            messagebox.showwarning("Warning", "There are no tasks to edit!")
+            return
+        
+        bulk_window = tk.Toplevel(self.root)
+        bulk_window.title("Bulk Edit")
+        bulk_window.geometry("400x380")
+        bulk_window.configure(bg=self.bg_color)
+        bulk_window.transient(self.root)
+        bulk_window.grab_set()
+        
+        # Which tasks to change (selection only covers the rows on screen)
+        scope_var = tk.StringVar(value="selected" if selected_ids else "shown")
+        tk.Label(bulk_window,
+                text="Apply To:",
+                font=("Arial", 11, "bold"),
+                bg=self.bg_color).pack(pady=(20, 5))
+        tk.Radiobutton(bulk_window,
+                      text=f"Selected tasks ({len(selected_ids)})",
+                      variable=scope_var,
+                      value="selected",
+                      state=tk.NORMAL if selected_ids else tk.DISABLED,
+                      bg=self.bg_color).pack()
+        tk.Radiobutton(bulk_window,
+                      text=f"All tasks shown ({shown})",
+                      variable=scope_var,
+                      value="shown",
+                      bg=self.bg_color).pack(pady=(0, 15))
+        
+        unchanged = "(unchanged)"
+        
+        # Status
+        tk.Label(bulk_window, 
+                text="Status:", 
+                font=("Arial", 11),
+                bg=self.bg_color).pack()
+        status_var = tk.StringVar(value=unchanged)
+        ttk.Combobox(bulk_window,
+                    textvariable=status_var,
+                    values=[unchanged, "Pending", "Completed"],
+                    state="readonly",
+                    width=15).pack(pady=(0, 10))
+        
+        # Priority
+        tk.Label(bulk_window, 
+                text="Priority:", 
+                font=("Arial", 11),
+                bg=self.bg_color).pack()
+        priority_var = tk.StringVar(value=unchanged)
+        ttk.Combobox(bulk_window,
+                    textvariable=priority_var,
+                    values=[unchanged] + list(PRIORITIES),
+                    state="readonly",
+                    width=15).pack(pady=(0, 10))
+        
+        # Due date (an empty field with the box ticked clears it)
+        change_due_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(bulk_window,
+                      text="Set Due Date (YYYY-MM-DD, empty to clear):",
+                      variable=change_due_var,
+                      font=("Arial", 11),
+                      bg=self.bg_color).pack()
+        due_date_var = tk.StringVar()
+        tk.Entry(bulk_window,
+                textvariable=due_date_var,
+                font=("Arial", 11),
+                width=15).pack(pady=(0, 20))
+        
+        def apply_bulk_edit():
+            if scope_var.get() == "selected":
+                task_ids = selected_ids
+            else:
+                task_ids = [task["id"] for task in self.visible_tasks[:]]
+            status = None if status_var.get() == unchanged else status_var.get()
+            priority = None if priority_var.get() == unchanged else priority_var.get()
+            due_date = due_date_var.get() if change_due_var.get() else None
+            if status is None and priority is None and due_date is None:
+                messagebox.showwarning("Warning", "Nothing to change!")
+                return
+            try:
+                with timed("ToDoApp.bulk_edit.apply_bulk_edit"):
+                    count = self.engine.bulk_update(task_ids, status, priority, due_date)
+                    
+                    # One refresh and one save for the whole batch
+                    self.refresh_task_list()
+                    self.update_status_bar()
+                    self.save_tasks()
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            bulk_window.destroy()
+            messagebox.showinfo("Success", f"{count} task(s) updated successfully!")
+        
+        tk.Button(bulk_window,
+                 text="💾 Apply Changes",
+                 command=apply_bulk_edit,
+                 bg=self.accent_color,
+                 fg="white",
+                 font=("Arial", 11, "bold"),
+                 padx=20,
+                 pady=8,
+                 cursor="hand2").pack()
+
     def delete_task(self):
         """Delete selected task"""
         selected = self.tree.selection()
@@ -408,45 +688,119 @@ class ToDoApp:
         confirm = messagebox.askyesno("Confirm Delete", 
                                      "Are you sure you want to delete the selected task(s)?")
         if confirm:
-            task_ids_to_delete = []
-            for item in selected:
-                task_id = int(self.tree.item(item)['values'][0])
-                task_ids_to_delete.append(task_id)
-            
-            # Remove tasks
-            self.tasks = [task for task in self.tasks if task["id"] not in task_ids_to_delete]
-            
-            # Reassign IDs
-            for i, task in enumerate(self.tasks, 1):
-                task["id"] = i
-            
-            self.refresh_task_list()
-            self.update_status_bar()
-            self.save_tasks()
+            with timed("ToDoApp.delete_task"):
+                task_ids_to_delete = []
+                for item in selected:
+                    task_id = int(self.tree.item(item)['values'][0])
+                    task_ids_to_delete.append(task_id)
+                
+                # Remove tasks (ids stay stable and are never reused)
+                self.engine.delete(task_ids_to_delete)
+                
+                self.refresh_task_list()
+                self.update_status_bar()
+                self.save_tasks()
             messagebox.showinfo("Success", "Task(s) deleted successfully!")
 
+    def update_list_choices(self):
+        """Show every list with its pending/total counts from the headers"""
+        self.list_names = self.workspace.names()
+        choices = []
+        for name in self.list_names:
+            summary = self.workspace.summary(name)
+            choices.append(f"{name} ({summary['pending']} pending / {summary['total']} total)")
+        self.list_combo["values"] = choices
+        self.list_combo.current(self.list_names.index(self.list_name))
+
+    def on_list_selected(self):
+        """Switch to the list picked in the selector"""
+        self.switch_list(self.list_names[self.list_combo.current()])
+
+    def new_list(self):
+        """Create a new task list and switch to it"""
+        name = simpledialog.askstring("New List", "Name of the new task list:", parent=self.root)
+        if name is None:
+            return
+        try:
+            name = self.workspace.create(name)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.switch_list(name)
+
+    @profiled
+    def switch_list(self, name):
+        """Make another list active, loading it only if it is not cached"""
+        if name == self.list_name:
+            return
+        # Settle pending writes of the current list before leaving it
+        if self.autosaver is not None:
+            self.autosaver.flush(self.engine)
+        else:
+            self.engine.save()
+        
+        self.list_name = name
+        self.engine = self.workspace.open(name)
+        # A cached list may be behind other windows; the refresh below shows it all
+        self.engine.poll()
+        self.store = self.engine.store
+        self.stats = self.engine.stats
+        self.filename = self.engine.filename
+        if self.autosaver is not None:
+            self.autosaver = SaveScheduler(self.root, self.filename)
+        
+        # Start the new list with an empty Treeview
+        for item in self.tree_items.values():
+            self.tree.delete(item)
+        self.tree_items.clear()
+        self.tree_rows.clear()
+        self.row_cache.clear()
+        self.view_offset = 0
+        
+        self.refresh_task_list()
+        self.update_status_bar()
+        self.update_list_choices()
+        self.schedule_reminder()
+
+    def undo(self):
+        """Undo the latest change"""
+        with timed("ToDoApp.undo"):
+            undone = self.engine.undo() is not None
+            if undone:
+                self.after_history_step()
+        if not undone:
+            messagebox.showinfo("Undo", "Nothing to undo!")
+
+    def redo(self):
+        """Redo the latest undone change"""
+        with timed("ToDoApp.redo"):
+            redone = self.engine.redo() is not None
+            if redone:
+                self.after_history_step()
+        if not redone:
+            messagebox.showinfo("Redo", "Nothing to redo!")
+
+    def after_history_step(self):
+        """Refresh the view and save after an undo or redo"""
+        self.refresh_task_list()
+        self.update_status_bar()
+        self.save_tasks()
+
     def show_statistics(self):
         """Show task statistics"""
-        total = len(self.tasks)
-        completed = self.count_completed()
-        pending = self.count_pending()
-        
-        # Count by priority
-        high = len([t for t in self.tasks if t["priority"] == "High"])
-        medium = len([t for t in self.tasks if t["priority"] == "Medium"])
-        low = len([t for t in self.tasks if t["priority"] == "Low"])
-        
-        # Count overdue tasks
-        today = datetime.now().date()
-        overdue = 0
-        for task in self.tasks:
-            if task["due_date"] and task["status"] == "Pending":
-                try:
-                    due_date = datetime.strptime(task["due_date"], "%Y-%m-%d").date()
-                    if due_date < today:
-                        overdue += 1
-                except:
-                    pass
+        with timed("ToDoApp.show_statistics"):
+            self.check_day()
+            total = self.stats.total
+            completed = self.count_completed()
+            pending = self.count_pending()
+            
+            # Count by priority
+            high = self.stats.by_priority["High"]
+            medium = self.stats.by_priority["Medium"]
+            low = self.stats.by_priority["Low"]
+            
+            # Count overdue tasks
+            overdue = self.stats.overdue
         
         stats_text = f"""
         📊 Task Statistics
@@ -468,81 +822,303 @@ class ToDoApp:
     def filter_tasks(self, filter_type):
         """Filter tasks based on criteria"""
         self.filter_status = filter_type
+        self.view_offset = 0
+        self.refresh_task_list()
+
+    @profiled
+    def sort_by(self, column):
+        """Sort by a column; the previous primary column becomes the tiebreaker"""
+        if self.sort_order and self.sort_order[0] == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_order = (column,) + tuple(c for c in self.sort_order[:1] if c != column)
+            self.sort_reverse = False
+        
+        for column in self.columns:
+            text = column
+            if column in self.sort_order[:1]:
+                text += " ▼" if self.sort_reverse else " ▲"
+            elif column in self.sort_order:
+                text += " (2)"
+            self.tree.heading(column, text=text)
+        
+        self.view_offset = 0
+        self.refresh_task_list()
+
+    def schedule_search(self):
+        """Re-run the search shortly after the user stops typing"""
+        if self.search_timer is not None:
+            self.root.after_cancel(self.search_timer)
+        self.search_timer = self.root.after(150, self.apply_search)
+
+    @profiled
+    def apply_search(self):
+        """Filter the list by the current search text"""
+        self.search_timer = None
+        self.search_query = self.search_var.get()
+        self.view_offset = 0
         self.refresh_task_list()
 
+    @profiled
     def refresh_task_list(self):
-        """Refresh the task list in Treeview"""
-        # Clear current items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        """Re-apply the filter and reconcile the visible window"""
+        self.check_day()
         
-        # Apply filter
-        filtered_tasks = self.tasks
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        
-        if self.filter_status == "Pending":
-            filtered_tasks = [t for t in self.tasks if t["status"] == "Pending"]
-        elif self.filter_status == "Completed":
-            filtered_tasks = [t for t in self.tasks if t["status"] == "Completed"]
-        elif self.filter_status == "High Priority":
-            filtered_tasks = [t for t in self.tasks if t["priority"] == "High"]
-        elif self.filter_status == "Today":
-            filtered_tasks = [t for t in self.tasks if t["due_date"] == today_str]
-        
-        # Add tasks to treeview
-        for task in filtered_tasks:
-            status = "✅" if task["status"] == "Completed" else "⏳"
-            
-            # Color coding for priority
-            priority_color = ""
-            if task["priority"] == "High":
-                priority_color = "🔴"
-            elif task["priority"] == "Medium":
-                priority_color = "🟡"
-            else:
-                priority_color = "🟢"
-            
-            # Check if overdue
-            due_date_display = task["due_date"] if task["due_date"] else "No due date"
-            if task["due_date"] and task["status"] == "Pending":
-                try:
-                    due_date = datetime.strptime(task["due_date"], "%Y-%m-%d").date()
-                    if due_date < datetime.now().date():
-                        due_date_display = f"⚠️ {task['due_date']} (OVERDUE)"
-                except:
-                    pass
-            
-            values = (task["id"], status, task["task"], 
-                     f"{priority_color} {task['priority']}", 
-                     due_date_display, task["created"])
-            
-            item = self.tree.insert("", tk.END, values=values)
-            
-            # Apply color based on status
-            if task["status"] == "Completed":
-                self.tree.item(item, tags=("completed",))
+        # Apply filter through the store indexes
+        self.visible_tasks = self.engine.select(self.filter_status, self.search_query,
+                                                self.sort_order, self.sort_reverse)
+        
+        self.render_window()
+
+    @profiled
+    def render_window(self):
+        """Reconcile the Treeview with the rows in the current scroll window"""
+        total = len(self.visible_tasks)
+        self.view_offset = max(0, min(self.view_offset, total - self.view_rows))
+        start = max(0, self.view_offset - self.view_buffer)
+        end = min(total, self.view_offset + self.view_rows + self.view_buffer)
+        window = self.visible_tasks[start:end]
+        wanted_ids = {task["id"] for task in window}
+        
+        # Drop rows that left the window
+        for task_id in [tid for tid in self.tree_items if tid not in wanted_ids]:
+            self.tree.delete(self.tree_items.pop(task_id))
+            self.tree_rows.pop(task_id, None)
+            self.row_cache.pop(task_id, None)
+        
+        # Insert new rows and update the ones that changed
+        desired = []
+        for task in window:
+            values, tag = self.build_row(task)
+            item = self.tree_items.get(task["id"])
+            if item is None:
+                item = self.tree.insert("", tk.END, values=values, tags=(tag,))
+                self.tree_items[task["id"]] = item
+            elif self.tree_rows.get(task["id"]) != (values, tag):
+                self.tree.item(item, values=values, tags=(tag,))
+            self.tree_rows[task["id"]] = (values, tag)
+            desired.append(item)
+        
+        # Move only the rows that are out of order
+        children = self.tree.get_children()
+        if list(children) != desired:
+            first = 0
+            while first < len(desired) and children[first] == desired[first]:
+                first += 1
+            for index in range(first, len(desired)):
+                self.tree.move(desired[index], "", index)
+        
+        # Show the offset row at the top, keeping the buffer above it hidden
+        self.tree.yview_moveto(0)
+        if self.view_offset > start:
+            self.tree.yview_scroll(self.view_offset - start, "units")
+        
+        if total:
+            self.scrollbar.set(self.view_offset / total,
+                               min(total, self.view_offset + self.view_rows) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_to(self, offset):
+        """Move the virtual window so that row offset is at the top"""
+        offset = max(0, min(int(offset), len(self.visible_tasks) - self.view_rows))
+        if offset != self.view_offset:
+            self.view_offset = offset
+            self.render_window()
+
+    def on_scroll(self, *args):
+        """Handle scrollbar drags and clicks"""
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self.visible_tasks))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self.view_rows
+            self.scroll_to(self.view_offset + step)
+
+    def on_mouse_wheel(self, event):
+        """Scroll the virtual window with the mouse wheel"""
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.view_offset - 3)
+        else:
+            self.scroll_to(self.view_offset + 3)
+        return "break"
+
+    def on_tree_resize(self, event):
+        """Size the window to the number of rows that fit in the Treeview"""
+        # Leave room for the heading row
+        rows = max(1, event.height // 25 - 1)
+        if rows != self.view_rows:
+            self.view_rows = rows
+            self.render_window()
+
+    def refresh_rows(self, tasks, before=None):
+        """Re-render only the given tasks, falling back to a full refresh
+
+        before maps task ids to their shown_key from before the change; tasks
+        missing from it are taken to have kept their place in the list.
+        """
+        if self.check_day():
+            return
+        
+        for task in tasks:
+            shown = self.shown_key(task)
+            if before and before.get(task["id"], shown) != shown:
+                # Filter membership or sort position changed, so the window has to shift
+                self.refresh_task_list()
+                return
+            item = self.tree_items.get(task["id"])
+            if item is None:
+                # Hidden, or shown but scrolled out of the window
+                continue
+            values, tag = self.build_row(task)
+            if self.sort_moved(task["id"], values):
+                # The edit may have moved the row within the sorted list
+                self.refresh_task_list()
+                return
+            if self.tree_rows.get(task["id"]) != (values, tag):
+                self.tree.item(item, values=values, tags=(tag,))
+                self.tree_rows[task["id"]] = (values, tag)
+
+    def shown_key(self, task):
+        """Return the sort fields of a task shown under the filter, or None if it is hidden"""
+        if task is None or not self.task_matches_filter(task):
+            return None
+        return tuple(task[SORT_COLUMNS[column][0]] for column in self.sort_order)
+
+    def sort_moved(self, task_id, values):
+        """Check whether a row changed in a column the list is sorted on"""
+        row = self.tree_rows.get(task_id)
+        if row is None:
+            return False
+        # Row values start with the id, followed by the visible columns
+        return any(row[0][self.columns.index(column) + 1] != values[self.columns.index(column) + 1]
+                   for column in self.sort_order)
+
+    @profiled
+    def check_day(self):
+        """Advance to a new day if the date changed; True if it did"""
+        if not self.engine.set_day(datetime.now().date()):
+            return False
+        if self.filter_status == "Today":
+            self.refresh_task_list()
+        else:
+            # Only rows in the window can change their overdue marker
+            tasks = (self.store.get(task_id) for task_id in list(self.tree_items))
+            self.refresh_rows([task for task in tasks if task is not None])
+        return True
+
+    def schedule_day_rollover(self):
+        """Wake up just after midnight to advance the day"""
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        delay = int((midnight - now).total_seconds() * 1000) + 1000
+        self.root.after(delay, self.on_day_rollover)
+
+    def on_day_rollover(self):
+        """Refresh overdue markers and the Today filter for the new day"""
+        if self.check_day():
+            self.reminder_message = ""
+            self.update_status_bar()
+        self.schedule_day_rollover()
+
+    def schedule_reminder(self):
+        """Arm the reminder timer for the next deadline, if it moved"""
+        deadline = self.engine.reminders.next_deadline()
+        if deadline == self.reminder_deadline and self.reminder_timer is not None:
+            return
+        if self.reminder_timer is not None:
+            self.root.after_cancel(self.reminder_timer)
+            self.reminder_timer = None
+        self.reminder_deadline = deadline
+        if deadline is None:
+            return
+        # Re-check at least hourly in case the wall clock jumps (e.g. sleep)
+        delay = min(max(deadline - time.time(), 0), 3600)
+        self.reminder_timer = self.root.after(int(delay * 1000) + 1, self.on_reminder)
+
+    @profiled
+    def on_reminder(self):
+        """Announce the tasks whose reminder time has come"""
+        self.reminder_timer = None
+        self.reminder_deadline = None
+        task_ids = self.engine.reminders.pop_due(time.time())
+        tasks = [task for task in map(self.store.get, task_ids) if task is not None]
+        if tasks:
+            if len(tasks) == 1:
+                self.reminder_message = f"Due today: {tasks[0]['task']}"
             else:
-                self.tree.item(item, tags=("pending",))
+                self.reminder_message = f"{len(tasks)} tasks due today"
+            self.root.bell()
+            self.refresh_rows(tasks)
+            self.update_status_bar()
+        self.schedule_reminder()
+
+    def poll_shared_store(self):
+        """Show changes other windows saved to the shared store"""
+        try:
+            before = self.engine.poll()
+        except Exception as e:
+            print(f"Error reading shared tasks: {e}")
+            before = {}
+        if before:
+            self.show_external_changes(before)
+        self.root.after(self.poll_interval, self.poll_shared_store)
+
+    @profiled
+    def show_external_changes(self, before):
+        """Re-render the rows changed elsewhere, refreshing only if the shown set changed"""
+        window = []
+        for task_id, old in before.items():
+            task = self.store.get(task_id)
+            if self.shown_key(old) != self.shown_key(task):
+                # Rows were added, removed or reordered
+                self.refresh_task_list()
+                break
+            if task_id in self.tree_items:
+                window.append(task)
+        else:
+            self.refresh_rows(window)
+        self.update_status_bar()
+        self.schedule_reminder()
+
+    def task_matches_filter(self, task):
+        """Check whether a task is shown under the current filter"""
+        return self.engine.matches_filter(task, self.filter_status, self.search_query)
+
+    def build_row(self, task):
+        """Build the Treeview values and tag for a task, reusing cached rows"""
+        # Overdue markers depend on the day, so it is part of the cache key
+        overdue = self.engine.is_overdue(task)
+        reminded = task["id"] in self.engine.reminders.fired
+        key = (task["id"], task["status"], task["task"], task["priority"],
+               task["due_date"], task["created"], task.get("repeat"), overdue, reminded)
+        cached = self.row_cache.get(task["id"])
+        if cached and cached[0] == key:
+            return cached[1]
         
-        # Configure tags
-        self.tree.tag_configure("completed", background="#d4edda")
-        self.tree.tag_configure("pending", background="#fff3cd")
+        values, tag = task_row(task, overdue, reminded)
+        self.row_cache[task["id"]] = (key, (values, tag))
+        return values, tag
 
     def count_pending(self):
         """Count pending tasks"""
-        return len([t for t in self.tasks if t["status"] == "Pending"])
+        return self.stats.pending
 
     def count_completed(self):
         """Count completed tasks"""
-        return len([t for t in self.tasks if t["status"] == "Completed"])
+        return self.stats.completed
 
     def update_status_bar(self):
         """Update status bar text"""
         self.status_bar.config(
-            text=f"Total Tasks: {len(self.tasks)} | "
+            text=f"List: {self.list_name} | "
+                 f"Total Tasks: {self.stats.total} | "
                  f"Pending: {self.count_pending()} | "
                  f"Completed: {self.count_completed()} | "
+                 f"Overdue: {self.stats.overdue} | "
                  f"Filter: {self.filter_status}"
+                 + (f" | 🔔 {self.reminder_message}" if self.reminder_message else "")
         )
 
     def on_task_double_click(self, event):
@@ -551,39 +1127,66 @@ class ToDoApp:
         if item:
             self.mark_complete()
 
+    @profiled
     def save_tasks(self):
         """Save tasks to JSON file"""
+        # A change may have added an earlier reminder deadline
+        self.schedule_reminder()
+        
+        if self.engine.journal is not None:
+            # Mutations are already journaled; batch the fsync and compaction
+            if not self.journal_sync_pending:
+                self.journal_sync_pending = True
+                self.root.after(1000, self.sync_journal)
+            try:
+                self.engine.compact_if_needed()
+            except Exception as e:
+                print(f"Error compacting tasks: {e}")
+            return
+        
+        if self.storage == "sqlite":
+            try:
+                self.store.commit()
+            except Exception as e:
+                print(f"Error saving tasks: {e}")
+            return
+        
+        # Debounced, written off the Tk thread
+        self.autosaver.schedule(self.engine)
+
+    @profiled
+    def sync_journal(self):
+        """Flush journaled changes to disk"""
+        self.journal_sync_pending = False
         try:
-            with open(self.filename, 'w') as f:
-                json.dump(self.tasks, f, indent=4)
+            self.engine.journal.sync()
         except Exception as e:
             print(f"Error saving tasks: {e}")
 
-    def load_tasks(self):
-        """Load tasks from JSON file"""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as f:
-                    self.tasks = json.load(f)
-            except:
-                self.tasks = []
-        else:
-            self.tasks = []
-
     def save_and_exit(self):
         """Save tasks and exit application"""
-        self.save_tasks()
-        self.root.destroy()
+        self.on_closing()
 
     def on_closing(self):
         """Handle window closing"""
-        self.save_tasks()
+        if self.autosaver is not None:
+            self.autosaver.flush(self.engine)
+        self.workspace.close()
         self.root.destroy()
 
 def main():
     """Main function to run the application"""
+    parser = argparse.ArgumentParser(description="To-do list")
+    parser.add_argument("--storage", choices=["journal", "shared", "json", "sqlite"],
+                        default="journal",
+                        help="storage backend (default: journal; json saves the whole file "
+                             "in the background; shared lets several windows work on the "
+                             "same tasks.json)")
+    parser.add_argument("--shared", action="store_true", help="same as --storage shared")
+    args = parser.parse_args()
+    
     root = tk.Tk()
-    app = ToDoApp(root)
+    app = ToDoApp(root, "shared" if args.shared else args.storage)
     root.mainloop()
 
 if __name__ == "__main__":
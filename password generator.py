@@ -1,14 +1,18 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import random
-import string
+from tkinter import ttk, messagebox, scrolledtext, simpledialog, filedialog
 import json
 import os
 from datetime import datetime
 import hashlib
-import secrets
 import subprocess
 import sys
+import threading
+import queue
+import time
+
+from password_core import (selected_sets, generate_password, write_passwords_parallel,
+                           entropy_estimator)
+from profiling import profiled, timed, count_bytes, install
 
 class PasswordGenerator:
     def __init__(self, root):
@@ -23,6 +27,11 @@ class PasswordGenerator:
         self.history_file = "password_history.json"
         self.saved_file = "saved_passwords.json"
         
+        # Guess estimator, built once on a worker thread (ranks weak_patterns.txt words if present)
+        self.estimator = None
+        self.estimator_thread = threading.Thread(target=self.load_estimator, daemon=True)
+        self.estimator_thread.start()
+        
         # Load history
         self.load_history()
         self.load_saved_passwords()
@@ -39,6 +48,9 @@ class PasswordGenerator:
         # Create GUI
         self.create_widgets()
         
+        # Opt-in instrumentation (CODSOFT_PROFILE=1); F12 shows the overlay
+        self.profiler = install(self.root, "password_generator")
+        
     def create_widgets(self):
         # Main container with padding
         main_container = tk.Frame(self.root, bg=self.bg_color)
@@ -170,6 +182,18 @@ class PasswordGenerator:
                                 bd=0)
         generate_btn.pack()
         
+        bulk_btn = tk.Button(button_frame,
+                            text="📦 Bulk Generate to File",
+                            command=self.bulk_generate,
+                            font=("Arial", 10, "bold"),
+                            bg=self.card_bg,
+                            fg=self.text_color,
+                            padx=15,
+                            pady=5,
+                            cursor="hand2",
+                            bd=0)
+        bulk_btn.pack(pady=(10, 0))
+        
         # Generated Password Display
         password_frame = tk.LabelFrame(parent,
                                       text="Generated Password",
@@ -262,6 +286,9 @@ class PasswordGenerator:
                               insertbackground=self.text_color)
         check_entry.pack(fill=tk.X, pady=(5, 0), ipady=8)
         
+        # Re-score on every keystroke
+        self.check_password_var.trace_add("write", lambda *args: self.analyze_password(live=True))
+        
         # Check Button
         check_btn = tk.Button(input_frame,
                              text="🔍 CHECK STRENGTH",
@@ -304,6 +331,15 @@ class PasswordGenerator:
                                    fg=self.text_color)
         self.level_label.pack(pady=(5, 0))
         
+        # Estimated guesses and the patterns behind them
+        self.estimate_label = tk.Label(score_frame,
+                                      text="",
+                                      font=("Arial", 9),
+                                      bg=self.card_bg,
+                                      fg=self.text_color,
+                                      wraplength=500)
+        self.estimate_label.pack(pady=(5, 0))
+        
         # Criteria Checklist
         criteria_frame = tk.LabelFrame(results_frame,
                                       text="Security Criteria",
@@ -395,52 +431,118 @@ class PasswordGenerator:
             return
         
         # Build character pool
-        char_pool = ""
-        if self.lower_var.get():
-            char_pool += string.ascii_lowercase
-        if self.upper_var.get():
-            char_pool += string.ascii_uppercase
-        if self.digits_var.get():
-            char_pool += string.digits
-        if self.symbols_var.get():
-            char_pool += "!@#$%^&*"
+        char_sets = selected_sets(self.lower_var.get(), self.upper_var.get(),
+                                  self.digits_var.get(), self.symbols_var.get())
+        char_pool = "".join(char_sets)
         
         if not char_pool:
             messagebox.showerror("Error", "No characters available!")
             return
         
-        # Generate password using cryptographically secure random
-        try:
-            password = ''.join(secrets.choice(char_pool) for _ in range(length))
-        except:
-            # Fallback to random if secrets fails
-            password = ''.join(random.choice(char_pool) for _ in range(length))
-        
-        # Ensure at least one character from each selected set
-        if self.lower_var.get() and not any(c.islower() for c in password):
-            password = self.force_character(password, string.ascii_lowercase)
-        if self.upper_var.get() and not any(c.isupper() for c in password):
-            password = self.force_character(password, string.ascii_uppercase)
-        if self.digits_var.get() and not any(c.isdigit() for c in password):
-            password = self.force_character(password, string.digits)
-        if self.symbols_var.get() and not any(c in "!@#$%^&*" for c in password):
-            password = self.force_character(password, "!@#$%^&*")
-        
-        # Set password
-        self.password_var.set(password)
-        
-        # Add to history
-        self.add_to_history(password)
-        
-        # Update strength display
-        self.update_strength_display(password)
-        
-    def force_character(self, password, char_set):
-        """Ensure at least one character from char_set is in password"""
-        pos = random.randint(0, len(password)-1)
-        new_char = random.choice(char_set)
-        return password[:pos] + new_char + password[pos+1:]
+        with timed("PasswordGenerator.generate_password"):
+            # One pass, at least one character from each selected set
+            password = generate_password(length, char_pool, required=char_sets)
+            
+            # Set password
+            self.password_var.set(password)
+            
+            # Add to history
+            self.add_to_history(password)
+            
+            # Update strength display
+            self.update_strength_display(password)
+        
+    def bulk_generate(self):
+        """Generate many passwords to a file on worker processes, off the Tk thread"""
+        char_sets = selected_sets(self.lower_var.get(), self.upper_var.get(),
+                                  self.digits_var.get(), self.symbols_var.get())
+        if not char_sets:
+            messagebox.showwarning("Warning", "Please select at least one character set!")
+            return
+        count = simpledialog.askinteger("Bulk Generate", "How many passwords?",
+                                        initialvalue=100000, minvalue=1, parent=self.root)
+        if not count:
+            return
+        path = filedialog.asksaveasfilename(title="Save passwords to",
+                                            initialfile="passwords.txt",
+                                            defaultextension=".txt")
+        if not path:
+            return
+        length = self.length_var.get()
+        
+        # Progress window
+        window = tk.Toplevel(self.root)
+        window.title("Bulk Generate")
+        window.configure(bg=self.bg_color)
+        window.transient(self.root)
+        
+        status_label = tk.Label(window,
+                               text=f"Generating {count:,} passwords...",
+                               font=("Arial", 11),
+                               bg=self.bg_color,
+                               fg=self.text_color)
+        status_label.pack(padx=20, pady=(20, 10))
+        
+        progress_bar = ttk.Progressbar(window, length=350, maximum=count)
+        progress_bar.pack(padx=20, pady=(0, 15))
+        
+        # The farm runs on a worker thread; results come back through a queue
+        cancel = threading.Event()
+        updates = queue.Queue()
+        
+        def work():
+            try:
+                written = write_passwords_parallel(path, count, length, "".join(char_sets),
+                                                   char_sets, progress=updates.put, cancel=cancel)
+                updates.put(("done", written))
+            except Exception as e:
+                updates.put(("error", str(e)))
+        
+        def cancel_generation():
+            cancel.set()
+            cancel_btn.config(state=tk.DISABLED, text="Cancelling...")
+        
+        cancel_btn = tk.Button(window,
+                              text="✖ Cancel",
+                              command=cancel_generation,
+                              font=("Arial", 10, "bold"),
+                              bg=self.danger_color,
+                              fg="white",
+                              padx=15,
+                              pady=5,
+                              cursor="hand2",
+                              bd=0)
+        cancel_btn.pack(pady=(0, 20))
+        window.protocol("WM_DELETE_WINDOW", cancel_generation)
+        
+        start = time.perf_counter()
+        
+        def poll():
+            result = None
+            while not updates.empty():
+                item = updates.get()
+                if isinstance(item, tuple):
+                    result = item
+                else:
+                    rate = item / max(time.perf_counter() - start, 1e-9)
+                    progress_bar.config(value=item)
+                    status_label.config(text=f"{item:,} of {count:,} passwords ({rate:,.0f}/s)")
+            if result is None:
+                window.after(100, poll)
+                return
+            window.destroy()
+            kind, value = result
+            if kind == "error":
+                messagebox.showerror("Error", f"Bulk generation failed: {value}")
+            elif value < count:
+                messagebox.showinfo("Cancelled", f"Stopped after {value:,} passwords in '{path}'")
+            else:
+                messagebox.showinfo("Success", f"{value:,} passwords saved to '{path}'")
+        
+        threading.Thread(target=work, daemon=True).start()
+        poll()
     
+    @profiled
     def update_strength_display(self, password):
         """Update the strength indicator"""
         strength = self.calculate_strength(password)
@@ -469,52 +571,22 @@ class PasswordGenerator:
                                          fill=colors.get(strength['level'], self.accent_color), 
                                          outline='')
     
+    def load_estimator(self):
+        """Build the guess estimator off the Tk thread"""
+        try:
+            self.estimator = entropy_estimator()
+        except OSError as e:
+            print(f"Error loading weak patterns: {e}")
+            self.estimator = entropy_estimator([])
+    
     def calculate_strength(self, password):
         """Calculate password strength score"""
-        score = 0
-        
-        # Length score (up to 40 points)
-        length = len(password)
-        score += min(length * 2, 40)
-        
-        # Character variety scores
-        has_lower = any(c.islower() for c in password)
-        has_upper = any(c.isupper() for c in password)
-        has_digit = any(c.isdigit() for c in password)
-        has_symbol = any(c in "!@#$%^&*" for c in password)
-        
-        if has_lower:
-            score += 10
-        if has_upper:
-            score += 15
-        if has_digit:
-            score += 15
-        if has_symbol:
-            score += 20
-        
-        # Deduct for common patterns
-        common_patterns = ['123', 'abc', 'password', 'qwerty', 'admin']
-        for pattern in common_patterns:
-            if pattern in password.lower():
-                score -= 20
-        
-        # Ensure score is within bounds
-        score = max(0, min(score, 100))
-        
-        # Determine level
-        if score < 30:
-            level = "Very Weak"
-        elif score < 50:
-            level = "Weak"
-        elif score < 70:
-            level = "Moderate"
-        elif score < 85:
-            level = "Strong"
-        else:
-            level = "Very Strong"
-        
-        return {'score': score, 'level': level}
+        # Wait for the worker if the first password arrives before the estimator is ready
+        if self.estimator is None:
+            self.estimator_thread.join()
+        return self.estimator.estimate(password)
     
+    @profiled
     def add_to_history(self, password):
         """Add password to history"""
         entry = {
@@ -536,6 +608,7 @@ class PasswordGenerator:
         # Save history
         self.save_history()
     
+    @profiled
     def update_history_display(self):
         """Update the history text area"""
         self.history_text.config(state=tk.NORMAL)
@@ -562,7 +635,8 @@ class PasswordGenerator:
         
         try:
             # Try different methods to copy to clipboard
-            self.copy_to_clipboard(password)
+            with timed("PasswordGenerator.copy_password"):
+                self.copy_to_clipboard(password)
             messagebox.showinfo("Success", "Password copied to clipboard!")
         except Exception as e:
             # Show password for manual copying
@@ -597,71 +671,83 @@ class PasswordGenerator:
             messagebox.showwarning("Warning", "No password to save!")
             return
         
-        # Simple save dialog
-        label = f"Password_{len(self.saved_passwords)+1}"
-        
-        self.saved_passwords.append({
-            'label': label,
-            'password': self.simple_encrypt(password),
-            'date': datetime.now().strftime("%Y-%m-%d %H:%M")
-        })
+        with timed("PasswordGenerator.save_current_password"):
+            # Simple save dialog
+            label = f"Password_{len(self.saved_passwords)+1}"
+            
+            self.saved_passwords.append({
+                'label': label,
+                'password': self.simple_encrypt(password),
+                'date': datetime.now().strftime("%Y-%m-%d %H:%M")
+            })
+            
+            self.save_saved_passwords()
         
-        self.save_saved_passwords()
         messagebox.showinfo("Success", f"Password saved as '{label}'")
     
     def simple_encrypt(self, text):
         """Simple encryption for demo purposes"""
         return hashlib.sha256(text.encode()).hexdigest()[:20]
     
-    def analyze_password(self):
+    def analyze_password(self, live=False):
         """Analyze password strength"""
         password = self.check_password_var.get()
         
         if not password:
-            messagebox.showwarning("Warning", "Please enter a password to analyze!")
+            if not live:
+                messagebox.showwarning("Warning", "Please enter a password to analyze!")
             return
         
-        # Calculate strength
-        strength = self.calculate_strength(password)
-        
-        # Update score display
-        self.score_label.config(text=f"Score: {strength['score']}/100")
-        
-        # Update progress bar
-        self.score_bar.delete("all")
-        width = 300
-        fill_width = int(width * (strength['score'] / 100))
-        
-        colors = {
-            "Very Weak": self.danger_color,
-            "Weak": "#e17055",
-            "Moderate": self.warning_color,
-            "Strong": "#00cec9",
-            "Very Strong": self.success_color
-        }
-        
-        self.score_bar.create_rectangle(0, 0, width, 20, fill='#3a3a5a', outline='')
-        self.score_bar.create_rectangle(0, 0, fill_width, 20, 
-                                       fill=colors.get(strength['level'], self.accent_color), 
-                                       outline='')
-        
-        # Update level
-        self.level_label.config(
-            text=f"Strength Level: {strength['level']}",
-            fg=colors.get(strength['level'], self.text_color)
-        )
-        
-        # Update criteria checklist
-        criteria = [
-            ("Length ≥ 12 characters", len(password) >= 12),
-            ("Contains lowercase", any(c.islower() for c in password)),
-            ("Contains uppercase", any(c.isupper() for c in password)),
-            ("Contains digits", any(c.isdigit() for c in password)),
-            ("Contains symbols", any(c in "!@#$%^&*" for c in password))
-        ]
-        
-        for (text, result), var in zip(criteria, self.criteria_vars.values()):
-            var.set(result)
+        with timed("PasswordGenerator.analyze_password"):
+            # Calculate strength
+            strength = self.calculate_strength(password)
+            
+            # Update score display
+            self.score_label.config(text=f"Score: {strength['score']}/100")
+            
+            # Update progress bar
+            self.score_bar.delete("all")
+            width = 300
+            fill_width = int(width * (strength['score'] / 100))
+            
+            colors = {
+                "Very Weak": self.danger_color,
+                "Weak": "#e17055",
+                "Moderate": self.warning_color,
+                "Strong": "#00cec9",
+                "Very Strong": self.success_color
+            }
+            
+            self.score_bar.create_rectangle(0, 0, width, 20, fill='#3a3a5a', outline='')
+            self.score_bar.create_rectangle(0, 0, fill_width, 20, 
+                                           fill=colors.get(strength['level'], self.accent_color), 
+                                           outline='')
+            
+            # Update level
+            self.level_label.config(
+                text=f"Strength Level: {strength['level']}",
+                fg=colors.get(strength['level'], self.text_color)
+            )
+            
+            # Update estimate
+            found = [f"{m['pattern']} '{m['token']}'" for m in strength['sequence']
+                     if m['pattern'] != "bruteforce"]
+            self.estimate_label.config(
+                text=f"About 10^{strength['guesses_log10']:.1f} guesses"
+                     + (f" (found {', '.join(found)})" if found else "")
+            )
+            
+            # Update criteria checklist
+            criteria = [
+                ("Length ≥ 12 characters", len(password) >= 12),
+                ("Contains lowercase", strength['classes']['lower']),
+                ("Contains uppercase", strength['classes']['upper']),
+                ("Contains digits", strength['classes']['digits']),
+                ("Contains symbols", strength['classes']['symbols'])
+            ]
+            
+            for (text, result), var in zip(criteria, self.criteria_vars.values()):
+                var.set(result)
     
     def clear_history(self):
         """Clear password history"""
@@ -673,7 +759,7 @@ class PasswordGenerator:
     def export_history(self):
         """Export history to file"""
         try:
-            with open("password_export.txt", "w") as f:
+            with timed("PasswordGenerator.export_history"), open("password_export.txt", "w") as f:
                 f.write("Password History Export\n")
                 f.write("=" * 50 + "\n\n")
                 for entry in self.password_history:
@@ -682,16 +768,19 @@ class PasswordGenerator:
                     f.write(f"Length: {entry['length']}\n")
                     f.write(f"Strength: {entry['strength']}\n")
                     f.write("-" * 30 + "\n")
+                count_bytes("password_export.txt", f.tell())
             
             messagebox.showinfo("Success", "History exported to 'password_export.txt'")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export: {str(e)}")
     
+    @profiled
     def save_history(self):
         """Save history to file"""
         try:
             with open(self.history_file, 'w') as f:
                 json.dump(self.password_history, f, indent=2)
+                count_bytes(self.history_file, f.tell())
         except:
             pass
     
@@ -704,11 +793,13 @@ class PasswordGenerator:
             except:
                 self.password_history = []
     
+    @profiled
     def save_saved_passwords(self):
         """Save passwords to file"""
         try:
             with open(self.saved_file, 'w') as f:
                 json.dump(self.saved_passwords, f, indent=2)
+                count_bytes(self.saved_file, f.tell())
         except:
             pass
     
@@ -0,0 +1,948 @@
+"""GUI-free password generation shared by the Password Generator and its CLI"""
+import bisect
+import itertools
+import math
+import os
+import string
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import date
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from profiling import count_bytes
+
+SYMBOLS = "!@#$%^&*"
+CHARACTER_SETS = {
+    "lower": string.ascii_lowercase,
+    "upper": string.ascii_uppercase,
+    "digits": string.digits,
+    "symbols": SYMBOLS,
+}
+# Entropy is drawn from the OS in blocks of this many bytes
+BLOCK_SIZE = 1 << 16
+
+def selected_sets(lower=True, upper=True, digits=True, symbols=True):
+    """Return the selected character sets, in a fixed order"""
+    selected = {"lower": lower, "upper": upper, "digits": digits, "symbols": symbols}
+    return [chars for name, chars in CHARACTER_SETS.items() if selected[name]]
+
+def build_pool(lower=True, upper=True, digits=True, symbols=True):
+    """Join the selected character sets into one pool"""
+    return "".join(selected_sets(lower, upper, digits, symbols))
+
+class CharacterSampler:
+    """Maps blocks of os.urandom bytes to pool characters without modulo bias
+
+    A byte b is kept only below the largest multiple of the pool size that
+    fits in a byte, so b % len(pool) is uniform; the rest are rejected. The
+    mapping runs in C through bytes.translate, or NumPy when it is used.
+    """
+
+    def __init__(self, pool, block_size=BLOCK_SIZE, use_numpy=None):
+        pool = "".join(dict.fromkeys(pool))
+        if not pool:
+            raise ValueError("No characters available!")
+        if len(pool) > 256 or not pool.isascii():
+            raise ValueError("The character pool must be at most 256 ASCII characters")
+        self.pool = pool
+        self.block_size = block_size
+        self.limit = 256 - 256 % len(pool)
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        if self.use_numpy and np is None:
+            raise ValueError("NumPy is not installed")
+        # Byte -> pool character for accepted bytes; rejected bytes are deleted
+        encoded = pool.encode("ascii")
+        self.table = bytes(encoded[b % len(pool)] for b in range(self.limit)) + bytes(256 - self.limit)
+        self.rejected = bytes(range(self.limit, 256))
+        if self.use_numpy:
+            self.lookup = np.frombuffer(self.table, dtype=np.uint8)
+
+    def sample(self, count):
+        """Return count uniformly drawn pool characters as ASCII bytes"""
+        chunks = []
+        needed = count
+        while needed > 0:
+            # Draw a little extra so one block usually covers the rejections
+            block = os.urandom(min(self.block_size, needed * 256 // self.limit + 16))
+            if self.use_numpy:
+                raw = np.frombuffer(block, dtype=np.uint8)
+                chunk = self.lookup[raw[raw < self.limit]].tobytes()
+            else:
+                chunk = block.translate(self.table, self.rejected)
+            chunks.append(chunk[:needed])
+            needed -= len(chunks[-1])
+        return b"".join(chunks)
+
+class EntropyStream:
+    """Buffered os.urandom bytes turned into unbiased integers below a bound
+
+    Draws from the same source as the secrets module, a block at a time
+    instead of one system call per number.
+    """
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self.buffer = b""
+        self.position = 0
+
+    def take(self, count):
+        """Return the next count random bytes"""
+        if self.position + count > len(self.buffer):
+            self.buffer = self.buffer[self.position:] + os.urandom(max(self.block_size, count))
+            self.position = 0
+        self.position += count
+        return self.buffer[self.position - count:self.position]
+
+    def randbelow(self, n):
+        """Return a uniform integer in [0, n)"""
+        if n <= 256:
+            # One byte at a time, keeping bytes below a multiple of n
+            limit = 256 - 256 % n
+            while True:
+                if self.position >= len(self.buffer):
+                    self.buffer = os.urandom(self.block_size)
+                    self.position = 0
+                byte = self.buffer[self.position]
+                self.position += 1
+                if byte < limit:
+                    return byte % n
+        bits = n.bit_length()
+        size = (bits + 7) // 8
+        while True:
+            value = int.from_bytes(self.take(size), "big") >> (8 * size - bits)
+            if value < n:
+                return value
+
+    def shuffle(self, items):
+        """Fisher-Yates shuffle in place"""
+        for i in range(len(items) - 1, 0, -1):
+            j = self.randbelow(i + 1)
+            items[i], items[j] = items[j], items[i]
+
+def generate_password(length, pool, required=()):
+    """Generate one password containing a character of every required set"""
+    if required:
+        return ConstrainedGenerator(pool, required, length).generate()
+    return CharacterSampler(pool).sample(length).decode("ascii")
+
+def generate_passwords(count, length, pool, batch_size=10000, use_numpy=None, required=()):
+    """Yield lists of up to batch_size passwords until count are made"""
+    if length < 1:
+        raise ValueError("Password length must be at least 1")
+    if required:
+        generator = ConstrainedGenerator(pool, required, length, use_numpy)
+    else:
+        sampler = CharacterSampler(pool, use_numpy=use_numpy)
+    made = 0
+    while made < count:
+        batch = min(batch_size, count - made)
+        if required:
+            yield generator.generate_many(batch)
+        else:
+            text = sampler.sample(batch * length).decode("ascii")
+            yield [text[i:i + length] for i in range(0, batch * length, length)]
+        made += batch
+
+def open_secret_file(path):
+    """Create or truncate a text file only its owner can read"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    return open(fd, 'w', encoding='ascii', newline='\n')
+
+def write_passwords(path, count, length, pool, batch_size=10000, progress=None, use_numpy=None,
+                    required=()):
+    """Stream count passwords to a file, one per line; return the count"""
+    written = 0
+    # Owner-only permissions: the file holds live credentials
+    with open_secret_file(path) as f:
+        for batch in generate_passwords(count, length, pool, batch_size, use_numpy, required):
+            f.write("\n".join(batch) + "\n")
+            written += len(batch)
+            if progress is not None:
+                progress(written)
+        count_bytes(os.path.basename(path), f.tell())
+    return written
+
+@lru_cache(maxsize=64)
+def composition_weights(sizes, minimums, length):
+    """Count the strings each class count leads to, for sampling compositions
+
+    weights[i][r] is (counts, cumulative ways, total) for class i with r
+    positions left: the ways of n = counts[k] characters of class i count
+    the strings whose remaining r - n positions can still satisfy classes
+    i+1.. . Counts are exact integers.
+    """
+    classes = len(sizes)
+    # totals[i][r]: strings of length r over classes i.. meeting their minimums
+    totals = [[0] * (length + 1) for _ in range(classes + 1)]
+    totals[classes][0] = 1
+    weights = [[None] * (length + 1) for _ in range(classes)]
+    for i in range(classes - 1, -1, -1):
+        for r in range(length + 1):
+            options = [(n, math.comb(r, n) * sizes[i] ** n * totals[i + 1][r - n])
+                       for n in range(minimums[i], r + 1)]
+            options = [(n, ways) for n, ways in options if ways]
+            cumulative = [0]
+            for n, ways in options:
+                cumulative.append(cumulative[-1] + ways)
+            weights[i][r] = ([n for n, ways in options], cumulative[1:], cumulative[-1])
+            totals[i][r] = cumulative[-1]
+    return weights, totals[0][length]
+
+@lru_cache(maxsize=64)
+def composition_table(sizes, minimums, length, limit=100000):
+    """List every class composition with cumulative ways, or None past limit"""
+    if math.comb(length - sum(minimums) + len(sizes) - 1, len(sizes) - 1) > limit:
+        return None
+    weights = composition_weights(sizes, minimums, length)[0]
+    compositions, cumulative = [], []
+    running = 0
+    stack = [((), length, 1)]
+    while stack:
+        counts, left, ways = stack.pop()
+        i = len(counts)
+        if i == len(sizes):
+            running += ways
+            compositions.append(counts)
+            cumulative.append(running)
+            continue
+        # n characters of class i: choose their positions and their values
+        for n in weights[i][left][0]:
+            stack.append((counts + (n,), left - n, ways * math.comb(left, n) * sizes[i] ** n))
+    return compositions, cumulative
+
+class ConstrainedGenerator:
+    """Uniformly random passwords that contain every required character set
+
+    Instead of patching a finished password, the number of characters of
+    each class is drawn first, weighted by how many valid passwords have
+    that composition. Those characters are then filled in and shuffled.
+    Every result is valid on the first pass, and each valid password is
+    equally likely.
+    """
+
+    def __init__(self, pool, required, length, use_numpy=None):
+        required = ["".join(dict.fromkeys(chars)) for chars in required if chars]
+        pool = "".join(dict.fromkeys(pool + "".join(required)))
+        if len(required) > length:
+            raise ValueError(f"A password needs at least {len(required)} characters "
+                             "to include every selected set")
+        claimed = "".join(required)
+        if len(set(claimed)) != len(claimed):
+            raise ValueError("Required character sets must not overlap")
+        # Pool characters outside every required set form one optional class
+        optional = "".join(c for c in pool if c not in set(claimed))
+        self.classes = required + ([optional] if optional else [])
+        self.minimums = tuple([1] * len(required) + ([0] if optional else []))
+        self.length = length
+        self.samplers = [CharacterSampler(chars, use_numpy=use_numpy) for chars in self.classes]
+        sizes = tuple(len(chars) for chars in self.classes)
+        self.weights, self.total = composition_weights(sizes, self.minimums, length)
+        # With few enough compositions one draw picks the whole composition
+        self.table = composition_table(sizes, self.minimums, length)
+        self.entropy = EntropyStream()
+        # Samplers of swap targets 0..i as byte values, while they fit in ASCII
+        self.swap_samplers = ([CharacterSampler("".join(map(chr, range(i + 1))), use_numpy=use_numpy)
+                               for i in range(length - 1, 0, -1)] if length <= 128 else [])
+
+    def composition(self):
+        """Draw how many characters of each class one password gets"""
+        if self.table is not None:
+            compositions, cumulative = self.table
+            return compositions[bisect.bisect_right(cumulative, self.entropy.randbelow(self.total))]
+        counts = []
+        left = self.length
+        for options in self.weights:
+            choices, cumulative, total = options[left]
+            n = choices[bisect.bisect_right(cumulative, self.entropy.randbelow(total))]
+            counts.append(n)
+            left -= n
+        return counts
+
+    def generate(self):
+        """Generate one password"""
+        return self.generate_many(1)[0]
+
+    def generate_many(self, count):
+        """Generate count passwords, drawing each class's characters in one block"""
+        compositions = [self.composition() for _ in range(count)]
+        # One sample per class for the whole batch, consumed in order
+        drawn = [sampler.sample(sum(counts[i] for counts in compositions)).decode("ascii")
+                 for i, sampler in enumerate(self.samplers)]
+        offsets = [0] * len(drawn)
+        # Fisher-Yates swap targets for every password: column k holds the
+        # uniform j in [0, length - 1 - k] for each password in the batch
+        swaps = [sampler.sample(count) for sampler in self.swap_samplers]
+        positions = range(self.length - 1, 0, -1)
+        passwords = []
+        for index, counts in enumerate(compositions):
+            chars = []
+            for i, n in enumerate(counts):
+                chars.extend(drawn[i][offsets[i]:offsets[i] + n])
+                offsets[i] += n
+            if swaps:
+                for i, column in zip(positions, swaps):
+                    j = column[index]
+                    chars[i], chars[j] = chars[j], chars[i]
+            else:
+                self.entropy.shuffle(chars)
+            passwords.append("".join(chars))
+        return passwords
+
+def generate_shard(count, length, pool, required):
+    """Worker entry point: one shard of passwords as newline-terminated text"""
+    # Built inside the worker, so no buffered entropy is shared across a fork;
+    # each process reads its own stream from the OS CSPRNG
+    batches = generate_passwords(count, length, pool, required=required)
+    return "".join("\n".join(batch) + "\n" for batch in batches)
+
+class GenerationFarm:
+    """Shards a large generation request across worker processes
+
+    At most two shards per worker are in flight, so memory stays bounded
+    however many passwords are requested. Shards are written in request
+    order, or as they finish when ordered is False.
+    """
+
+    def __init__(self, workers=None, shard_size=50000):
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+
+    def run(self, output, count, length, pool, required=(), ordered=True, progress=None,
+            cancel=None):
+        """Write count passwords to an open text stream; return how many were written"""
+        if length < 1:
+            raise ValueError("Password length must be at least 1")
+        # Fail in this process, not in every worker, on a bad pool or length
+        ConstrainedGenerator(pool, required, length) if required else CharacterSampler(pool)
+        shards = [min(self.shard_size, count - start) for start in range(0, count, self.shard_size)]
+        written = reported = 0
+        next_shard = 0
+        # Shard index -> finished text waiting for its turn (ordered mode)
+        finished = {}
+        next_write = 0
+        with ProcessPoolExecutor(self.workers) as executor:
+            running = {}
+            try:
+                while next_shard < len(shards) or running:
+                    while next_shard < len(shards) and len(running) < 2 * self.workers:
+                        future = executor.submit(generate_shard, shards[next_shard], length,
+                                                 pool, list(required))
+                        running[future] = next_shard
+                        next_shard += 1
+                    done, _ = wait(running, timeout=0.1, return_when=FIRST_COMPLETED)
+                    if cancel is not None and cancel.is_set():
+                        break
+                    for future in done:
+                        finished[running.pop(future)] = future.result()
+                    # Write whatever may go out now
+                    ready = ([next_write] if next_write in finished else []) if ordered else list(finished)
+                    while ready:
+                        index = ready.pop()
+                        output.write(finished.pop(index))
+                        written += shards[index]
+                        if ordered:
+                            next_write += 1
+                            if next_write in finished:
+                                ready.append(next_write)
+                    if progress is not None and written != reported:
+                        progress(written)
+                        reported = written
+            finally:
+                for future in running:
+                    future.cancel()
+        return written
+
+def write_passwords_parallel(path, count, length, pool, required=(), workers=None, ordered=True,
+                             progress=None, cancel=None, shard_size=50000):
+    """Stream count passwords made by worker processes to a file; return the count"""
+    farm = GenerationFarm(workers, shard_size)
+    with open_secret_file(path) as f:
+        written = farm.run(f, count, length, pool, required, ordered, progress, cancel)
+        count_bytes(os.path.basename(path), f.tell())
+    return written
+
+# Substrings that cost a password points, before any wordlist is loaded
+COMMON_PATTERNS = ("123", "abc", "password", "qwerty", "admin")
+# Wordlist read by the strength meter when it exists, one entry per line
+WEAK_PATTERNS_FILE = "weak_patterns.txt"
+# Shorter wordlist entries would match inside almost every password
+MIN_PATTERN_LENGTH = 3
+PATTERN_PENALTY = 20
+# Character class bits, with the points each class adds to the score
+CLASS_BITS = {"lower": 1, "upper": 2, "digits": 4, "symbols": 8}
+CLASS_SCORES = {"lower": 10, "upper": 15, "digits": 15, "symbols": 20}
+STRENGTH_LEVELS = ((30, "Very Weak"), (50, "Weak"), (70, "Moderate"), (85, "Strong"))
+
+def class_bit(ch):
+    """Return the class bit of a character outside the ASCII table"""
+    if ch.islower():
+        return CLASS_BITS["lower"]
+    if ch.isupper():
+        return CLASS_BITS["upper"]
+    if ch.isdigit():
+        return CLASS_BITS["digits"]
+    return 0
+
+class PatternMatcher:
+    """Aho-Corasick automaton finding every pattern inside a text in one pass
+
+    Each trie state keeps its goto edges, a failure link to the longest
+    proper suffix that is also a trie prefix, and the patterns ending there
+    (its own plus those down the failure chain). Edges for the upper-case
+    forms are added after linking, so matching ignores case without
+    lowercasing the text. A scan costs one step per character plus at most
+    as many failure hops, however many patterns are loaded.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(dict.fromkeys(patterns))
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for index, pattern in enumerate(self.patterns):
+            self.insert(pattern, index)
+        self.link()
+        self.fold_case()
+
+    def insert(self, pattern, index):
+        """Add one lowercase pattern to the trie"""
+        state = 0
+        for ch in pattern:
+            edges = self.goto[state]
+            if ch not in edges:
+                edges[ch] = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(())
+            state = edges[ch]
+        self.out[state] = (index,)
+
+    def link(self):
+        """Set the failure links and merged outputs, breadth first"""
+        goto, fail, out = self.goto, self.fail, self.out
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in goto[state].items():
+                queue.append(child)
+                target = fail[state]
+                while target and ch not in goto[target]:
+                    target = fail[target]
+                target = goto[target].get(ch, 0)
+                fail[child] = target
+                if out[target]:
+                    out[child] = out[child] + out[target]
+
+    def fold_case(self):
+        """Give every lowercase edge an upper-case twin"""
+        for edges in self.goto:
+            for ch, child in list(edges.items()):
+                upper = ch.upper()
+                if len(upper) == 1 and upper not in edges:
+                    edges[upper] = child
+
+    def find(self, text):
+        """Return the patterns found in text, in pattern order"""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        found = set()
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return [self.patterns[index] for index in sorted(found)]
+
+def read_wordlist(path):
+    """Yield the usable entries of a wordlist file, lowercased, skipping # comments"""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            entry = line.strip().lower()
+            if len(entry) >= MIN_PATTERN_LENGTH and not entry.startswith("#"):
+                yield entry
+
+class StrengthAnalyzer:
+    """Scores passwords for the strength meter in one pass over each
+
+    One loop over the characters sets the class bits and steps the weak
+    pattern automaton together; each distinct pattern found costs 20 points.
+    With only COMMON_PATTERNS the scores match the original meter.
+    """
+
+    def __init__(self, patterns=COMMON_PATTERNS):
+        self.matcher = PatternMatcher(pattern.lower() for pattern in patterns)
+        self.class_bits = {}
+        for name, chars in CHARACTER_SETS.items():
+            for ch in chars:
+                self.class_bits[ch] = CLASS_BITS[name]
+
+    def scan(self, password):
+        """Return the class bits and the indices of the patterns found"""
+        bits = self.class_bits
+        goto, fail, out = self.matcher.goto, self.matcher.fail, self.matcher.out
+        mask = state = 0
+        found = None
+        for ch in password:
+            bit = bits.get(ch)
+            if bit is None:
+                bit = bits[ch] = class_bit(ch)
+            mask |= bit
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                if found is None:
+                    found = set()
+                found.update(out[state])
+        return mask, found or ()
+
+    def score(self, length, mask, found):
+        """Return the score and level for a scanned password"""
+        score = min(length * 2, 40) - PATTERN_PENALTY * len(found)
+        for name, bit in CLASS_BITS.items():
+            if mask & bit:
+                score += CLASS_SCORES[name]
+        score = max(0, min(score, 100))
+        level = next((name for limit, name in STRENGTH_LEVELS if score < limit), "Very Strong")
+        return score, level
+
+    def analyze(self, password):
+        """Return the score, level, classes present and weak patterns of a password"""
+        mask, found = self.scan(password)
+        score, level = self.score(len(password), mask, found)
+        patterns = self.matcher.patterns
+        return {'score': score, 'level': level,
+                'classes': {name: bool(mask & bit) for name, bit in CLASS_BITS.items()},
+                'patterns': [patterns[index] for index in sorted(found)]}
+
+    def audit(self, passwords):
+        """Yield (password, score, level) for each password in a stream"""
+        for password in passwords:
+            mask, found = self.scan(password)
+            yield (password, *self.score(len(password), mask, found))
+
+@lru_cache(maxsize=8)
+def cached_analyzer(sources):
+    """Build the analyzer for a tuple of (path, mtime, size) wordlist versions"""
+    patterns = list(COMMON_PATTERNS)
+    for path, _, _ in sources:
+        patterns.extend(read_wordlist(path))
+    return StrengthAnalyzer(patterns)
+
+def strength_analyzer(wordlists=None):
+    """Return the analyzer for COMMON_PATTERNS plus wordlist files, built once per file version
+
+    With no wordlists given, WEAK_PATTERNS_FILE is used when it exists.
+    """
+    return cached_analyzer(wordlist_sources(wordlists))
+
+# Most common passwords, most common first; a dictionary match costs its rank
+COMMON_PASSWORDS = (
+    "123456", "password", "12345678", "qwerty", "123456789", "12345", "1234", "111111",
+    "1234567", "dragon", "123123", "baseball", "abc123", "football", "monkey", "letmein",
+    "696969", "shadow", "master", "666666", "qwertyuiop", "123321", "mustang", "1234567890",
+    "michael", "654321", "superman", "1qaz2wsx", "7777777", "121212", "000000", "qazwsx",
+    "123qwe", "killer", "trustno1", "jordan", "jennifer", "zxcvbnm", "asdfgh", "hunter",
+    "buster", "soccer", "harley", "batman", "andrew", "tigger", "sunshine", "iloveyou",
+    "2000", "charlie", "robert", "thomas", "hockey", "ranger", "daniel", "starwars",
+    "112233", "george", "computer", "michelle", "jessica", "pepper", "1111", "zxcvbn",
+    "555555", "11111111", "131313", "freedom", "777777", "pass", "maggie", "159753",
+    "aaaaaa", "ginger", "princess", "joshua", "cheese", "amanda", "summer", "love",
+    "ashley", "nicole", "chelsea", "biteme", "matthew", "access", "yankees", "987654321",
+    "dallas", "austin", "thunder", "taylor", "matrix", "admin", "welcome", "login",
+    "secret", "dragon1", "passw0rd", "password1", "qwerty123", "hello", "abc",
+)
+# Key rows of a US keyboard, unshifted and shifted; the leading space slants
+# each row so the keys above (r, c) are (r-1, c) and (r-1, c+1)
+KEYBOARD_ROWS = (("`1234567890-=", "~!@#$%^&*()_+"),
+                 (" qwertyuiop[]\\", " QWERTYUIOP{}|"),
+                 (" asdfghjkl;'", ' ASDFGHJKL:"'),
+                 (" zxcvbnm,./", " ZXCVBNM<>?"))
+# Neighbour offsets (row, column), one per walking direction
+KEYBOARD_DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (-1, 1), (1, -1), (1, 0))
+# A sequence of k matches costs k! times their product, plus this per extra match
+MIN_GUESSES_BEFORE_GROWING_SEQUENCE = 10000
+MIN_SUBMATCH_GUESSES_SINGLE_CHAR = 10
+MIN_SUBMATCH_GUESSES_MULTI_CHAR = 50
+BRUTEFORCE_CARDINALITY = 10
+MIN_YEAR_SPACE = 20
+REFERENCE_YEAR = date.today().year
+# Ways to split a run of digits into day, month and year, by run length
+DATE_SPLITS = {4: ((1, 2), (2, 3)), 5: ((1, 3), (2, 3)), 6: ((1, 2), (2, 4), (4, 5)),
+               7: ((1, 3), (2, 3), (4, 5), (4, 6)), 8: ((2, 4), (4, 6))}
+DATE_SEPARATORS = " /\\_.-"
+# Longer passwords are scored in pieces of this length, to bound the work per password
+MAX_ESTIMATE_LENGTH = 100
+# Points on the 0-100 meter for log10(guesses): the levels start at 10^3, 10^6, 10^8, 10^10
+SCORE_CURVE = ((0, 0), (3, 30), (6, 50), (8, 70), (10, 85), (14, 100))
+
+Match = namedtuple("Match", "i j pattern token guesses")
+
+def keyboard_graph():
+    """Return {key: {adjacent key: direction}}, the key count and the average degree"""
+    keys = {}
+    for r, (plain, shifted) in enumerate(KEYBOARD_ROWS):
+        for c, (lower, upper) in enumerate(zip(plain, shifted)):
+            if lower != " ":
+                keys[r, c] = (lower, upper)
+    graph = {}
+    degrees = 0
+    for (r, c), pair in keys.items():
+        adjacent = {}
+        for direction, (dr, dc) in enumerate(KEYBOARD_DIRECTIONS):
+            for neighbour in keys.get((r + dr, c + dc), ()):
+                adjacent[neighbour] = direction
+        degrees += len(adjacent) // 2
+        for key in pair:
+            graph[key] = adjacent
+    return graph, len(graph), degrees / len(keys)
+
+KEYBOARD_GRAPH, KEYBOARD_STARTS, KEYBOARD_DEGREE = keyboard_graph()
+SHIFTED_KEYS = frozenset("".join(shifted for _, shifted in KEYBOARD_ROWS).replace(" ", ""))
+
+def uppercase_variations(token):
+    """Return how many capitalisations of a word an attacker would try to reach this one"""
+    if token.lower() == token:
+        return 1
+    upper = sum(1 for ch in token if ch.isupper())
+    lower = sum(1 for ch in token if ch.islower())
+    # First letter, last letter or all capitals are tried first
+    if lower == 0 or (upper == 1 and (token[0].isupper() or token[-1].isupper())):
+        return 2
+    return sum(math.comb(upper + lower, k) for k in range(1, min(upper, lower) + 1))
+
+@lru_cache(maxsize=4096)
+def spatial_guesses(length, turns, shifted):
+    """Return the guesses for a keyboard walk of a length with turns and shifted keys"""
+    guesses = 0
+    for i in range(2, length + 1):
+        for j in range(1, min(turns, i - 1) + 1):
+            guesses += math.comb(i - 1, j - 1) * KEYBOARD_STARTS * KEYBOARD_DEGREE ** j
+    guesses = int(guesses)
+    if shifted:
+        unshifted = length - shifted
+        if unshifted == 0:
+            guesses *= 2
+        else:
+            guesses *= sum(math.comb(length, k) for k in range(1, min(shifted, unshifted) + 1))
+    return guesses
+
+def sequence_guesses(token, ascending):
+    """Return the guesses for a run like abc, 2468 or zyx"""
+    if token[0] in "aAzZ019":
+        base = 4
+    elif token[0].isdigit():
+        base = 10
+    else:
+        base = 26
+    return base * len(token) * (1 if ascending else 2)
+
+def year_guesses(year):
+    """Return the guesses for a year, smallest near the current one"""
+    return max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE)
+
+def day_month_year(parts):
+    """Return the year of the first valid day/month/year reading of three numbers, or None"""
+    for year, first, second in ((parts[2], parts[0], parts[1]), (parts[0], parts[1], parts[2])):
+        if year < 100:
+            year += 1900 if year > 50 else 2000
+        elif not 1000 <= year <= 2050:
+            continue
+        if (1 <= first <= 12 and 1 <= second <= 31) or (1 <= first <= 31 and 1 <= second <= 12):
+            return year
+    return None
+
+@lru_cache(maxsize=4096)
+def date_guesses(token):
+    """Return ("date" or "year", guesses) when a substring reads as a date or year, else None"""
+    best = None
+    if token.isdigit():
+        if len(token) == 4 and token[:2] in ("19", "20"):
+            best = ("year", year_guesses(int(token)))
+        years = []
+        for first, second in DATE_SPLITS.get(len(token), ()):
+            year = day_month_year((int(token[:first]), int(token[first:second]),
+                                   int(token[second:])))
+            if year is not None:
+                years.append(year)
+        if years:
+            year = min(years, key=lambda y: abs(y - REFERENCE_YEAR))
+            guesses = year_guesses(year) * 365
+            if best is None or guesses < best[1]:
+                best = ("date", guesses)
+        return best
+    # Separated forms such as 1/2/1990 or 1990-02-01
+    for separator in DATE_SEPARATORS:
+        parts = token.split(separator)
+        if len(parts) == 3 and all(part.isdigit() and len(part) <= 4 for part in parts):
+            if len(parts[1]) <= 2 and 6 <= len(token) <= 10:
+                year = day_month_year([int(part) for part in parts])
+                if year is not None:
+                    return ("date", year_guesses(year) * 365 * 4)
+    return None
+
+class PrefixState:
+    """Matcher and optimal-sequence state after one prefix of a password"""
+
+    __slots__ = ("node", "mask", "walk", "run", "rows")
+
+    def __init__(self, node, mask, walk, run, rows):
+        self.node = node
+        self.mask = mask
+        # (start, turns, last direction, shifted keys) of the keyboard walk ending here
+        self.walk = walk
+        # (start, delta) of the character sequence ending here
+        self.run = run
+        # Per end position: {match count: (guesses, product, last match)}
+        self.rows = rows
+
+class EntropyEstimator:
+    """zxcvbn-style estimate of the guesses needed to crack a password
+
+    Dictionary words (through a PatternMatcher ranked by frequency),
+    keyboard walks, repeats, sequences and dates are matched as spans, then
+    dynamic programming picks the sequence of spans, with brute force in
+    the gaps, that needs the fewest guesses. Everything at an end position
+    depends only on the prefix before it, so the state after each prefix
+    is memoized: re-scoring after one more keystroke does one new step.
+    """
+
+    MAX_MEMO = 20000
+
+    def __init__(self, words=COMMON_PASSWORDS):
+        self.matcher = PatternMatcher(word.lower() for word in words)
+        self.ranks = {index: index + 1 for index in range(len(self.matcher.patterns))}
+        self.memo = {}
+
+    def state(self, password):
+        """Return the PrefixState after password, extending the longest memoized prefix"""
+        length = len(password)
+        start = length
+        state = None
+        while start and state is None:
+            state = self.memo.get(password[:start])
+            if state is None:
+                start -= 1
+        if state is None:
+            state = PrefixState(0, 0, None, None, ())
+        for j in range(start + 1, length + 1):
+            state = self.step(password[:j], state)
+            if len(self.memo) >= self.MAX_MEMO:
+                self.memo.clear()
+            self.memo[password[:j]] = state
+        return state
+
+    def step(self, prefix, previous):
+        """Return the state after prefix from the state one character shorter"""
+        j = len(prefix)
+        ch = prefix[-1]
+        goto, fail, out = self.matcher.goto, self.matcher.fail, self.matcher.out
+        node = previous.node
+        while node and ch not in goto[node]:
+            node = fail[node]
+        node = goto[node].get(ch, 0)
+        bit = CLASS_BITS["symbols"] if ch in SYMBOLS else class_bit(ch)
+
+        matches = []
+        for index in out[node]:
+            word = self.matcher.patterns[index]
+            token = prefix[j - len(word):]
+            matches.append(Match(j - len(word), j, "dictionary", token,
+                                 self.ranks[index] * uppercase_variations(token)))
+        walk = run = None
+        if j > 1:
+            before = prefix[-2]
+            direction = KEYBOARD_GRAPH.get(before, {}).get(ch)
+            if direction is not None:
+                if previous.walk is not None:
+                    walk_start, turns, last, shifted = previous.walk
+                    walk = (walk_start, turns + (direction != last), direction,
+                            shifted + (ch in SHIFTED_KEYS))
+                else:
+                    walk = (j - 2, 1, direction, (before in SHIFTED_KEYS) + (ch in SHIFTED_KEYS))
+                if j - walk[0] >= 3:
+                    matches.append(Match(walk[0], j, "spatial", prefix[walk[0]:],
+                                         spatial_guesses(j - walk[0], walk[1], walk[3])))
+            delta = ord(ch) - ord(before)
+            if 0 < abs(delta) <= 5:
+                if previous.run is not None and previous.run[1] == delta:
+                    run = previous.run
+                else:
+                    run = (j - 2, delta)
+                if j - run[0] >= 3:
+                    token = prefix[run[0]:]
+                    matches.append(Match(run[0], j, "sequence", token,
+                                         sequence_guesses(token, delta > 0)))
+            matches.extend(self.repeats(prefix))
+        for size in range(4, min(j, 10) + 1):
+            token = prefix[j - size:]
+            if token[0].isdigit() and ch.isdigit():
+                found = date_guesses(token)
+                if found is not None:
+                    matches.append(Match(j - size, j, found[0], token, found[1]))
+
+        rows = previous.rows + (self.optimal_row(prefix, previous.rows, matches),)
+        return PrefixState(node, previous.mask | bit, walk, run, rows)
+
+    def repeats(self, prefix):
+        """Yield the repeats of a block (aaa, abab..) that end the prefix"""
+        j = len(prefix)
+        for size in range(1, j // 2 + 1):
+            block = prefix[j - size:]
+            if prefix[j - 2 * size:j - size] != block:
+                continue
+            count = 2
+            while count * size + size <= j and prefix[j - (count + 1) * size:j - count * size] == block:
+                count += 1
+            yield Match(j - count * size, j, "repeat", prefix[j - count * size:],
+                        self.guesses(block) * count)
+
+    def optimal_row(self, prefix, rows, matches):
+        """Return the cheapest way to cover the prefix with each number of matches"""
+        j = len(prefix)
+        row = {}
+
+        def update(match, count):
+            guesses = max(match.guesses, MIN_SUBMATCH_GUESSES_SINGLE_CHAR if len(match.token) == 1
+                          else MIN_SUBMATCH_GUESSES_MULTI_CHAR)
+            product = guesses * (rows[match.i - 1][count - 1][1] if count > 1 else 1)
+            total = math.factorial(count) * product + MIN_GUESSES_BEFORE_GROWING_SEQUENCE ** (count - 1)
+            # Keep it only if no sequence of at most as many matches is as cheap
+            for other_count, (other_total, _, _) in row.items():
+                if other_count <= count and other_total <= total:
+                    return
+            row[count] = (total, product, match)
+
+        for match in matches:
+            if match.i == 0:
+                update(match, 1)
+            else:
+                for count in list(rows[match.i - 1]):
+                    update(match, count + 1)
+        # Brute force over the rest, never right after more brute force
+        update(self.bruteforce(prefix, 0), 1)
+        for i in range(1, j):
+            match = self.bruteforce(prefix, i)
+            for count, (_, _, last) in rows[i - 1].items():
+                if last.pattern != "bruteforce":
+                    update(match, count + 1)
+        return row
+
+    def bruteforce(self, prefix, i):
+        """Return a brute-force match over prefix[i:]"""
+        length = len(prefix) - i
+        guesses = max(BRUTEFORCE_CARDINALITY ** length,
+                      (MIN_SUBMATCH_GUESSES_SINGLE_CHAR if length == 1
+                       else MIN_SUBMATCH_GUESSES_MULTI_CHAR) + 1)
+        return Match(i, len(prefix), "bruteforce", prefix[i:], guesses)
+
+    def best_sequence(self, password):
+        """Return the guesses, class bits and cheapest matches covering a short password"""
+        state = self.state(password)
+        if not password:
+            return 1, 0, []
+        rows = state.rows
+        count = min(rows[-1], key=lambda c: rows[-1][c][0])
+        guesses = rows[-1][count][0]
+        sequence = []
+        end = len(password)
+        while count:
+            match = rows[end - 1][count][2]
+            sequence.append(match)
+            end = match.i
+            count -= 1
+        sequence.reverse()
+        return guesses, state.mask, sequence
+
+    def long_sequence(self, password):
+        """Like best_sequence, but scores past MAX_ESTIMATE_LENGTH in pieces
+
+        A password that repeats one block (aaaa.., abcabc..) is scored as that
+        repeat. Otherwise each piece is scored on its own, and a run of equal
+        pieces costs one piece times the run length.
+        """
+        if len(password) <= MAX_ESTIMATE_LENGTH:
+            return self.best_sequence(password)
+        period = smallest_period(password)
+        if period <= MAX_ESTIMATE_LENGTH // 2:
+            block_guesses, mask, _ = self.best_sequence(password[:period])
+            guesses = block_guesses * -(-len(password) // period)
+            return guesses, mask, [Match(0, len(password), "repeat", password, guesses)]
+        pieces = [password[start:start + MAX_ESTIMATE_LENGTH]
+                  for start in range(0, len(password), MAX_ESTIMATE_LENGTH)]
+        guesses, mask, sequence = 1, 0, []
+        for piece, run in itertools.groupby(pieces):
+            count = len(list(run))
+            piece_guesses, piece_mask, piece_sequence = self.best_sequence(piece)
+            guesses *= piece_guesses * count
+            mask |= piece_mask
+            if count == 1:
+                sequence.extend(piece_sequence)
+            else:
+                sequence.append(Match(0, len(piece) * count, "repeat", piece * count,
+                                      piece_guesses * count))
+        return guesses, mask, sequence
+
+    def guesses(self, password):
+        """Return the minimum guesses for a password"""
+        return self.long_sequence(password)[0]
+
+    def estimate(self, password):
+        """Return the guesses, 0-100 score, level, classes and matched sequence of a password"""
+        guesses, mask, sequence = self.long_sequence(password)
+        log10 = math.log10(guesses)
+        score = score_from_log10(log10)
+        return {'score': score,
+                'level': next((name for limit, name in STRENGTH_LEVELS if score < limit),
+                              "Very Strong"),
+                'guesses': guesses, 'guesses_log10': round(log10, 2),
+                'classes': {name: bool(mask & bit) for name, bit in CLASS_BITS.items()},
+                'sequence': [{'pattern': match.pattern, 'token': match.token,
+                              'guesses': match.guesses} for match in sequence]}
+
+def smallest_period(text):
+    """Return the shortest p such that text[i] == text[i + p] throughout (KMP borders)"""
+    border = [0] * len(text)
+    k = 0
+    for i in range(1, len(text)):
+        while k and text[i] != text[k]:
+            k = border[k - 1]
+        if text[i] == text[k]:
+            k += 1
+        border[i] = k
+    return len(text) - (border[-1] if text else 0)
+
+def score_from_log10(log10):
+    """Map log10(guesses) onto the 0-100 meter along SCORE_CURVE"""
+    for (x0, y0), (x1, y1) in zip(SCORE_CURVE, SCORE_CURVE[1:]):
+        if log10 < x1:
+            return int(y0 + (y1 - y0) * (log10 - x0) / (x1 - x0))
+    return 100
+
+def wordlist_sources(wordlists):
+    """Return (path, mtime, size) for each wordlist, defaulting to WEAK_PATTERNS_FILE if present"""
+    if wordlists is None:
+        wordlists = [WEAK_PATTERNS_FILE] if os.path.exists(WEAK_PATTERNS_FILE) else []
+    sources = []
+    for path in wordlists:
+        stat = os.stat(path)
+        sources.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(sources)
+
+@lru_cache(maxsize=8)
+def cached_estimator(sources):
+    """Build the estimator for a tuple of (path, mtime, size) wordlist versions"""
+    words = list(COMMON_PASSWORDS)
+    for path, _, _ in sources:
+        words.extend(read_wordlist(path))
+    return EntropyEstimator(words)
+
+def entropy_estimator(wordlists=None):
+    """Return the estimator ranking COMMON_PASSWORDS then wordlist entries, built once per file version"""
+    return cached_estimator(wordlist_sources(wordlists))
@@ -0,0 +1,235 @@
+"""Command-line bulk password generation, usable without a display
+
+Examples:
+    python passwords.py generate --count 5 --length 20
+    python passwords.py generate --count 500000 --output accounts.txt
+    python passwords.py generate --count 5000000 --output accounts.txt --workers 8
+    python passwords.py generate --count 1000 --no-symbols
+    python passwords.py benchmark --count 200000 --workers 4
+    python passwords.py check
+    python passwords.py audit leaked.txt --wordlist weak_patterns.txt --wordlist words.txt
+    python passwords.py audit leaked.txt --estimate
+"""
+import argparse
+import itertools
+import math
+import os
+import secrets
+import sys
+import time
+from collections import Counter
+
+from password_core import (build_pool, selected_sets, generate_passwords, write_passwords,
+                           write_passwords_parallel, ConstrainedGenerator, GenerationFarm, np,
+                           strength_analyzer, entropy_estimator, STRENGTH_LEVELS)
+
+def pool_from_args(args):
+    """Build the character pool from the --no-* options"""
+    return build_pool(not args.no_lower, not args.no_upper, not args.no_digits, not args.no_symbols)
+
+def required_from_args(args):
+    """Return the sets every password must include (none with --unconstrained)"""
+    if getattr(args, "unconstrained", False):
+        return []
+    return selected_sets(not args.no_lower, not args.no_upper, not args.no_digits, not args.no_symbols)
+
+def report_progress(count):
+    """Print a running password count to stderr"""
+    print(f"\r{count} password(s)...", end="", file=sys.stderr, flush=True)
+
+def cmd_generate(args):
+    """Print passwords, or stream them to a file with --output"""
+    pool = pool_from_args(args)
+    required = required_from_args(args)
+    if args.output:
+        start = time.perf_counter()
+        progress = None if args.quiet else report_progress
+        if args.workers > 1:
+            count = write_passwords_parallel(args.output, args.count, args.length, pool, required,
+                                             args.workers, not args.unordered, progress)
+        else:
+            count = write_passwords(args.output, args.count, args.length, pool, args.batch_size,
+                                    progress, required=required)
+        elapsed = time.perf_counter() - start
+        print(f"\nWrote {count} password(s) to {args.output} "
+              f"({count / max(elapsed, 1e-9):,.0f}/s)")
+        return
+    for batch in generate_passwords(args.count, args.length, pool, args.batch_size,
+                                    required=required):
+        print("\n".join(batch))
+
+def timed_rate(count, make):
+    """Return passwords per second for a function making count passwords"""
+    start = time.perf_counter()
+    make()
+    return count / max(time.perf_counter() - start, 1e-9)
+
+def cmd_benchmark(args):
+    """Compare per-character secrets.choice with block sampling"""
+    pool = pool_from_args(args)
+    required = required_from_args(args)
+    count, length = args.count, args.length
+    rates = {
+        "secrets.choice per char": timed_rate(count, lambda: [
+            "".join(secrets.choice(pool) for _ in range(length)) for _ in range(count)]),
+        "urandom blocks": timed_rate(count, lambda: sum(
+            len(batch) for batch in generate_passwords(count, length, pool, use_numpy=False))),
+    }
+    if np is not None:
+        rates["urandom blocks + NumPy"] = timed_rate(count, lambda: sum(
+            len(batch) for batch in generate_passwords(count, length, pool, use_numpy=True)))
+    if required:
+        rates["every set, one pass"] = timed_rate(count, lambda: sum(
+            len(batch) for batch in generate_passwords(count, length, pool, required=required)))
+    # Process scaling, from one worker up to --workers
+    workers = 1
+    while workers <= args.workers > 1:
+        farm = GenerationFarm(workers, shard_size=max(1000, count // (4 * workers)))
+        with open(os.devnull, 'w') as sink:
+            rates[f"{workers} process(es)"] = timed_rate(count, lambda: farm.run(
+                sink, count, length, pool, required))
+        workers *= 2
+    print(f"{count} passwords of {length} characters from a pool of {len(pool)}")
+    baseline = rates["secrets.choice per char"]
+    for name, rate in rates.items():
+        print(f"  {name:<26} {rate:>12,.0f} passwords/s  ({rate / baseline:.1f}x)")
+
+def chi_square_p(observed, expected):
+    """Return the upper-tail p-value of Pearson's chi-squared test (Wilson-Hilferty)"""
+    statistic = sum((o - e) ** 2 / e for o, e in zip(observed, expected))
+    df = len(observed) - 1
+    z = ((statistic / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def cmd_check(args):
+    """Statistical checks that constrained passwords are valid and uniform"""
+    results = []
+    
+    # 1. Small space: every valid password must be equally likely
+    sets = ["ab", "0", "#"]
+    pool, length = "".join(sets), 5
+    space = ["".join(chars) for chars in itertools.product(pool, repeat=length)
+             if all(any(c in chars for c in s) for s in sets)]
+    generator = ConstrainedGenerator(pool, sets, length)
+    counts = Counter(generator.generate_many(len(space) * args.per_cell))
+    results.append((f"all {len(space)} valid passwords equally likely",
+                    chi_square_p([counts[p] for p in space], [args.per_cell] * len(space))))
+    
+    # 2. Full pool: uniform within each set, and the same at every position
+    sets = selected_sets()
+    generator = ConstrainedGenerator(build_pool(), sets, args.length)
+    passwords = generator.generate_many(args.count)
+    results.append((f"{args.count} passwords include every set",
+                    1.0 if all(any(c in s for c in p) for p in passwords for s in sets) else 0.0))
+    characters = Counter("".join(passwords))
+    for chars in sets:
+        observed = [characters[c] for c in chars]
+        results.append((f"uniform within {chars[:3]}..", chi_square_p(
+            observed, [sum(observed) / len(chars)] * len(chars))))
+    set_of = {c: i for i, chars in enumerate(sets) for c in chars}
+    cells = Counter((position, set_of[c]) for p in passwords for position, c in enumerate(p))
+    totals = Counter(set_of[c] for p in passwords for c in p)
+    observed = [cells[position, i] for position in range(args.length) for i in range(len(sets))]
+    expected = [totals[i] / args.length for position in range(args.length) for i in range(len(sets))]
+    results.append(("sets spread evenly over positions", chi_square_p(observed, expected)))
+    
+    failed = 0
+    for name, p in results:
+        ok = p > args.alpha
+        failed += not ok
+        print(f"  {'ok  ' if ok else 'FAIL'}  p={p:.4f}  {name}")
+    return 1 if failed else 0
+
+def cmd_audit(args):
+    """Score every password in a file, one per line, and count each strength level"""
+    start = time.perf_counter()
+    if args.estimate:
+        estimator = entropy_estimator(args.wordlist)
+        patterns = estimator.matcher.patterns
+        audit = lambda passwords: ((p, r['score'], r['level'])
+                                   for p in passwords for r in [estimator.estimate(p)])
+    else:
+        analyzer = strength_analyzer(args.wordlist)
+        patterns = analyzer.matcher.patterns
+        audit = analyzer.audit
+    built = time.perf_counter()
+    levels = Counter()
+    with open(args.path, encoding="utf-8", errors="replace") as f:
+        passwords = (line.rstrip("\r\n") for line in f)
+        for password, score, level in audit(passwords):
+            levels[level] += 1
+            if args.show_weak and score < STRENGTH_LEVELS[1][0]:
+                print(f"{score:>3}  {level:<9}  {password}")
+    elapsed = time.perf_counter() - built
+    total = sum(levels.values())
+    print(f"{total} password(s) against {len(patterns)} weak patterns "
+          f"(built in {built - start:.2f}s, {total / max(elapsed, 1e-9):,.0f}/s)")
+    for _, name in STRENGTH_LEVELS + ((None, "Very Strong"),):
+        print(f"  {name:<12} {levels[name]:>10}  ({levels[name] / max(total, 1):.1%})")
+
+def add_pool_options(parser):
+    """Add the length and character set options"""
+    parser.add_argument("--length", type=int, default=16)
+    parser.add_argument("--no-lower", action="store_true", help="leave out lowercase letters")
+    parser.add_argument("--no-upper", action="store_true", help="leave out uppercase letters")
+    parser.add_argument("--no-digits", action="store_true", help="leave out digits")
+    parser.add_argument("--no-symbols", action="store_true", help="leave out symbols")
+    parser.add_argument("--unconstrained", action="store_true",
+                        help="allow passwords that miss a selected set (fastest)")
+
+def build_parser():
+    """Build the argument parser"""
+    parser = argparse.ArgumentParser(prog="passwords", description="Generate passwords in bulk")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="generate passwords")
+    generate.add_argument("--count", type=int, default=1)
+    add_pool_options(generate)
+    generate.add_argument("--output", help="file to stream the passwords to (default: print)")
+    generate.add_argument("--batch-size", type=int, default=10000)
+    generate.add_argument("--workers", type=int, default=1,
+                          help="worker processes for --output (default: 1)")
+    generate.add_argument("--unordered", action="store_true",
+                          help="with --workers, write shards as they finish")
+    generate.add_argument("--quiet", action="store_true", help="no progress output")
+    generate.set_defaults(func=cmd_generate)
+
+    benchmark = commands.add_parser("benchmark", help="report passwords per second")
+    benchmark.add_argument("--count", type=int, default=100000)
+    benchmark.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                           help="largest worker pool to time (default: all cores)")
+    add_pool_options(benchmark)
+    benchmark.set_defaults(func=cmd_benchmark)
+
+    check = commands.add_parser("check", help="test that generated passwords are valid and uniform")
+    check.add_argument("--count", type=int, default=200000)
+    check.add_argument("--length", type=int, default=16)
+    check.add_argument("--per-cell", type=int, default=50,
+                       help="expected samples per password in the small-space test")
+    check.add_argument("--alpha", type=float, default=0.001, help="significance level")
+    check.set_defaults(func=cmd_check)
+
+    audit = commands.add_parser("audit", help="score a file of passwords, one per line")
+    audit.add_argument("path")
+    audit.add_argument("--wordlist", action="append",
+                       help="file of weak patterns, one per line; repeat for more "
+                            "(default: weak_patterns.txt if present)")
+    audit.add_argument("--estimate", action="store_true",
+                       help="score by estimated guesses (words, keyboard walks, repeats, "
+                            "sequences, dates) instead of pattern penalties")
+    audit.add_argument("--show-weak", action="store_true",
+                       help="print each Weak or Very Weak password")
+    audit.set_defaults(func=cmd_audit)
+    return parser
+
+def main(argv=None):
+    """Run one CLI command"""
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args) or 0
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""Opt-in latency, event-loop stall and I/O instrumentation for the Tkinter apps
+
+Set CODSOFT_PROFILE=1 to turn it on. Handlers then record latency histograms,
+a heartbeat on the Tk loop records stalls, F12 toggles a debug overlay, and the
+numbers are dumped as JSON to <app>-profile.json every few seconds and on exit.
+With the variable unset, decorated handlers are left untouched.
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+ENABLED = os.environ.get("CODSOFT_PROFILE", "") not in ("", "0")
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended
+BUCKET_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+
+class LatencyHistogram:
+    """Log-scale histogram of durations with count, total and max"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms):
+        """Add one duration in milliseconds"""
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, fraction):
+        """Estimate a percentile as the upper bound of its bucket"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, hits in zip(BUCKET_BOUNDS, self.buckets):
+            seen += hits
+            if seen >= rank:
+                return round(min(bound, self.max), 3)
+        return round(self.max, 3)
+
+    def to_dict(self):
+        """Return the histogram as JSON-ready numbers"""
+        return {"count": self.count,
+                "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+                "p50_ms": self.percentile(0.5), "p95_ms": self.percentile(0.95),
+                "p99_ms": self.percentile(0.99), "max_ms": round(self.max, 3),
+                "buckets": dict(zip([f"<={b}" for b in BUCKET_BOUNDS] + [f">{BUCKET_BOUNDS[-1]}"],
+                                    self.buckets))}
+
+class Profiler:
+    """Per-handler latency histograms, event-loop stalls and bytes written"""
+
+    MAX_STALLS = 50
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.app = None
+        self.started = time.time()
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self.lock:
+            self.latency = {}
+            self.lag = LatencyHistogram()
+            self.stalls = []
+            self.stall_count = 0
+            self.bytes_written = {}
+            # Slowest handler since the last heartbeat, blamed for a stall
+            self.slowest = None
+
+    def record(self, name, seconds):
+        """Record one run of a handler"""
+        ms = seconds * 1000
+        with self.lock:
+            histogram = self.latency.get(name)
+            if histogram is None:
+                histogram = self.latency[name] = LatencyHistogram()
+            histogram.record(ms)
+            # Only work on the Tk thread can stall the event loop
+            if threading.current_thread() is not threading.main_thread():
+                return
+            if self.slowest is None or ms > self.slowest[1]:
+                self.slowest = (name, ms)
+
+    @contextmanager
+    def timed(self, name):
+        """Time the body of a with block under a handler name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record_lag(self, ms, threshold):
+        """Record how late a heartbeat ran; past the threshold it is a stall"""
+        with self.lock:
+            self.lag.record(ms)
+            slowest, self.slowest = self.slowest, None
+            if ms < threshold:
+                return
+            self.stall_count += 1
+            self.stalls.append({"at": time.strftime("%H:%M:%S"), "ms": round(ms, 1),
+                                "handler": slowest[0] if slowest else None})
+            del self.stalls[:-self.MAX_STALLS]
+
+    def count_bytes(self, sink, count):
+        """Add bytes written to a named sink (a file or kind of write)"""
+        with self.lock:
+            self.bytes_written[sink] = self.bytes_written.get(sink, 0) + count
+
+    def snapshot(self):
+        """Return everything recorded as a JSON-ready dict"""
+        with self.lock:
+            return {"app": self.app, "pid": os.getpid(),
+                    "uptime_s": round(time.time() - self.started, 1),
+                    "handlers": {name: h.to_dict() for name, h in sorted(self.latency.items())},
+                    "event_loop": {"lag": self.lag.to_dict(), "stalls": self.stall_count,
+                                   "recent_stalls": list(self.stalls)},
+                    "bytes_written": dict(self.bytes_written)}
+
+    def dump(self, filename):
+        """Write the snapshot to a JSON file in one replace"""
+        temp = f"{filename}.tmp"
+        with open(temp, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(temp, filename)
+
+PROFILER = Profiler()
+
+def profiled(func):
+    """Decorator recording a handler's latency; a no-op unless profiling is on"""
+    if not ENABLED:
+        return func
+    name = func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            PROFILER.record(name, time.perf_counter() - start)
+    return wrapper
+
+def timed(name):
+    """Context manager recording the latency of a block under a name"""
+    return PROFILER.timed(name) if ENABLED else nullcontext()
+
+def count_bytes(sink, count):
+    """Count bytes written to a sink when profiling is on"""
+    if ENABLED:
+        PROFILER.count_bytes(sink, count)
+
+class Heartbeat:
+    """Periodic Tk timer whose lateness measures event-loop stalls"""
+
+    def __init__(self, root, profiler, interval=100, threshold=200):
+        self.root = root
+        self.profiler = profiler
+        self.interval = interval
+        self.threshold = threshold
+        self.expected = None
+        self.tick()
+
+    def tick(self):
+        """Record how late this tick ran and arm the next one"""
+        now = time.perf_counter()
+        if self.expected is not None:
+            self.profiler.record_lag(max(0.0, (now - self.expected) * 1000), self.threshold)
+        self.expected = now + self.interval / 1000
+        self.root.after(self.interval, self.tick)
+
+class DebugOverlay:
+    """Small always-on-top window showing the live profiler numbers"""
+
+    def __init__(self, root, profiler, filename, refresh=500):
+        self.root = root
+        self.profiler = profiler
+        self.filename = filename
+        self.refresh = refresh
+        self.window = None
+        self.text = None
+
+    def toggle(self, event=None):
+        """Show the overlay, or close it if it is open"""
+        if self.window is not None:
+            self.window.destroy()
+            self.window = None
+            return
+        # Imported here so the GUI-free todo_core and CLI never load tkinter
+        import tkinter as tk
+        self.window = tk.Toplevel(self.root)
+        self.window.title("Profiler")
+        self.window.attributes("-topmost", True)
+        self.window.configure(bg='#1e1e1e')
+        self.window.protocol("WM_DELETE_WINDOW", self.toggle)
+
+        self.text = tk.Label(self.window, justify=tk.LEFT, anchor="nw",
+                             font=("Courier", 9), bg='#1e1e1e', fg='#dfe6e9')
+        self.text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        button_frame = tk.Frame(self.window, bg='#1e1e1e')
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        tk.Button(button_frame, text="Dump JSON", command=self.dump,
+                  bg='#6c5ce7', fg='white').pack(side=tk.LEFT, padx=(0, 5))
+        tk.Button(button_frame, text="Reset", command=self.profiler.reset,
+                  bg='#e17055', fg='white').pack(side=tk.LEFT)
+        self.update()
+
+    def dump(self):
+        """Write the JSON dump now"""
+        try:
+            self.profiler.dump(self.filename)
+        except OSError as e:
+            print(f"Error writing profile: {e}")
+
+    def update(self):
+        """Redraw the numbers while the overlay is open"""
+        if self.window is None:
+            return
+        self.text.config(text=format_snapshot(self.profiler.snapshot()))
+        self.window.after(self.refresh, self.update)
+
+def format_snapshot(snapshot):
+    """Render a snapshot as the overlay's text table"""
+    lines = [f"{'handler':<34}{'n':>6}{'mean':>9}{'p95':>8}{'max':>9}"]
+    for name, h in snapshot["handlers"].items():
+        lines.append(f"{name[-34:]:<34}{h['count']:>6}{h['mean_ms']:>9.1f}"
+                     f"{h['p95_ms']:>8.0f}{h['max_ms']:>9.1f}")
+    loop = snapshot["event_loop"]
+    lines.append("")
+    lines.append(f"loop lag p95 {loop['lag']['p95_ms']:.0f} ms, max {loop['lag']['max_ms']:.0f} ms, "
+                 f"stalls {loop['stalls']}")
+    for stall in loop["recent_stalls"][-3:]:
+        lines.append(f"  {stall['at']}  {stall['ms']:.0f} ms  {stall['handler'] or '?'}")
+    lines.append("")
+    for sink, count in sorted(snapshot["bytes_written"].items()):
+        lines.append(f"wrote {count:>12,} B  {sink}")
+    return "\n".join(lines)
+
+def install(root, app, dump_interval=5000):
+    """Start the heartbeat, F12 overlay and periodic JSON dump for an app"""
+    if not ENABLED:
+        return None
+    PROFILER.app = app
+    filename = f"{app}-profile.json"
+    Heartbeat(root, PROFILER)
+    overlay = DebugOverlay(root, PROFILER, filename)
+    root.bind("<F12>", overlay.toggle)
+
+    def periodic_dump():
+        overlay.dump()
+        root.after(dump_interval, periodic_dump)
+    root.after(dump_interval, periodic_dump)
+    atexit.register(overlay.dump)
+    return overlay
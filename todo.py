@@ -0,0 +1,377 @@
+"""Command-line interface to the to-do list, usable without a display
+
+Examples:
+    python todo.py add "Write report" --priority High --due 2024-05-01
+    python todo.py add "Water plants" --due 2024-05-01 --repeat "every 3 days"
+    python todo.py upcoming --days 14
+    python todo.py list --filter Pending
+    python todo.py list --sort Priority --sort "Due Date"
+    python todo.py complete 3 4
+    python todo.py undo
+    python todo.py --list Work add "Plan sprint"
+    python todo.py --storage shared complete 7
+    python todo.py lists
+    python todo.py benchmark --count 200000
+    python todo.py benchmark --toggle --sizes 1000 10000 100000
+    python todo.py benchmark --toggle --sort "Due Date" --repeat 200
+    python todo.py benchmark --search --sizes 10000 100000 1000000
+    python todo.py benchmark --check --count 500 --repeat 2000
+    python todo.py import old_tasks.json
+    python todo.py export backup.jsonl
+    python todo.py --storage sqlite import archive.csv --batch-size 50000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from todo_core import (TaskEngine, TaskStore, Workspace, Task, PRIORITIES, FILTERS, REPEAT_RULES,
+                       SORT_COLUMNS, task_row)
+
+def cmd_add(engine, args):
+    """Add one task"""
+    task = engine.add(args.text, args.priority, args.due, args.repeat)
+    print(f"Added task {task['id']}")
+
+def cmd_list(engine, args):
+    """Print the tasks under a filter"""
+    tasks = engine.select(args.filter, order=args.sort, reverse=args.reverse)
+    if args.limit:
+        tasks = tasks[:args.limit]
+    for task in tasks:
+        status = "x" if task["status"] == "Completed" else " "
+        due = task["due_date"] or "-"
+        overdue = " (OVERDUE)" if engine.is_overdue(task) else ""
+        repeat = f"  (repeats {task['repeat']})" if task.get("repeat") else ""
+        print(f"[{status}] {task['id']:>6}  {task['priority']:<6}  {due}{overdue}  "
+              f"{task['task']}{repeat}")
+
+def cmd_upcoming(engine, args):
+    """Print the occurrences of repeating tasks over the next days"""
+    for day, task in engine.upcoming(args.days):
+        print(f"{day.isoformat()}  {task['id']:>6}  {task['task']}")
+
+def cmd_complete(engine, args):
+    """Mark tasks completed (or pending again with --undo)"""
+    status = "Pending" if args.undo else "Completed"
+    found = {task["id"] for task in engine.store.get_many(args.ids)}
+    for task_id in args.ids:
+        if task_id not in found:
+            print(f"No task with id {task_id}", file=sys.stderr)
+    engine.set_status_many(found, status)
+    print(f"Marked {len(found)} task(s) {status.lower()}")
+
+def cmd_undo(engine, args):
+    """Undo (or with redo, re-apply) the latest change"""
+    label = engine.redo() if args.command == "redo" else engine.undo()
+    if label is None:
+        print(f"Nothing to {args.command}")
+    else:
+        print(f"{args.command.capitalize()}: {label}")
+
+def cmd_lists(workspace, args):
+    """Print every task list with its counts, creating one with --new"""
+    if args.new:
+        workspace.create(args.new)
+    for name in workspace.names():
+        summary = workspace.summary(name)
+        print(f"{name:<20}  {summary['total']:>7} total  {summary['pending']:>7} pending  "
+              f"{summary['high']:>7} high")
+
+def traced_size(build):
+    """Return the bytes still allocated by build()'s result"""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+def random_records(count, rng):
+    """Return count plain task dicts with random fields"""
+    return [{"id": i + 1, "task": f"Task number {i}", "priority": rng.choice(PRIORITIES),
+             "due_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+             "status": rng.choice(["Pending", "Completed"]),
+             "created": f"2024-01-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+             "completed_date": None, "repeat": ""} for i in range(count)]
+
+def cmd_benchmark(args):
+    """Compare the memory of plain task dicts and compact Task records"""
+    if args.toggle:
+        benchmark_toggle(args)
+        return
+    if args.search:
+        benchmark_search(args)
+        return
+    if args.check:
+        check_counters(args)
+        return
+    rng = random.Random(0)
+    records = random_records(args.count, rng)
+    # Conversion must be lossless, including for values that are not packable strings
+    odd = [{"id": 0, "task": "raw ints", "priority": 7, "due_date": 5, "status": 0,
+            "created": 0, "completed_date": 3, "repeat": 2},
+           {"id": -1, "task": "loose", "priority": "Urgent", "due_date": "2024-1-5",
+            "status": True, "created": 1.5, "note": [1, 2]}]
+    changed = [record["id"] for record in records + odd
+               if json.dumps(Task(record).to_dict(), sort_keys=True)
+               != json.dumps(record, sort_keys=True)]
+    if changed:
+        print(f"Error: {len(changed)} records changed in conversion (ids {changed[:5]})")
+        return
+    # Parse from JSON, as on load, so equal strings are not shared
+    payload = json.dumps(records)
+    del records
+    as_dicts = traced_size(lambda: json.loads(payload))
+    as_tasks = traced_size(lambda: [Task(record) for record in json.loads(payload)])
+    print(f"{args.count} tasks")
+    print(f"  dicts: {as_dicts / 2**20:8.1f} MiB  ({as_dicts / args.count:.0f} B/task)")
+    print(f"  Task:  {as_tasks / 2**20:8.1f} MiB  ({as_tasks / args.count:.0f} B/task)")
+    print(f"  saved: {1 - as_tasks / as_dicts:.0%}")
+
+# Rows the GUI renders at the top of the list: the visible rows plus its scroll buffer
+WINDOW_ROWS = 20
+
+def refresh_window(engine, filter_type, order):
+    """Re-select the list and rebuild its top window of rows the way the GUI does"""
+    window = engine.select(filter_type, "", order)[:WINDOW_ROWS]
+    return [task_row(task, engine.is_overdue(task), task["id"] in engine.reminders.fired)
+            for task in window]
+
+def benchmark_toggle(args):
+    """Time a toggle or an add plus the list refresh under each filter as the list grows"""
+    rng = random.Random(0)
+    order = tuple(args.sort)
+    print(f"{'tasks':>8}  {'filter':<14} {'toggle median':>14} {'p95':>10} {'add median':>12} {'p95':>10}"
+          f"  ({args.repeat} each, {args.storage} storage, sort {', '.join(order) or 'id'})")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "tasks.json")
+            with open(filename, "w") as f:
+                json.dump({"tasks": random_records(size, rng), "next_id": size + 1}, f)
+            engine = TaskEngine(args.storage, filename, os.path.join(folder, "tasks.db"))
+            try:
+                for filter_type in FILTERS[:4]:
+                    # The list is on screen before the first change, as in the GUI
+                    refresh_window(engine, filter_type, order)
+                    toggles, adds = [], []
+                    for _ in range(args.repeat):
+                        task_id = rng.randint(1, size)
+                        start = time.perf_counter()
+                        engine.toggle([task_id])
+                        refresh_window(engine, filter_type, order)
+                        toggles.append(time.perf_counter() - start)
+                        start = time.perf_counter()
+                        engine.add("benchmark task", rng.choice(PRIORITIES))
+                        refresh_window(engine, filter_type, order)
+                        adds.append(time.perf_counter() - start)
+                    toggles.sort()
+                    adds.sort()
+                    print(f"{size:>8}  {filter_type:<14} {statistics.median(toggles) * 1e6:>12.0f}us "
+                          f"{toggles[int(len(toggles) * 0.95)] * 1e6:>8.0f}us "
+                          f"{statistics.median(adds) * 1e6:>10.0f}us "
+                          f"{adds[int(len(adds) * 0.95)] * 1e6:>8.0f}us")
+            finally:
+                engine.close()
+
+# Words for task descriptions in the search benchmark
+SEARCH_WORDS = ("write", "report", "call", "email", "review", "plan", "budget", "meeting",
+                "groceries", "invoice", "draft", "deploy", "fix", "bug", "release", "garden",
+                "dentist", "book", "flight", "hotel", "update", "resume", "clean", "kitchen")
+
+def benchmark_search(args):
+    """Time building the search index and answering queries as the list grows"""
+    rng = random.Random(0)
+    queries = ["report", "rep", "budget meeting", "fix bug release", "task12345", "zzz"]
+    for size in args.sizes:
+        records = random_records(size, rng)
+        for record in records:
+            record["task"] = f"{' '.join(rng.sample(SEARCH_WORDS, 3))} task{record['id']}"
+        store = TaskStore(records)
+        del records
+        # The first search builds the index
+        start = time.perf_counter()
+        store.search(queries[0])
+        print(f"{size} tasks: index built by the first search in "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
+        for query in queries:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                hits = len(store.search(query))
+                timings.append(time.perf_counter() - start)
+            print(f"  {query!r:<20} {hits:>8} hits  median {statistics.median(timings) * 1000:8.2f} ms")
+
+def check_counters(args):
+    """Make random changes to a scratch list, recounting the task counters after each one"""
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "tasks.json")
+        with open(filename, "w") as f:
+            json.dump({"tasks": random_records(args.count, rng), "next_id": args.count + 1}, f)
+        engine = TaskEngine(args.storage, filename, os.path.join(folder, "tasks.db"))
+        engine.stats.self_check = True
+        try:
+            for step in range(args.repeat):
+                task_ids = [task["id"] for task in engine.store.to_list()]
+                picked = rng.sample(task_ids, min(len(task_ids), rng.choice([1, 3, 20])))
+                action = rng.choice(["add", "repeat", "toggle", "edit", "bulk", "delete",
+                                     "undo", "redo"])
+                due_date = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+                if action == "add":
+                    engine.add(f"Check task {step}", rng.choice(PRIORITIES),
+                               rng.choice(["", due_date]))
+                elif action == "repeat":
+                    engine.add(f"Repeating task {step}", due_date=due_date,
+                               repeat=rng.choice(REPEAT_RULES))
+                elif action == "toggle":
+                    engine.toggle(picked)
+                elif action == "edit" and picked:
+                    task = engine.store.get(picked[0])
+                    engine.edit(task["id"], task["task"], rng.choice(PRIORITIES),
+                                due_date if task.get("repeat") else rng.choice(["", due_date]))
+                elif action == "bulk":
+                    engine.bulk_update(picked, rng.choice([None, "Pending", "Completed"]),
+                                       rng.choice([None, *PRIORITIES]), due_date)
+                elif action == "delete":
+                    engine.delete(picked)
+                elif action == "undo":
+                    engine.undo()
+                elif action == "redo":
+                    engine.redo()
+        except AssertionError as e:
+            print(f"Error after change {step} ({action}): {e}")
+            return
+        finally:
+            engine.close()
+    print(f"{args.repeat} random changes on {args.count} tasks, counters in sync after each")
+
+def report_progress(count):
+    """Print a running task count to stderr"""
+    print(f"\r{count} task(s)...", end="", file=sys.stderr, flush=True)
+
+def cmd_import(engine, args):
+    """Stream tasks from a JSON, JSON Lines or CSV file under fresh ids"""
+    count = engine.import_file(args.path, args.format, args.batch_size,
+                               None if args.quiet else report_progress)
+    print(f"\nImported {count} task(s)")
+
+def cmd_export(engine, args):
+    """Stream every task to a JSON, JSON Lines or CSV file"""
+    count = engine.export_file(args.path, args.format, None if args.quiet else report_progress)
+    print(f"\nExported {count} task(s) to {args.path}")
+
+def build_parser():
+    """Build the argument parser"""
+    parser = argparse.ArgumentParser(prog="todo", description="Manage the to-do list from the command line")
+    parser.add_argument("--storage", choices=["journal", "shared", "json", "sqlite"],
+                        default="journal",
+                        help="storage backend (default: journal; shared allows several "
+                             "processes on one file)")
+    parser.add_argument("--file", default="tasks.json", help="task file (default: tasks.json)")
+    parser.add_argument("--db", default="tasks.db", help="SQLite database (default: tasks.db)")
+    parser.add_argument("--list", help="named task list in the workspace (overrides --file/--db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add a task")
+    add.add_argument("text")
+    add.add_argument("--priority", choices=PRIORITIES, default="Medium")
+    add.add_argument("--due", default="", help="due date (YYYY-MM-DD)")
+    add.add_argument("--repeat", default="",
+                     help="daily, weekly, monthly or 'every N days/weeks' (needs --due)")
+    add.set_defaults(func=cmd_add)
+
+    list_ = commands.add_parser("list", help="list tasks")
+    list_.add_argument("--filter", choices=FILTERS, default="All")
+    list_.add_argument("--limit", type=int, default=0)
+    list_.add_argument("--sort", choices=SORT_COLUMNS, action="append", default=[],
+                       help="sort column; repeat for tiebreakers")
+    list_.add_argument("--reverse", action="store_true", help="reverse the sort order")
+    list_.set_defaults(func=cmd_list)
+
+    upcoming = commands.add_parser("upcoming", help="list occurrences of repeating tasks")
+    upcoming.add_argument("--days", type=int, default=7)
+    upcoming.set_defaults(func=cmd_upcoming)
+
+    complete = commands.add_parser("complete", help="mark tasks completed")
+    complete.add_argument("ids", type=int, nargs="+")
+    complete.add_argument("--undo", action="store_true", help="mark them pending again")
+    complete.set_defaults(func=cmd_complete)
+
+    commands.add_parser("undo", help="undo the latest change").set_defaults(func=cmd_undo)
+    commands.add_parser("redo", help="redo the latest undone change").set_defaults(func=cmd_undo)
+
+    formats = ["json", "jsonl", "csv"]
+    import_ = commands.add_parser("import", help="import tasks from a JSON, JSON Lines or CSV file")
+    import_.add_argument("path")
+    import_.add_argument("--format", choices=formats, help="file format (default: from extension)")
+    import_.add_argument("--batch-size", type=int, default=10000)
+    import_.add_argument("--quiet", action="store_true", help="no progress output")
+    import_.set_defaults(func=cmd_import)
+
+    export = commands.add_parser("export", help="export tasks to a JSON, JSON Lines or CSV file")
+    export.add_argument("path")
+    export.add_argument("--format", choices=formats, help="file format (default: from extension)")
+    export.add_argument("--quiet", action="store_true", help="no progress output")
+    export.set_defaults(func=cmd_export)
+
+    lists = commands.add_parser("lists", help="show the task lists in the workspace")
+    lists.add_argument("--new", metavar="NAME", help="create a new list first")
+    lists.set_defaults(func=cmd_lists)
+
+    benchmark = commands.add_parser("benchmark", help="compare task memory of dicts and Task records")
+    benchmark.add_argument("--count", type=int, default=100000)
+    mode = benchmark.add_mutually_exclusive_group()
+    mode.add_argument("--toggle", action="store_true",
+                      help="instead time a toggle or an add plus the list refresh, under "
+                           "each filter, at each of --sizes")
+    mode.add_argument("--check", action="store_true",
+                      help="instead make --repeat random changes to --count tasks, recounting "
+                           "the task counters after each one")
+    mode.add_argument("--search", action="store_true",
+                      help="instead time building the search index and queries at each of --sizes")
+    benchmark.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    benchmark.add_argument("--repeat", type=int, default=500,
+                           help="toggles and adds per filter, or runs of each query, timed per size")
+    benchmark.add_argument("--sort", choices=SORT_COLUMNS, action="append", default=[],
+                           help="sort column of the refreshed list with --toggle; repeat for tiebreakers")
+    benchmark.set_defaults(func=cmd_benchmark)
+    return parser
+
+def main(argv=None):
+    """Run one CLI command"""
+    args = build_parser().parse_args(argv)
+    if args.command == "benchmark":
+        args.func(args)
+        return 0
+    try:
+        if args.command == "lists" or args.list:
+            # Only named lists need the workspace index (workspace.json)
+            workspace = Workspace(storage=args.storage)
+            try:
+                if args.command == "lists":
+                    args.func(workspace, args)
+                else:
+                    if args.list not in workspace.headers:
+                        raise ValueError(f"No task list named {args.list}")
+                    args.func(workspace.open(args.list), args)
+            finally:
+                workspace.close()
+        else:
+            engine = TaskEngine(args.storage, args.file, args.db)
+            try:
+                args.func(engine, args)
+            finally:
+                engine.close()
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
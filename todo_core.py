@@ -0,0 +1,2764 @@
+"""GUI-free task engine shared by the To-Do List Manager and the todo CLI"""
+import json
+import sys
+import gc
+import csv
+import os
+import re
+import shutil
+from datetime import datetime, date, time
+import threading
+import sqlite3
+import bisect
+import heapq
+from operator import attrgetter
+import calendar
+from functools import lru_cache
+from contextlib import contextmanager
+from collections import Counter, OrderedDict
+
+from profiling import count_bytes
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no fcntl; msvcrt locks a byte range instead
+    fcntl = None
+    import msvcrt
+
+DATE_FORMAT = "%Y-%m-%d"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+PRIORITIES = ("High", "Medium", "Low")
+FILTERS = ("All", "Pending", "Completed", "High Priority", "Today")
+TASK_FIELDS = ("id", "task", "priority", "due_date", "status", "created", "completed_date",
+               "repeat")
+# SQLite GLOB matching well-formed YYYY-MM-DD due dates
+ISO_DATE_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+# Pending tasks are announced at this time on their due date
+REMINDER_TIME = time(9, 0)
+REPEAT_RULES = ("daily", "weekly", "monthly", "every 2 days", "every 2 weeks")
+REPEAT_PATTERN = re.compile(r"every (\d+) (day|week)s?")
+# Set CODSOFT_SELF_CHECK=1 to recount the task counters after every change (slow)
+SELF_CHECK = os.environ.get("CODSOFT_SELF_CHECK", "") not in ("", "0")
+
+@lru_cache(maxsize=4096)
+def parse_due_date(due_date):
+    """Parse a YYYY-MM-DD due date into a day ordinal, or None"""
+    if not due_date:
+        return None
+    try:
+        return datetime.strptime(due_date, DATE_FORMAT).toordinal()
+    except ValueError:
+        return None
+
+def repeat_days(rule):
+    """Return the fixed day step of a repeat rule, or None for monthly"""
+    if rule == "daily":
+        return 1
+    if rule == "weekly":
+        return 7
+    if rule == "monthly":
+        return None
+    match = REPEAT_PATTERN.fullmatch(rule)
+    if match is None or int(match.group(1)) < 1:
+        raise ValueError("Repeat must be daily, weekly, monthly or every N days/weeks")
+    return int(match.group(1)) * (7 if match.group(2) == "week" else 1)
+
+def next_occurrence(ordinal, rule):
+    """Return the day ordinal of the occurrence after the given one"""
+    step = repeat_days(rule)
+    if step is not None:
+        return ordinal + step
+    # Monthly: same day next month, clamped to the month's length
+    day = date.fromordinal(ordinal)
+    year, month = divmod(day.month, 12)
+    year, month = day.year + year, month + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1])).toordinal()
+
+def occurrence_on_or_after(ordinal, rule, target):
+    """Skip a series forward to its first occurrence on or after target"""
+    if ordinal >= target:
+        return ordinal
+    step = repeat_days(rule)
+    if step is not None:
+        return ordinal + -(-(target - ordinal) // step) * step
+    while ordinal < target:
+        ordinal = next_occurrence(ordinal, rule)
+    return ordinal
+
+WORD_PATTERN = re.compile(r"\w+")
+
+def tokenize(text):
+    """Split text into lowercase search terms"""
+    return WORD_PATTERN.findall(text.lower())
+
+def text_matches(text, query_terms):
+    """Check that every query term is a prefix of some word in text"""
+    words = tokenize(text)
+    return all(any(word.startswith(term) for word in words) for term in query_terms)
+
+STATUSES = ("Pending", "Completed")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+PRIORITY_CODES = {priority: code for code, priority in enumerate(PRIORITIES)}
+# Marks a field that was absent from the original record
+MISSING = object()
+
+@lru_cache(maxsize=65536)
+def encode_timestamp(value):
+    """Pack a YYYY-MM-DD HH:MM timestamp into minutes since 0001-01-01 (others kept as-is)"""
+    if (type(value) is str and len(value) == 16 and value[4] == "-" and value[7] == "-"
+            and value[10] == " " and value[13] == ":"):
+        try:
+            day = date(int(value[:4]), int(value[5:7]), int(value[8:10]))
+            minutes = day.toordinal() * 1440 + int(value[11:13]) * 60 + int(value[14:16])
+        except ValueError:
+            return value
+        # Only exact round trips are packed, so conversion stays lossless
+        if decode_timestamp(minutes) == value:
+            return minutes
+    return value
+
+@lru_cache(maxsize=65536)
+def decode_timestamp(value):
+    """Unpack a timestamp packed by encode_timestamp"""
+    if type(value) is not int:
+        return value
+    day, minutes = divmod(value, 1440)
+    return f"{date.fromordinal(day).isoformat()} {minutes // 60:02d}:{minutes % 60:02d}"
+
+@lru_cache(maxsize=65536)
+def encode_date(value):
+    """Pack a YYYY-MM-DD date into a day ordinal and "" into 0 (others kept as-is)"""
+    if value == "":
+        return 0
+    ordinal = parse_due_date(value) if type(value) is str else None
+    if ordinal is not None and date.fromordinal(ordinal).isoformat() == value:
+        return ordinal
+    return value
+
+@lru_cache(maxsize=65536)
+def decode_date(value):
+    """Unpack a date packed by encode_date"""
+    if type(value) is not int:
+        return value
+    return date.fromordinal(value).isoformat() if value else ""
+
+def decode_status(value):
+    """Unpack a status code"""
+    return STATUSES[value] if type(value) is int else value
+
+def decode_priority(value):
+    """Unpack a priority code"""
+    return PRIORITIES[value] if type(value) is int else value
+
+class Verbatim:
+    """Holds a raw int field value so it is not read back as a packed one"""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+def verbatim(value):
+    """Wrap a raw int for a packed field (other non-string values are kept as-is)"""
+    return Verbatim(value) if type(value) is int else value
+
+# Field -> (encoder, decoder); None means the value is stored as-is.
+# Encoders only see strings; other values of packed fields go through verbatim()
+FIELD_CODECS = {
+    "id": (None, None),
+    "task": (None, None),
+    "priority": (lambda value: PRIORITY_CODES.get(value, value), decode_priority),
+    "due_date": (encode_date, decode_date),
+    "status": (lambda value: STATUS_CODES.get(value, value), decode_status),
+    "created": (encode_timestamp, decode_timestamp),
+    "completed_date": (encode_timestamp, decode_timestamp),
+    "repeat": (lambda value: sys.intern(value) if type(value) is str else value, None),
+}
+
+class Task:
+    """Compact task record that reads and writes like the task dict it replaces"""
+    __slots__ = TASK_FIELDS + ("extra",)
+    FIELD_SET = frozenset(TASK_FIELDS)
+
+    def __init__(self, record):
+        # Enums become small ints and dates/timestamps become ints; only strings are packed
+        get = record.get
+        self.id = get("id", MISSING)
+        self.task = get("task", MISSING)
+        priority = get("priority", MISSING)
+        self.priority = (PRIORITY_CODES.get(priority, priority) if type(priority) is str
+                         else verbatim(priority))
+        due_date = get("due_date", MISSING)
+        self.due_date = encode_date(due_date) if type(due_date) is str else verbatim(due_date)
+        status = get("status", MISSING)
+        self.status = (STATUS_CODES.get(status, status) if type(status) is str
+                       else verbatim(status))
+        created = get("created", MISSING)
+        self.created = (encode_timestamp(created) if type(created) is str
+                        else verbatim(created))
+        completed_date = get("completed_date", MISSING)
+        self.completed_date = (encode_timestamp(completed_date) if type(completed_date) is str
+                               else verbatim(completed_date))
+        repeat = get("repeat", MISSING)
+        self.repeat = sys.intern(repeat) if type(repeat) is str else repeat
+        # Unknown keys survive the round trip untouched
+        self.extra = None
+        if not record.keys() <= self.FIELD_SET:
+            self.extra = {key: value for key, value in record.items()
+                          if key not in self.FIELD_SET}
+
+    def __getitem__(self, field):
+        codec = FIELD_CODECS.get(field)
+        if codec is not None:
+            value = getattr(self, field)
+            if value is MISSING:
+                raise KeyError(field)
+            decode = codec[1]
+            if decode is None or value is None:
+                return value
+            return value.value if type(value) is Verbatim else decode(value)
+        if self.extra is not None and field in self.extra:
+            return self.extra[field]
+        raise KeyError(field)
+
+    def __setitem__(self, field, value):
+        codec = FIELD_CODECS.get(field)
+        if codec is None:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[field] = value
+            return
+        encode, decode = codec
+        if type(value) is str:
+            if encode is not None:
+                value = encode(value)
+        elif decode is not None:
+            value = verbatim(value)
+        setattr(self, field, value)
+
+    def __contains__(self, field):
+        try:
+            self[field]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (Task, dict)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Task({self.to_dict()!r})"
+
+    def keys(self):
+        """Return the fields present on this task, in the original schema order"""
+        keys = [field for field in TASK_FIELDS if getattr(self, field) is not MISSING]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def get(self, field, default=None):
+        """Return a field, or default when it is absent"""
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        """Convert back to the JSON task schema"""
+        record = {field: self[field] for field in TASK_FIELDS
+                  if getattr(self, field) is not MISSING}
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+def as_dict(task):
+    """Return a plain dict copy of a task record"""
+    return task.to_dict() if isinstance(task, Task) else dict(task)
+
+class SearchIndex:
+    """Inverted index over task descriptions with prefix matching"""
+
+    def __init__(self):
+        self.postings = {}
+        # Sorted vocabulary, so a prefix maps to one contiguous bisect range
+        self.terms = []
+
+    def add_many(self, items):
+        """Index many (task id, text) pairs, sorting the vocabulary once at the end"""
+        postings = self.postings
+        for task_id, text in items:
+            for term in set(tokenize(text)):
+                ids = postings.get(term)
+                if ids is None:
+                    ids = postings[term] = set()
+                ids.add(task_id)
+        self.terms = sorted(postings)
+
+    def add(self, task_id, text):
+        """Index the words of one task"""
+        for term in set(tokenize(text)):
+            ids = self.postings.get(term)
+            if ids is None:
+                ids = self.postings[term] = set()
+                bisect.insort(self.terms, term)
+            ids.add(task_id)
+
+    def remove(self, task_id, text):
+        """Drop one task from the index"""
+        for term in set(tokenize(text)):
+            ids = self.postings.get(term)
+            if ids is None:
+                continue
+            ids.discard(task_id)
+            if not ids:
+                del self.postings[term]
+                del self.terms[bisect.bisect_left(self.terms, term)]
+
+    def prefix_ids(self, prefix):
+        """Return the ids of tasks with a word starting with prefix"""
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + "\U0010ffff", start)
+        if end - start == 1:
+            return self.postings[self.terms[start]]
+        ids = set()
+        for term in self.terms[start:end]:
+            ids |= self.postings[term]
+        return ids
+
+    def search(self, query):
+        """Return the sorted ids of tasks matching every query term"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        # Intersect from the smallest posting set, so no large set is copied
+        id_sets = sorted((self.prefix_ids(term) for term in terms), key=len)
+        result = id_sets[0]
+        for ids in id_sets[1:]:
+            result = result & ids
+            if not result:
+                return []
+        return sorted(result)
+
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(PRIORITIES)}
+PRIORITY_RANK_SQL = ("CASE priority "
+                     + " ".join(f"WHEN '{p}' THEN {r}" for p, r in PRIORITY_RANK.items())
+                     + f" ELSE {len(PRIORITIES)} END")
+# Sorts tasks without a due date after every real day ordinal
+NO_DUE_DATE = date.max.toordinal() + 1
+
+# Sortable columns: (task field, Python sort key, equivalent SQL ORDER BY terms)
+SORT_COLUMNS = {
+    "Status": ("status", lambda task: task["status"], ("status",)),
+    "Task": ("task", lambda task: task["task"].lower(), ("task COLLATE NOCASE",)),
+    "Priority": ("priority", lambda task: PRIORITY_RANK.get(task["priority"], len(PRIORITIES)),
+                 (PRIORITY_RANK_SQL,)),
+    "Due Date": ("due_date", lambda task: parse_due_date(task["due_date"]) or NO_DUE_DATE,
+                 ("due_date = ''", "due_date")),
+    "Created": ("created", lambda task: task["created"], ("created",)),
+}
+
+def sort_key(order):
+    """Build a key for a multi-column sort order, with the id as tiebreaker"""
+    keys = [SORT_COLUMNS[column][1] for column in order]
+    return lambda task: (*[key(task) for key in keys], task["id"])
+
+class OrderIndex:
+    """Sorted (key..., id) entries for one sort order, maintained with bisect
+
+    With a field and value it holds only the tasks matching that filter, so
+    a filtered, sorted list is read straight off it as well.
+    """
+
+    def __init__(self, order, tasks, field=None, value=None):
+        self.key = sort_key(order)
+        self.field = field
+        self.value = value
+        # Only changes to these fields can move a task in or out or within the index
+        self.fields = {SORT_COLUMNS[column][0] for column in order}
+        if field is not None:
+            self.fields.add(field)
+        self.entries = sorted(self.key(task) for task in tasks if self.matches(task))
+
+    def matches(self, task):
+        """Check whether a task belongs in the index"""
+        return self.field is None or task[self.field] == self.value
+
+class SortedBatch:
+    """Changes to sorted lists, applied per list by splicing it in one pass"""
+    # Below this many changes, inserting and deleting in place is cheaper
+    SPLICE_MIN = 16
+
+    def __init__(self):
+        # id(list) -> (list, entries to remove, entries to add)
+        self.changes = {}
+        # (field, value) buckets that lost ids, dropped afterwards if left empty
+        self.shrunk = set()
+
+    def pending(self, entries):
+        """Return the (list, removed, added) record of one list"""
+        change = self.changes.get(id(entries))
+        if change is None:
+            change = self.changes[id(entries)] = (entries, [], [])
+        return change
+
+    def add(self, entries, entry):
+        """Queue an entry to insert"""
+        self.pending(entries)[2].append(entry)
+
+    def remove(self, entries, entry):
+        """Queue an entry to drop"""
+        self.pending(entries)[1].append(entry)
+
+    def apply(self):
+        """Apply every queued change, keeping each list object (views hold them)"""
+        for entries, removed, added in self.changes.values():
+            if len(removed) + len(added) < self.SPLICE_MIN:
+                for entry in removed:
+                    remove_sorted(entries, entry)
+                for entry in added:
+                    insert_sorted(entries, entry)
+                continue
+            merged = splice_out(entries, removed) if removed else entries
+            if added:
+                merged = splice_in(merged, added)
+            if merged is not entries:
+                entries[:] = merged
+        self.changes = {}
+
+def splice_out(entries, removed):
+    """Return a sorted list without the removed entries"""
+    if len(removed) * 24 > len(entries):
+        # Dropping a large share: one membership pass beats a bisect per entry
+        removed = set(removed)
+        return [entry for entry in entries if entry not in removed]
+    # Bisect for every cut point in order, then copy the runs between them
+    kept, start = [], 0
+    for entry in sorted(removed):
+        position = bisect.bisect_left(entries, entry, start)
+        if position < len(entries) and entries[position] == entry:
+            kept += entries[start:position]
+            start = position + 1
+    kept += entries[start:]
+    return kept
+
+def splice_in(entries, added):
+    """Return a sorted list with the added entries merged in"""
+    added = sorted(added)
+    if not entries or entries[-1] < added[0]:
+        # New ids and loads land after everything else
+        return entries + added
+    merged, start = [], 0
+    for entry in added:
+        position = bisect.bisect_left(entries, entry, start)
+        merged += entries[start:position]
+        merged.append(entry)
+        start = position
+    merged += entries[start:]
+    return merged
+
+def insert_sorted(entries, entry):
+    """Insert into a sorted list, appending when the entry sorts last"""
+    if not entries or entries[-1] < entry:
+        entries.append(entry)
+    else:
+        bisect.insort(entries, entry)
+
+def remove_sorted(entries, entry):
+    """Drop an entry from a sorted list if it is there"""
+    position = bisect.bisect_left(entries, entry)
+    if position < len(entries) and entries[position] == entry:
+        del entries[position]
+
+class OrderedView:
+    """Sliceable sequence of tasks over sorted (key..., id) entries"""
+
+    def __init__(self, tasks, entries, reverse=False):
+        self.tasks = tasks
+        self.entries = entries
+        self.reverse = reverse
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            if index < 0:
+                index += len(self.entries)
+            rows = self[index:index + 1]
+            if not rows:
+                raise IndexError(index)
+            return rows[0]
+        start, stop, _ = index.indices(len(self.entries))
+        if stop <= start:
+            return []
+        if self.reverse:
+            total = len(self.entries)
+            entries = self.entries[total - stop:total - start][::-1]
+        else:
+            entries = self.entries[start:stop]
+        return [self.tasks[task_id] for task_id in self.task_ids(entries)]
+
+    def task_ids(self, entries):
+        """Return the task ids of a run of entries"""
+        return [entry[-1] for entry in entries]
+
+class IdView(OrderedView):
+    """Sliceable sequence of tasks over a sorted list of ids"""
+
+    def task_ids(self, entries):
+        return entries
+
+class TaskStore:
+    """In-memory task store indexed by id, status, priority and due date"""
+    INDEXED_FIELDS = ("status", "priority", "due_date")
+    MAX_ORDER_INDEXES = 8
+
+    def __init__(self, tasks=None, next_id=1):
+        self.tasks = {}
+        # Every id, and field -> value -> ids, as sorted lists (restored ids go back in order)
+        self.ids = []
+        self.indexes = {field: {} for field in self.INDEXED_FIELDS}
+        # Parsed due dates and sorted (ordinal, id) indexes for range queries
+        self.due_ordinals = {}
+        self.due_index = []
+        self.pending_due_index = []
+        self.next_id = next_id
+        # Built on the first search, then maintained incrementally
+        self.search_index = None
+        # (sort order, filter field, value) -> OrderIndex, built on first use and then maintained
+        self.order_indexes = {}
+        # Callbacks notified as listener(op, *args) after each mutation
+        self.listeners = []
+        # Sorted-index changes queued by a bulk operation
+        self.batch = None
+        self.build(tasks or [])
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __iter__(self):
+        return (self.tasks[task_id] for task_id in self.ids)
+
+    def __contains__(self, task_id):
+        return task_id in self.tasks
+
+    def get(self, task_id):
+        """Return the task with the given id, or None"""
+        return self.tasks.get(task_id)
+
+    def add(self, task):
+        """Add a new task under a fresh id that is never reused"""
+        task["id"] = self.next_id
+        task = self.insert(task)
+        self.notify("add", task)
+        return task
+
+    def add_many(self, tasks):
+        """Add a batch of new tasks under consecutive fresh ids with one notification"""
+        for offset, task in enumerate(tasks):
+            task["id"] = self.next_id + offset
+        tasks = self.insert_many(tasks)
+        if tasks:
+            self.notify("add_many", tasks)
+        return tasks
+
+    def insert(self, task):
+        """Insert a task that already carries its id, stored as a compact Task"""
+        if not isinstance(task, Task):
+            task = Task(task)
+        task_id = task["id"]
+        self.tasks[task_id] = task
+        self.next_id = max(self.next_id, task_id + 1)
+        self.add_entry(self.ids, task_id)
+        for field in self.INDEXED_FIELDS:
+            self.add_entry(self.indexes[field].setdefault(task[field], []), task_id)
+        self.index_due(task)
+        if self.search_index is not None:
+            self.search_index.add(task["id"], task["task"])
+        for index in self.order_indexes.values():
+            if index.matches(task):
+                self.add_entry(index.entries, index.key(task))
+        return task
+
+    def build(self, tasks):
+        """Index the initial tasks of a new store with one pass per index
+
+        Tasks are grouped by their packed field values, so each distinct
+        status, priority and due date is decoded once, not once per task.
+        """
+        tasks = [task if isinstance(task, Task) else Task(task) for task in tasks]
+        self.tasks.update(zip(map(attrgetter("id"), tasks), tasks))
+        if MISSING in self.tasks:
+            raise KeyError("id")
+        self.ids = sorted(self.tasks)
+        if self.ids:
+            self.next_id = max(self.next_id, self.ids[-1] + 1)
+        tasks = [self.tasks[task_id] for task_id in self.ids]
+        for field in self.INDEXED_FIELDS:
+            self.indexes[field] = self.group_ids(tasks, field)
+        pending = set(self.indexes["status"].get("Pending", ()))
+        for due_date, task_ids in sorted(self.indexes["due_date"].items(),
+                                         key=lambda item: parse_due_date(item[0]) or 0):
+            ordinal = parse_due_date(due_date)
+            if ordinal is None:
+                continue
+            self.due_ordinals.update(dict.fromkeys(task_ids, ordinal))
+            self.due_index += [(ordinal, task_id) for task_id in task_ids]
+            self.pending_due_index += [(ordinal, task_id) for task_id in task_ids
+                                       if task_id in pending]
+        # Already in order unless two spellings of a date share an ordinal
+        self.due_index.sort()
+        self.pending_due_index.sort()
+        return tasks
+
+    def group_ids(self, tasks, field):
+        """Return {value: sorted ids} for tasks in id order, decoding each packed value once"""
+        packed = list(map(attrgetter(field), tasks))
+        if not set(map(type, packed)) <= {int, str}:
+            # Other raw values may compare equal across types (True == 1), so decode each
+            packed = [task[field] for task in tasks]
+        values = set(packed)
+        if len(values) <= 8:
+            # A filtering pass per value is quicker than a dict lookup per task
+            groups = {value: [task_id for task_id, other in zip(self.ids, packed) if other == value]
+                      for value in values}
+        else:
+            groups = {}
+            for task_id, value in zip(self.ids, packed):
+                group = groups.get(value)
+                if group is None:
+                    group = groups[value] = []
+                group.append(task_id)
+        # Decode with the first task of each group, as the ids are in order
+        return {self.tasks[task_ids[0]][field]: task_ids for task_ids in groups.values()}
+
+    def insert_many(self, tasks):
+        """Insert tasks that carry their ids, sorting each sorted index once"""
+        with self.batched():
+            return [self.insert(task) for task in tasks]
+
+    def restore(self, tasks):
+        """Re-insert deleted tasks under their original ids, back in id order"""
+        tasks = self.insert_many(tasks)
+        if tasks:
+            self.notify("add_many", tasks)
+
+    def get_many(self, task_ids):
+        """Return the existing tasks among the given ids"""
+        return [self.tasks[task_id] for task_id in task_ids if task_id in self.tasks]
+
+    def update(self, task_id, **changes):
+        """Apply field changes to a task, keeping the indexes in sync"""
+        task = self.tasks[task_id]
+        previous = self.apply_changes(task, changes)
+        self.notify("update", task, changes, previous)
+        return task
+
+    def update_many(self, task_ids, **changes):
+        """Apply the same field changes to many tasks with a single notification"""
+        tasks = self.get_many(task_ids)
+        with self.batched():
+            previous = [self.apply_changes(task, changes) for task in tasks]
+        if tasks:
+            self.notify("update_many", tasks, changes, previous)
+        return tasks
+
+    def apply_changes(self, task, changes):
+        """Change one task in place and in every index; return the old values"""
+        task_id = task["id"]
+        previous = {field: task.get(field) for field in changes}
+        reindex_due = "due_date" in changes or "status" in changes
+        if reindex_due:
+            was_pending = task["status"] == "Pending"
+        for field, value in changes.items():
+            if field in self.indexes and task[field] != value:
+                self.unindex(field, task)
+                self.add_entry(self.indexes[field].setdefault(value, []), task_id)
+            task[field] = value
+        if reindex_due:
+            self.reindex_due(task, was_pending)
+        if self.search_index is not None and "task" in changes:
+            self.search_index.remove(task_id, previous["task"])
+            self.search_index.add(task_id, task["task"])
+        for index in self.order_indexes.values():
+            if not index.fields.isdisjoint(changes):
+                # Only the indexed fields are needed to rebuild the old key
+                before = {field: task[field] for field in index.fields}
+                before.update(previous, id=task_id)
+                old_entry = index.key(before) if index.matches(before) else None
+                entry = index.key(task) if index.matches(task) else None
+                if old_entry != entry:
+                    if old_entry is not None:
+                        self.remove_entry(index.entries, old_entry)
+                    if entry is not None:
+                        self.add_entry(index.entries, entry)
+        return previous
+
+    def delete(self, task_ids):
+        """Remove tasks by id and return the removed tasks"""
+        removed = []
+        with self.batched():
+            for task_id in task_ids:
+                task = self.tasks.pop(task_id, None)
+                if task is None:
+                    continue
+                self.remove_entry(self.ids, task_id)
+                for field in self.INDEXED_FIELDS:
+                    self.unindex(field, task)
+                self.unindex_due(task)
+                if self.search_index is not None:
+                    self.search_index.remove(task_id, task["task"])
+                for index in self.order_indexes.values():
+                    if index.matches(task):
+                        self.remove_entry(index.entries, index.key(task))
+                removed.append(task)
+        if removed:
+            self.notify("delete", removed)
+        return removed
+
+    def notify(self, op, *args):
+        """Tell every listener about a mutation"""
+        for listener in self.listeners:
+            listener(op, *args)
+
+    def unindex(self, field, task):
+        """Drop a task from one secondary index"""
+        value = task[field]
+        bucket = self.indexes[field][value]
+        self.remove_entry(bucket, task["id"])
+        if self.batch is not None:
+            self.batch.shrunk.add((field, value))
+        elif not bucket:
+            del self.indexes[field][value]
+
+    def index_due(self, task):
+        """Add a task to the sorted due-date indexes"""
+        ordinal = parse_due_date(task["due_date"])
+        if ordinal is None:
+            return
+        task_id = task["id"]
+        self.due_ordinals[task_id] = ordinal
+        self.add_entry(self.due_index, (ordinal, task_id))
+        if task["status"] == "Pending":
+            self.add_entry(self.pending_due_index, (ordinal, task_id))
+
+    def unindex_due(self, task):
+        """Drop a task from the sorted due-date indexes"""
+        ordinal = self.due_ordinals.pop(task["id"], None)
+        if ordinal is None:
+            return
+        self.remove_entry(self.due_index, (ordinal, task["id"]))
+        if task["status"] == "Pending":
+            self.remove_entry(self.pending_due_index, (ordinal, task["id"]))
+
+    def reindex_due(self, task, was_pending):
+        """Move a changed task in the due-date indexes, touching only the entries that differ"""
+        task_id = task["id"]
+        old_ordinal = self.due_ordinals.get(task_id)
+        ordinal = parse_due_date(task["due_date"])
+        pending = task["status"] == "Pending"
+        if ordinal != old_ordinal:
+            if old_ordinal is not None:
+                del self.due_ordinals[task_id]
+                self.remove_entry(self.due_index, (old_ordinal, task_id))
+                if was_pending:
+                    self.remove_entry(self.pending_due_index, (old_ordinal, task_id))
+            self.index_due(task)
+        elif ordinal is not None and pending != was_pending:
+            if pending:
+                self.add_entry(self.pending_due_index, (ordinal, task_id))
+            else:
+                self.remove_entry(self.pending_due_index, (ordinal, task_id))
+
+    @contextmanager
+    def batched(self):
+        """Queue sorted-index changes made in the block and apply them together at the end
+
+        A bulk change then costs one pass over each index it touches, not
+        one list insert or delete per task.
+        """
+        if self.batch is not None:
+            yield
+            return
+        self.batch = SortedBatch()
+        try:
+            yield
+        finally:
+            batch, self.batch = self.batch, None
+            batch.apply()
+            for field, value in batch.shrunk:
+                if not self.indexes[field].get(value, True):
+                    del self.indexes[field][value]
+
+    def add_entry(self, entries, entry):
+        """Insert into a sorted index, or queue the insert in a batch"""
+        if self.batch is not None:
+            self.batch.add(entries, entry)
+        else:
+            insert_sorted(entries, entry)
+
+    def remove_entry(self, entries, entry):
+        """Drop from a sorted index, or queue the removal in a batch"""
+        if self.batch is not None:
+            self.batch.remove(entries, entry)
+        else:
+            remove_sorted(entries, entry)
+
+    def due_ordinal(self, task):
+        """Return the parsed due date of a task as a day ordinal, or None"""
+        return self.due_ordinals.get(task["id"])
+
+    def due_on(self, ordinal):
+        """Return the tasks due on the given day, ordered by id"""
+        start = bisect.bisect_left(self.due_index, (ordinal,))
+        end = bisect.bisect_left(self.due_index, (ordinal + 1,))
+        return [self.tasks[task_id] for _, task_id in self.due_index[start:end]]
+
+    def count_overdue(self, today_ordinal):
+        """Count pending tasks due before the given day"""
+        return bisect.bisect_left(self.pending_due_index, (today_ordinal,))
+
+    def counts_by(self, field):
+        """Return {value: count} for an indexed field"""
+        return {value: len(bucket) for value, bucket in self.indexes[field].items()}
+
+    def pending_due_counts(self):
+        """Return {due ordinal: count} for pending tasks with a due date"""
+        return Counter(ordinal for ordinal, _ in self.pending_due_index)
+
+    def pending_due_after(self, entry, limit):
+        """Return up to limit (due ordinal, id) of pending tasks after an entry, in due order"""
+        start = bisect.bisect_right(self.pending_due_index, entry)
+        return self.pending_due_index[start:start + limit]
+
+    def find(self, field, value):
+        """Return the tasks whose field equals value, ordered by id"""
+        return [self.tasks[task_id] for task_id in self.indexes[field].get(value, ())]
+
+    def count(self, field, value):
+        """Count the tasks whose field equals value"""
+        return len(self.indexes[field].get(value, ()))
+
+    def find_repeating(self):
+        """Return the pending tasks that carry a repeat rule"""
+        return [task for task in self.find("status", "Pending") if task.get("repeat")]
+
+    def to_list(self):
+        """Return all tasks as a list ordered by id"""
+        return list(self)
+
+    def order_index(self, order, field=None, value=None):
+        """Return the maintained index for a sort order and filter, building it once"""
+        key = (tuple(order), field, value)
+        index = self.order_indexes.pop(key, None)
+        if index is None:
+            # Each index holds an entry per matching task, so keep only the recently used few
+            if len(self.order_indexes) >= self.MAX_ORDER_INDEXES:
+                del self.order_indexes[next(iter(self.order_indexes))]
+            tasks = self.tasks.values() if field is None else self.find(field, value)
+            index = OrderIndex(order, tasks, field, value)
+        self.order_indexes[key] = index
+        return index
+
+    def select(self, field=None, value=None, order=(), reverse=False):
+        """Return the tasks matching a filter as a sliceable sequence"""
+        if not order:
+            # The id lists are kept sorted, so no sorting happens here
+            ids = self.ids if field is None else self.indexes[field].get(value, [])
+            return IdView(self.tasks, ids, reverse)
+        # Filtered orders get their own index, so no sorting happens here either
+        index = self.order_index(order, field, value)
+        return OrderedView(self.tasks, index.entries, reverse)
+
+    def search(self, query, field=None, value=None, order=(), reverse=False):
+        """Return tasks whose description matches the query, optionally filtered"""
+        if self.search_index is None:
+            self.search_index = SearchIndex()
+            self.search_index.add_many((task_id, task["task"])
+                                       for task_id, task in self.tasks.items())
+        tasks = (self.tasks[task_id] for task_id in self.search_index.search(query))
+        if field is not None:
+            tasks = (task for task in tasks if task[field] == value)
+        tasks = list(tasks)
+        if order:
+            tasks.sort(key=sort_key(order), reverse=reverse)
+        return tasks
+
+    def commit(self):
+        """In-memory changes need no commit"""
+
+@contextmanager
+def gc_paused():
+    """Hold off the cyclic garbage collector while the block builds many lasting objects"""
+    # Loading allocates far more objects than it frees, so collections find nothing
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive advisory lock on a lock file for the with block"""
+    with open(path, 'a+b') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            while True:
+                # LK_LOCK gives up after about ten seconds; keep waiting
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+def record_ids(record):
+    """Return the task ids a journal record touches"""
+    if record["op"] == "add":
+        return [record["task"]["id"]]
+    if record["op"] == "add_many":
+        return [task["id"] for task in record["tasks"]]
+    if record["op"] == "update":
+        return [record["id"]]
+    return record["ids"]
+
+class TaskJournal:
+    """Write-ahead journal of task mutations on top of a JSON snapshot"""
+
+    def __init__(self, filename, sync_every=64, compact_every=1000):
+        self.filename = filename
+        self.journal_file = filename + ".journal"
+        self.rotated_file = filename + ".journal.1"
+        self.sync_every = sync_every
+        self.compact_every = compact_every
+        self.seq = 0
+        self.snapshot_seq = 0
+        # End of the last record read from the journal file
+        self.offset = 0
+        self.unsynced = 0
+        self.since_snapshot = 0
+        self.handle = None
+        self.compactor = None
+
+    def load(self):
+        """Rebuild the store from the snapshot plus any journaled records"""
+        store = self.read_store()
+        if os.path.exists(self.rotated_file):
+            # A compaction was interrupted; finish it before appending again
+            self.write_snapshot(self.snapshot_of(store), self.seq)
+            os.remove(self.rotated_file)
+        
+        self.handle = open(self.journal_file, 'a', encoding='utf-8')
+        return store
+
+    def read_store(self):
+        """Read the snapshot and replay the journal records after it"""
+        store = TaskStore()
+        snapshot_seq = 0
+        if os.path.exists(self.filename):
+            with open(self.filename, 'r') as f:
+                data = json.load(f)
+            # Older files hold a bare list of tasks
+            if isinstance(data, list):
+                store = TaskStore(data)
+            else:
+                store = TaskStore(data["tasks"], data.get("next_id", 1))
+                snapshot_seq = data.get("seq", 0)
+        
+        self.seq = self.snapshot_seq = snapshot_seq
+        self.since_snapshot = 0
+        self.offset = 0
+        for path in (self.rotated_file, self.journal_file):
+            for record in self.read_records(path):
+                # Records copied to the rotated journal just before a crash appear twice
+                if record["seq"] > self.seq:
+                    self.apply(store, record)
+                    self.since_snapshot += 1
+                self.seq = max(self.seq, record["seq"])
+        return store
+
+    def read_records(self, path, offset=0):
+        """Yield journal records after offset, cutting off a torn final write"""
+        self.offset = offset
+        if not os.path.exists(path):
+            return
+        good_offset = offset
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                good_offset += len(line)
+                yield record
+        self.offset = good_offset
+        if good_offset < os.path.getsize(path):
+            with open(path, 'r+b') as f:
+                f.truncate(good_offset)
+
+    def apply(self, store, record):
+        """Replay one journal record against a store"""
+        if record["op"] == "add":
+            store.insert(record["task"])
+        elif record["op"] == "add_many":
+            store.insert_many(record["tasks"])
+        elif record["op"] == "update":
+            if record["id"] in store:
+                store.update(record["id"], **record["changes"])
+        elif record["op"] == "update_many":
+            store.update_many(record["ids"], **record["changes"])
+        elif record["op"] == "delete":
+            store.delete(record["ids"])
+
+    def record_change(self, op, *args):
+        """Store listener that journals each mutation"""
+        if op == "add":
+            self.append({"op": "add", "task": as_dict(args[0])})
+        elif op == "add_many":
+            self.append({"op": "add_many", "tasks": [as_dict(task) for task in args[0]]})
+        elif op == "update":
+            self.append({"op": "update", "id": args[0]["id"], "changes": args[1]})
+        elif op == "update_many":
+            # One record for the whole batch
+            self.append({"op": "update_many", "ids": [task["id"] for task in args[0]],
+                         "changes": args[1]})
+        elif op == "delete":
+            self.append({"op": "delete", "ids": [task["id"] for task in args[0]]})
+
+    def append(self, record):
+        """Append one compact record, fsyncing once per batch"""
+        self.seq += 1
+        record["seq"] = self.seq
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        self.handle.write(line)
+        count_bytes("journal", len(line))
+        self.handle.flush()
+        self.unsynced += 1
+        self.since_snapshot += 1
+        if self.unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        """Force journaled records to disk"""
+        if self.handle is not None and self.unsynced:
+            os.fsync(self.handle.fileno())
+            self.unsynced = 0
+
+    def needs_compaction(self):
+        """Check whether the journal has grown enough to fold into a snapshot"""
+        compacting = self.compactor is not None and self.compactor.is_alive()
+        return self.since_snapshot >= self.compact_every and not compacting
+
+    def compact(self, store):
+        """Rotate the journal and write a new snapshot in the background"""
+        self.sync()
+        self.handle.close()
+        if os.path.exists(self.rotated_file):
+            # An earlier compaction failed and left its rotated journal behind; its
+            # records are not in the snapshot yet, so append to it instead of replacing it
+            with open(self.journal_file, 'rb') as source, open(self.rotated_file, 'ab') as target:
+                shutil.copyfileobj(source, target)
+                target.flush()
+                os.fsync(target.fileno())
+            os.remove(self.journal_file)
+        else:
+            os.replace(self.journal_file, self.rotated_file)
+        self.handle = open(self.journal_file, 'a', encoding='utf-8')
+        self.since_snapshot = 0
+        
+        # Shallow copies are enough: task values are immutable scalars
+        tasks = self.snapshot_of(store)
+        self.compactor = threading.Thread(target=self.finish_compaction,
+                                          args=(tasks, self.seq))
+        self.compactor.start()
+
+    def finish_compaction(self, tasks, seq):
+        """Write the snapshot and drop the journal it replaces"""
+        try:
+            self.write_snapshot(tasks, seq)
+            os.remove(self.rotated_file)
+        except Exception as e:
+            print(f"Error compacting tasks: {e}")
+
+    def snapshot_of(self, store):
+        """Return an immutable snapshot of the store"""
+        return {"next_id": store.next_id, "tasks": [as_dict(task) for task in store]}
+
+    def write_snapshot(self, snapshot, seq):
+        """Atomically replace the snapshot file"""
+        temp_file = self.filename + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(dict(snapshot, seq=seq), f, separators=(",", ":"))
+            count_bytes("snapshot", f.tell())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.filename)
+
+    def close(self):
+        """Flush the journal and wait for any running compaction"""
+        if self.compactor is not None:
+            self.compactor.join()
+        if self.handle is not None:
+            self.sync()
+            self.handle.close()
+            self.handle = None
+
+class SharedTaskJournal(TaskJournal):
+    """Journal shared by several processes through an advisory lock file
+
+    Appends happen under the lock after catching up with records other
+    processes wrote, so the file stays one serial log. Each record's seq is
+    the version stamp of the tasks it touches; other processes notice new
+    records by polling the journal's size and mtime.
+    """
+
+    def __init__(self, filename, sync_every=64, compact_every=1000):
+        super().__init__(filename, sync_every, compact_every)
+        self.lock_file = filename + ".lock"
+        self.lock_handle = None
+        self.lock_depth = 0
+        # Task id -> seq of the last record that touched it
+        self.versions = {}
+        # Inode of the journal file self.offset points into, and its last stat
+        self.inode = None
+        self.stamp = None
+
+    @contextmanager
+    def locked(self):
+        """Hold the lock for the with block; nested blocks share it"""
+        if self.lock_depth:
+            self.lock_depth += 1
+            try:
+                yield
+            finally:
+                self.lock_depth -= 1
+            return
+        with file_lock(self.lock_file):
+            self.lock_depth = 1
+            try:
+                yield
+            finally:
+                self.lock_depth = 0
+
+    def load(self):
+        """Read the shared files under the lock; rotated journals are kept for readers"""
+        with self.locked():
+            store = self.read_store()
+            self.open_journal()
+        return store
+
+    def open_journal(self):
+        """(Re)open the append handle on the current journal file"""
+        if self.handle is not None:
+            self.handle.close()
+        self.handle = open(self.journal_file, 'a', encoding='utf-8')
+        self.inode = os.fstat(self.handle.fileno()).st_ino
+        self.stamp = self.file_stamp()
+
+    def file_stamp(self):
+        """Return the journal's (inode, size, mtime), or None if it is missing"""
+        try:
+            stat = os.stat(self.journal_file)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def changed_on_disk(self):
+        """Cheap check (one stat) for records written by another process"""
+        return self.file_stamp() != self.stamp
+
+    def apply(self, store, record):
+        """Replay one record and stamp its tasks with the record's version"""
+        super().apply(store, record)
+        for task_id in record_ids(record):
+            self.versions[task_id] = record["seq"]
+
+    def append(self, record):
+        """Append under the lock; callers have already caught up"""
+        with self.locked():
+            super().append(record)
+            self.offset = self.handle.tell()
+            self.stamp = self.file_stamp()
+        for task_id in record_ids(record):
+            self.versions[task_id] = record["seq"]
+
+    def version(self, task_id):
+        """Return the version stamp of a task"""
+        return self.versions.get(task_id, self.snapshot_seq)
+
+    def catch_up(self, store):
+        """Apply records other processes appended; return {id: task before} for each task touched
+
+        Must run under the lock with this journal's own listener muted.
+        """
+        before = {}
+        if not self.changed_on_disk():
+            return before
+        if self.file_stamp() is None or self.file_stamp()[0] != self.inode:
+            # Another process compacted: finish the rotated journal first
+            rotated = os.stat(self.rotated_file) if os.path.exists(self.rotated_file) else None
+            if rotated is None or rotated.st_ino != self.inode:
+                # Missed more than one compaction; diff against a fresh load
+                self.resync(store, before)
+                return before
+            self.apply_new(store, self.rotated_file, self.offset, before)
+            self.since_snapshot = 0
+            self.offset = 0
+            self.open_journal()
+        self.apply_new(store, self.journal_file, self.offset, before)
+        self.stamp = self.file_stamp()
+        return before
+
+    def apply_new(self, store, path, offset, before):
+        """Apply the records of one journal file after offset"""
+        for record in list(self.read_records(path, offset)):
+            if record["seq"] <= self.seq:
+                continue
+            for task_id in record_ids(record):
+                if task_id not in before:
+                    task = store.get(task_id)
+                    before[task_id] = None if task is None else Task(as_dict(task))
+            if record["op"] in ("add", "add_many"):
+                # Live stores notify their listeners of new tasks
+                tasks = record["tasks"] if record["op"] == "add_many" else [record["task"]]
+                store.restore(tasks)
+                for task in tasks:
+                    self.versions[task["id"]] = record["seq"]
+            else:
+                self.apply(store, record)
+            self.seq = record["seq"]
+            self.since_snapshot += 1
+
+    def resync(self, store, before):
+        """Reload the shared files and apply only the differences to store"""
+        self.versions = {}
+        fresh = self.read_store()
+        removed = [task["id"] for task in store if task["id"] not in fresh]
+        for task_id in removed:
+            before[task_id] = Task(as_dict(store.get(task_id)))
+        store.delete(removed)
+        for task in fresh:
+            current = store.get(task["id"])
+            if current is None:
+                before[task["id"]] = None
+                store.restore([as_dict(task)])
+                continue
+            changes = {field: task.get(field) for field in TASK_FIELDS
+                       if task.get(field) != current.get(field)}
+            if changes:
+                before[task["id"]] = Task(as_dict(current))
+                store.update(task["id"], **changes)
+        store.next_id = max(store.next_id, fresh.next_id)
+        self.open_journal()
+
+    def compact(self, store):
+        """Write the snapshot, then rotate the journal, all under the lock
+
+        The rotated journal is left in place so other processes can read
+        its tail; the next compaction replaces it.
+        """
+        with self.locked():
+            self.sync()
+            self.write_snapshot(self.snapshot_of(store), self.seq)
+            self.snapshot_seq = self.seq
+            self.handle.close()
+            self.handle = None
+            os.replace(self.journal_file, self.rotated_file)
+            self.offset = 0
+            self.since_snapshot = 0
+            self.open_journal()
+
+class UndoHistory:
+    """Undo/redo stacks of inverse operations, logged to an append-only file"""
+
+    def __init__(self, filename=None, limit=100):
+        self.filename = filename
+        self.limit = limit
+        # Each step is [label, ops]; applying ops in reverse reverts the step
+        self.undo_stack = []
+        self.redo_stack = []
+        self.current = None
+        self.depth = 0
+        self.handle = None
+        self.lines = 0
+
+    def load(self):
+        """Rebuild both stacks by replaying the history log"""
+        if self.filename is None:
+            return self
+        torn = False
+        if os.path.exists(self.filename):
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        torn = True
+                        break
+                    self.apply_entry(entry)
+                    self.lines += 1
+        self.handle = open(self.filename, 'a', encoding='utf-8')
+        if torn or self.lines > 4 * self.limit:
+            self.compact()
+        return self
+
+    @contextmanager
+    def command(self, label):
+        """Group the store changes made inside the block into one undo step"""
+        if self.depth == 0:
+            self.current = []
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            if self.depth == 0:
+                ops, self.current = self.current, None
+                if ops:
+                    self.record({"do": label, "ops": ops})
+
+    def record_change(self, op, *args):
+        """Store listener that notes the inverse of each change in a command"""
+        if self.current is None:
+            return
+        last = self.current[-1] if self.current else None
+        if op == "add":
+            # The task itself is only needed again on redo
+            if last is not None and last[0] == "delete":
+                last[1].append(args[0]["id"])
+            else:
+                self.current.append(["delete", [args[0]["id"]]])
+        elif op == "add_many":
+            # Imports add whole batches under consecutive ids, so keep only the id range
+            task_ids = [task["id"] for task in args[0]]
+            first, end = task_ids[0], task_ids[-1] + 1
+            if task_ids != list(range(first, end)):
+                self.current.append(["delete", task_ids])
+            elif last is not None and last[0] == "delete_range" and last[2] == first:
+                last[2] = end
+            else:
+                self.current.append(["delete_range", first, end])
+        elif op == "update":
+            task, changes, previous = args
+            self.current.append(["update", task["id"], previous])
+        elif op == "update_many":
+            # Tasks that had the same old values share one inverse op
+            groups = {}
+            for task, old in zip(args[0], args[2]):
+                key = json.dumps(old, sort_keys=True)
+                groups.setdefault(key, (old, []))[1].append(task["id"])
+            for old, task_ids in groups.values():
+                self.current.append(["update_many", task_ids, old])
+        elif op == "delete":
+            removed = [as_dict(task) for task in args[0]]
+            if last is not None and last[0] == "restore":
+                last[1].extend(removed)
+            else:
+                self.current.append(["restore", removed])
+
+    def apply(self, store, op):
+        """Apply one inverse operation, skipping tasks that are gone"""
+        if op[0] == "delete":
+            store.delete(op[1])
+        elif op[0] == "delete_range":
+            store.delete(range(op[1], op[2]))
+        elif op[0] == "update":
+            if op[1] in store:
+                store.update(op[1], **op[2])
+        elif op[0] == "update_many":
+            store.update_many(op[1], **op[2])
+        elif op[0] == "restore":
+            store.restore([dict(task) for task in op[1] if task["id"] not in store])
+
+    def undo(self, store):
+        """Revert the latest step; return its label, or None if there is none"""
+        return self.replay(store, self.undo_stack, "undo")
+
+    def redo(self, store):
+        """Re-apply the latest undone step; return its label, or None"""
+        return self.replay(store, self.redo_stack, "redo")
+
+    def replay(self, store, stack, direction):
+        """Apply a step's ops and move it to the other stack as their inverse"""
+        if not stack:
+            return None
+        label, ops = stack[-1]
+        self.current = []
+        try:
+            for op in reversed(ops):
+                self.apply(store, op)
+            inverse = self.current
+        finally:
+            self.current = None
+        self.record({direction: inverse})
+        return label
+
+    def apply_entry(self, entry):
+        """Update the stacks for one log entry (shared by live use and replay)"""
+        if "do" in entry:
+            self.undo_stack.append([entry["do"], entry["ops"]])
+            del self.undo_stack[:-self.limit]
+            self.redo_stack.clear()
+        elif "undo" in entry:
+            label, _ = self.undo_stack.pop()
+            self.redo_stack.append([label, entry["undo"]])
+        elif "redo" in entry:
+            label, _ = self.redo_stack.pop()
+            self.undo_stack.append([label, entry["redo"]])
+        elif "undo_stack" in entry:
+            self.undo_stack = entry["undo_stack"]
+            self.redo_stack = entry["redo_stack"]
+
+    def record(self, entry):
+        """Apply a log entry and append it to the history file"""
+        self.apply_entry(entry)
+        if self.handle is None:
+            return
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        self.handle.write(line)
+        count_bytes("history", len(line))
+        self.handle.flush()
+        self.lines += 1
+        if self.lines > 4 * self.limit:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the log as a single entry holding both stacks"""
+        self.handle.close()
+        temp_file = self.filename + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"undo_stack": self.undo_stack, "redo_stack": self.redo_stack},
+                               separators=(",", ":")) + "\n")
+            count_bytes("history", f.tell())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.filename)
+        self.handle = open(self.filename, 'a', encoding='utf-8')
+        self.lines = 1
+
+    def sync(self):
+        """Force logged steps to disk"""
+        if self.handle is not None:
+            os.fsync(self.handle.fileno())
+
+    def close(self):
+        """Flush and close the history log"""
+        if self.handle is not None:
+            self.sync()
+            self.handle.close()
+            self.handle = None
+
+class SQLiteTaskStore:
+    """Task store backed by an indexed SQLite database"""
+    FIELDS = TASK_FIELDS
+    INDEXED_FIELDS = TaskStore.INDEXED_FIELDS
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.conn = sqlite3.connect(filename)
+        self.conn.row_factory = sqlite3.Row
+        self.listeners = []
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS tasks (
+                                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                 task TEXT NOT NULL,
+                                 priority TEXT NOT NULL,
+                                 due_date TEXT NOT NULL,
+                                 status TEXT NOT NULL,
+                                 created TEXT NOT NULL,
+                                 completed_date TEXT,
+                                 repeat TEXT DEFAULT '')""")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+        if "repeat" not in columns:
+            self.conn.execute("ALTER TABLE tasks ADD COLUMN repeat TEXT DEFAULT ''")
+        for field in self.INDEXED_FIELDS:
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_tasks_{field} "
+                              f"ON tasks ({field}, id)")
+        # Expression indexes matching each column's ORDER BY terms
+        for column, (field, _, terms) in SORT_COLUMNS.items():
+            if terms != (field,) or field not in self.INDEXED_FIELDS:
+                name = column.lower().replace(" ", "_")
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_tasks_sort_{name} "
+                                  f"ON tasks ({', '.join(terms)}, id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_pending_due "
+                          "ON tasks (status, due_date, id)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.fts = self.create_search_table()
+        self.conn.commit()
+
+    def create_search_table(self):
+        """Keep an FTS5 index of descriptions in sync through triggers"""
+        try:
+            exists = self.conn.execute("SELECT 1 FROM sqlite_master "
+                                       "WHERE name = 'tasks_fts'").fetchone()
+            if exists:
+                return True
+            self.conn.execute("CREATE VIRTUAL TABLE tasks_fts USING fts5("
+                              "task, content='tasks', content_rowid='id')")
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5; search falls back to LIKE
+            return False
+        self.conn.executescript("""
+            CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN
+                INSERT INTO tasks_fts (rowid, task) VALUES (new.id, new.task);
+            END;
+            CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, task) VALUES ('delete', old.id, old.task);
+            END;
+            CREATE TRIGGER tasks_fts_update AFTER UPDATE OF task ON tasks BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, task) VALUES ('delete', old.id, old.task);
+                INSERT INTO tasks_fts (rowid, task) VALUES (new.id, new.task);
+            END;
+            INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild');
+        """)
+        return True
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def __iter__(self):
+        for row in self.conn.execute("SELECT * FROM tasks ORDER BY id"):
+            yield dict(row)
+
+    def __contains__(self, task_id):
+        return self.get(task_id) is not None
+
+    @property
+    def next_id(self):
+        row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'tasks'").fetchone()
+        return (row[0] if row else 0) + 1
+
+    def get(self, task_id):
+        """Return the task with the given id, or None"""
+        row = self.conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return dict(row) if row else None
+
+    def add(self, task):
+        """Add a new task under a fresh id that is never reused"""
+        task.pop("id", None)
+        fields = [field for field in self.FIELDS if field in task]
+        cursor = self.conn.execute(
+            f"INSERT INTO tasks ({', '.join(fields)}) VALUES ({', '.join('?' * len(fields))})",
+            [task[field] for field in fields])
+        task["id"] = cursor.lastrowid
+        self.notify("add", task)
+        return task
+
+    def add_many(self, tasks):
+        """Add a batch of new tasks with one executemany and one commit"""
+        next_id = self.next_id
+        for task in tasks:
+            task["id"] = next_id
+            next_id += 1
+        self.conn.executemany(
+            f"INSERT INTO tasks ({', '.join(self.FIELDS)}) "
+            f"VALUES ({', '.join('?' * len(self.FIELDS))})",
+            ([task.get(field) for field in self.FIELDS] for task in tasks))
+        self.conn.commit()
+        if tasks:
+            self.notify("add_many", tasks)
+        return tasks
+
+    def restore(self, tasks):
+        """Re-insert deleted tasks under their original ids"""
+        for task in tasks:
+            self.conn.execute(
+                f"INSERT INTO tasks ({', '.join(self.FIELDS)}) "
+                f"VALUES ({', '.join('?' * len(self.FIELDS))})",
+                [task.get(field) for field in self.FIELDS])
+            self.notify("add", task)
+
+    def get_many(self, task_ids):
+        """Return the existing tasks among the given ids, ordered by id"""
+        task_ids = list(task_ids)
+        tasks = []
+        # Stay well under SQLite's limit on bound parameters
+        for start in range(0, len(task_ids), 500):
+            chunk = task_ids[start:start + 500]
+            rows = self.conn.execute(f"SELECT * FROM tasks WHERE id IN "
+                                     f"({', '.join('?' * len(chunk))}) ORDER BY id", chunk)
+            tasks.extend(dict(row) for row in rows)
+        return tasks
+
+    def update_many(self, task_ids, **changes):
+        """Apply the same field changes to many tasks in one statement batch"""
+        before = self.get_many(task_ids)
+        assignments = ", ".join(f"{field} = ?" for field in changes)
+        self.conn.executemany(f"UPDATE tasks SET {assignments} WHERE id = ?",
+                              ([*changes.values(), task["id"]] for task in before))
+        tasks = [dict(task, **changes) for task in before]
+        if tasks:
+            self.notify("update_many", tasks, changes,
+                        [{field: task[field] for field in changes} for task in before])
+        return tasks
+
+    def update(self, task_id, **changes):
+        """Apply field changes to a task and return the updated task"""
+        previous = self.get(task_id)
+        if previous is None:
+            raise KeyError(task_id)
+        assignments = ", ".join(f"{field} = ?" for field in changes)
+        self.conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?",
+                          [*changes.values(), task_id])
+        task = dict(previous, **changes)
+        self.notify("update", task, changes, {field: previous[field] for field in changes})
+        return task
+
+    def delete(self, task_ids):
+        """Remove tasks by id and return the removed tasks"""
+        removed = [task for task in map(self.get, task_ids) if task is not None]
+        self.conn.executemany("DELETE FROM tasks WHERE id = ?", [(t["id"],) for t in removed])
+        if removed:
+            self.notify("delete", removed)
+        return removed
+
+    def notify(self, op, *args):
+        """Tell every listener about a mutation"""
+        for listener in self.listeners:
+            listener(op, *args)
+
+    def find(self, field, value):
+        """Return the tasks whose field equals value, ordered by id"""
+        return self.select(field, value)[:]
+
+    def count(self, field, value):
+        """Count the tasks whose field equals value"""
+        return self.conn.execute(f"SELECT COUNT(*) FROM tasks WHERE {field} = ?",
+                                 (value,)).fetchone()[0]
+
+    def find_repeating(self):
+        """Return the pending tasks that carry a repeat rule"""
+        return [dict(row) for row in self.conn.execute(
+            "SELECT * FROM tasks WHERE status = 'Pending' AND repeat != '' ORDER BY id")]
+
+    def due_ordinal(self, task):
+        """Return the parsed due date of a task as a day ordinal, or None"""
+        return parse_due_date(task["due_date"])
+
+    def due_on(self, ordinal):
+        """Return the tasks due on the given day as a paged selection"""
+        return self.select("due_date", date.fromordinal(ordinal).isoformat())
+
+    def count_overdue(self, today_ordinal):
+        """Count pending tasks due before the given day"""
+        # ISO dates sort lexicographically, so the due_date index serves the range
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE status = 'Pending' "
+            "AND due_date != '' AND due_date < ?",
+            (date.fromordinal(today_ordinal).isoformat(),)).fetchone()[0]
+
+    def counts_by(self, field):
+        """Return {value: count} for an indexed field"""
+        return dict(self.conn.execute(f"SELECT {field}, COUNT(*) FROM tasks GROUP BY {field}"))
+
+    def pending_due_counts(self):
+        """Return {due ordinal: count} for pending tasks with a due date"""
+        counts = Counter()
+        for due_date, count in self.conn.execute(
+                "SELECT due_date, COUNT(*) FROM tasks WHERE status = 'Pending' "
+                "AND due_date != '' GROUP BY due_date"):
+            ordinal = parse_due_date(due_date)
+            if ordinal is not None:
+                counts[ordinal] += count
+        return counts
+
+    def pending_due_after(self, entry, limit):
+        """Return up to limit (due ordinal, id) of pending tasks after an entry, in due order"""
+        ordinal, task_id = entry
+        # Served by the (status, due_date, id) index, reading only the page
+        rows = self.conn.execute(
+            "SELECT due_date, id FROM tasks WHERE status = 'Pending' "
+            "AND (due_date, id) > (?, ?) AND due_date GLOB ? ORDER BY due_date, id LIMIT ?",
+            (date.fromordinal(ordinal).isoformat(), task_id, ISO_DATE_GLOB, limit))
+        return [(parse_due_date(due_date), row_id) for due_date, row_id in rows
+                if parse_due_date(due_date) is not None]
+
+    def to_list(self):
+        """Return all tasks as a list ordered by id"""
+        return list(self)
+
+    def select(self, field=None, value=None, order=(), reverse=False):
+        """Return the tasks matching a filter as a lazily paged sequence"""
+        return SQLiteSelection(self.conn, field, value, order=order, reverse=reverse)
+
+    def search(self, query, field=None, value=None, order=(), reverse=False):
+        """Return tasks whose description matches the query, optionally filtered"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        if self.fts:
+            conditions = ["id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)"]
+            params = [" ".join(f'"{term}"*' for term in terms)]
+        else:
+            conditions = ["task LIKE ?"] * len(terms)
+            params = [f"%{term}%" for term in terms]
+        return SQLiteSelection(self.conn, field, value, conditions, params, order, reverse)
+
+    def import_tasks(self, store):
+        """Copy every task from another store in one transaction"""
+        fields = ", ".join(self.FIELDS)
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO tasks ({fields}) VALUES ({', '.join('?' * len(self.FIELDS))})",
+            ([task.get(field) for field in self.FIELDS] for task in store))
+        # Keep ids of tasks deleted before the import from being reused
+        if store.next_id > self.next_id:
+            self.conn.execute("DELETE FROM sqlite_sequence WHERE name = 'tasks'")
+            self.conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('tasks', ?)",
+                              (store.next_id - 1,))
+        self.conn.commit()
+
+    def get_meta(self, key):
+        """Read a value from the meta table"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        """Write a value to the meta table"""
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+        self.conn.commit()
+
+    def commit(self):
+        """Commit pending changes to the database"""
+        self.conn.commit()
+
+    def close(self):
+        """Commit and close the database"""
+        self.conn.commit()
+        self.conn.close()
+
+class SQLiteSelection:
+    """Filtered view over the tasks table, fetched one page at a time"""
+
+    def __init__(self, conn, field=None, value=None, conditions=(), params=(),
+                 order=(), reverse=False):
+        self.conn = conn
+        conditions, params = list(conditions), list(params)
+        if field is not None:
+            conditions.append(f"{field} = ?")
+            params.append(value)
+        self.where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        self.params = tuple(params)
+        direction = " DESC" if reverse else ""
+        terms = [term for column in order for term in SORT_COLUMNS[column][2]]
+        self.order_by = ", ".join(term + direction for term in terms + ["id"])
+        self.length = conn.execute(f"SELECT COUNT(*) FROM tasks {self.where}",
+                                   self.params).fetchone()[0]
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            rows = self[index:index + 1]
+            if not rows:
+                raise IndexError(index)
+            return rows[0]
+        start, stop, _ = index.indices(self.length)
+        if stop <= start:
+            return []
+        rows = self.conn.execute(f"SELECT * FROM tasks {self.where} ORDER BY {self.order_by} "
+                                 f"LIMIT ? OFFSET ?", (*self.params, stop - start, start))
+        return [dict(row) for row in rows]
+
+class RecurrenceScheduler:
+    """Min-heap of the next occurrence of every pending repeating task"""
+
+    def __init__(self, today_ordinal):
+        self.today_ordinal = today_ordinal
+        self.heap = []
+        # Task id -> (next occurrence after today, rule); heap entries that
+        # no longer match are stale and skipped when popped
+        self.next = {}
+        # Repeating tasks with an occurrence today, even if the instance is older
+        self.today_ids = set()
+
+    def load(self, store):
+        """Schedule every pending repeating task in the store"""
+        for task in store.find_repeating():
+            self.schedule(task)
+        return self
+
+    def schedule(self, task):
+        """(Re)place one task in the schedule after it changed"""
+        task_id = task["id"]
+        self.next.pop(task_id, None)
+        self.today_ids.discard(task_id)
+        rule = task.get("repeat")
+        ordinal = parse_due_date(task["due_date"])
+        if not rule or task["status"] != "Pending" or ordinal is None:
+            return
+        ordinal = occurrence_on_or_after(ordinal, rule, self.today_ordinal)
+        if ordinal == self.today_ordinal:
+            self.today_ids.add(task_id)
+            ordinal = next_occurrence(ordinal, rule)
+        self.next[task_id] = (ordinal, rule)
+        heapq.heappush(self.heap, (ordinal, task_id))
+
+    def record_change(self, op, *args):
+        """Store listener that reschedules only the tasks that changed"""
+        if op == "add":
+            self.schedule(args[0])
+        elif op == "add_many":
+            for task in args[0]:
+                self.schedule(task)
+        elif op == "update":
+            task, changes, previous = args
+            if {"status", "due_date", "repeat"} & changes.keys():
+                self.schedule(task)
+        elif op == "update_many":
+            if {"status", "due_date", "repeat"} & args[1].keys():
+                for task in args[0]:
+                    self.schedule(task)
+        elif op == "delete":
+            for task in args[0]:
+                self.next.pop(task["id"], None)
+                self.today_ids.discard(task["id"])
+
+    def set_day(self, today_ordinal):
+        """Advance to a new day; return the ids whose Today membership changed"""
+        self.today_ordinal = today_ordinal
+        changed = set(self.today_ids)
+        self.today_ids = set()
+        # Each series that reached its occurrence costs one pop and one push
+        while self.heap and self.heap[0][0] <= today_ordinal:
+            ordinal, task_id = heapq.heappop(self.heap)
+            entry = self.next.get(task_id)
+            if entry is None or entry[0] != ordinal:
+                continue
+            rule = entry[1]
+            ordinal = occurrence_on_or_after(ordinal, rule, today_ordinal)
+            if ordinal == today_ordinal:
+                self.today_ids.add(task_id)
+                ordinal = next_occurrence(ordinal, rule)
+            self.next[task_id] = (ordinal, rule)
+            heapq.heappush(self.heap, (ordinal, task_id))
+            changed.add(task_id)
+        return changed
+
+    def upcoming(self, days):
+        """Yield (ordinal, task id) for occurrences from today on, in date order"""
+        end = self.today_ordinal + days
+        for task_id in sorted(self.today_ids):
+            yield self.today_ordinal, task_id
+        # Walk only the heap nodes that can fall in range, then expand them lazily
+        pending, stack = [], [0] if self.heap else []
+        while stack:
+            position = stack.pop()
+            ordinal, task_id = self.heap[position]
+            if ordinal >= end:
+                continue
+            if self.next.get(task_id, (None,))[0] == ordinal:
+                pending.append((ordinal, task_id))
+            stack.extend(child for child in (2 * position + 1, 2 * position + 2)
+                         if child < len(self.heap))
+        # A task rescheduled to the same day can sit in the heap twice
+        pending = list(set(pending))
+        heapq.heapify(pending)
+        while pending:
+            ordinal, task_id = heapq.heappop(pending)
+            yield ordinal, task_id
+            following = next_occurrence(ordinal, self.next[task_id][1])
+            if following < end:
+                heapq.heappush(pending, (following, task_id))
+
+class ReminderScheduler:
+    """Min-heap of upcoming due-date reminders for pending tasks
+
+    Only the next page of deadlines is read from the store; the heap is
+    topped up from the store's due order as reminders fire.
+    """
+
+    PAGE_SIZE = 256
+
+    def __init__(self, reminder_time=REMINDER_TIME):
+        self.reminder_time = reminder_time
+        self.heap = []
+        # Task id -> reminder timestamp; heap entries that differ are stale
+        self.when = {}
+        # Tasks whose reminder has fired (shown with a bell until they change)
+        self.fired = set()
+        self.store = None
+        # Last (due ordinal, id) read from the store; None once all are queued
+        self.cursor = None
+        # Reminders at or before this time had passed when loading
+        self.loaded_at = 0
+
+    def reminder_at(self, ordinal):
+        """Return the reminder timestamp for a due day"""
+        return datetime.combine(date.fromordinal(ordinal), self.reminder_time).timestamp()
+
+    def load(self, store, now=None):
+        """Queue the first page of reminders for pending tasks not yet reminded of"""
+        self.loaded_at = datetime.now().timestamp() if now is None else now
+        self.store = store
+        self.cursor = (date.fromtimestamp(self.loaded_at).toordinal(), 0)
+        self.top_up()
+        return self
+
+    def top_up(self):
+        """Queue the next page of pending deadlines after the cursor"""
+        entries = self.store.pending_due_after(self.cursor, self.PAGE_SIZE)
+        if not entries:
+            self.cursor = None
+            return
+        self.cursor = entries[-1]
+        for ordinal, task_id in entries:
+            when = self.reminder_at(ordinal)
+            if when > self.loaded_at:
+                self.when[task_id] = when
+                heapq.heappush(self.heap, (when, task_id))
+
+    def queued(self, ordinal, task_id):
+        """Return True if a deadline falls within the pages already read"""
+        return self.cursor is None or (ordinal, task_id) <= self.cursor
+
+    def schedule(self, task, now=None):
+        """(Re)queue the reminder of one task after it changed"""
+        task_id = task["id"]
+        self.when.pop(task_id, None)
+        self.fired.discard(task_id)
+        ordinal = parse_due_date(task["due_date"])
+        if task["status"] != "Pending" or ordinal is None:
+            return
+        when = self.reminder_at(ordinal)
+        # Deadlines past the cursor are queued by a later top-up
+        now = datetime.now().timestamp() if now is None else now
+        if when > now and self.queued(ordinal, task_id):
+            self.when[task_id] = when
+            heapq.heappush(self.heap, (when, task_id))
+
+    def record_change(self, op, *args):
+        """Store listener that requeues only the tasks that changed"""
+        if op == "add":
+            self.schedule(args[0])
+        elif op == "add_many":
+            now = datetime.now().timestamp()
+            for task in args[0]:
+                self.schedule(task, now)
+        elif op == "update":
+            task, changes, previous = args
+            if "status" in changes or "due_date" in changes:
+                self.schedule(task)
+        elif op == "update_many":
+            if "status" in args[1] or "due_date" in args[1]:
+                now = datetime.now().timestamp()
+                for task in args[0]:
+                    self.schedule(task, now)
+        elif op == "delete":
+            for task in args[0]:
+                self.when.pop(task["id"], None)
+                self.fired.discard(task["id"])
+
+    def next_deadline(self):
+        """Return the timestamp of the earliest pending reminder, or None"""
+        while True:
+            while self.heap and self.when.get(self.heap[0][1]) != self.heap[0][0]:
+                heapq.heappop(self.heap)
+            # Unread deadlines fall on or after the cursor's day
+            if (self.cursor is None
+                    or self.heap and self.heap[0][0] < self.reminder_at(self.cursor[0])):
+                return self.heap[0][0] if self.heap else None
+            self.top_up()
+
+    def pop_due(self, now):
+        """Return the ids of tasks whose reminder time has come"""
+        due = []
+        while True:
+            deadline = self.next_deadline()
+            if deadline is None or deadline > now:
+                return due
+            _, task_id = heapq.heappop(self.heap)
+            del self.when[task_id]
+            self.fired.add(task_id)
+            due.append(task_id)
+
+class TaskStats:
+    """Task counters kept up to date from store change notifications"""
+
+    def __init__(self, today_ordinal, self_check=False):
+        self.today_ordinal = today_ordinal
+        self.total = 0
+        self.by_status = Counter()
+        self.by_priority = Counter()
+        # Pending tasks per due day, used to re-bucket on day rollover
+        self.pending_by_due = Counter()
+        self.overdue = 0
+        self.due_today = 0
+        # Recompute from the store after every change (for tests)
+        self.self_check = self_check
+        self.store = None
+
+    def load(self, store):
+        """Initialize the counters from the store's own aggregates"""
+        self.store = store
+        self.total = len(store)
+        self.by_status = Counter(store.counts_by("status"))
+        self.by_priority = Counter(store.counts_by("priority"))
+        self.pending_by_due = store.pending_due_counts()
+        self.set_day(self.today_ordinal)
+        return self
+
+    def count(self, task, sign):
+        """Add (sign=1) or remove (sign=-1) one task from the counters"""
+        self.by_status[task["status"]] += sign
+        self.by_priority[task["priority"]] += sign
+        if task["status"] != "Pending":
+            return
+        ordinal = parse_due_date(task["due_date"])
+        if ordinal is None:
+            return
+        self.pending_by_due[ordinal] += sign
+        if not self.pending_by_due[ordinal]:
+            del self.pending_by_due[ordinal]
+        if ordinal < self.today_ordinal:
+            self.overdue += sign
+        elif ordinal == self.today_ordinal:
+            self.due_today += sign
+
+    def record_change(self, op, *args):
+        """Store listener that adjusts the counters in O(1)"""
+        if op == "add":
+            self.total += 1
+            self.count(args[0], 1)
+        elif op == "add_many":
+            self.total += len(args[0])
+            for task in args[0]:
+                self.count(task, 1)
+        elif op == "update":
+            task, changes, previous = args
+            self.count(dict(task, **previous), -1)
+            self.count(task, 1)
+        elif op == "update_many":
+            for task, previous in zip(args[0], args[2]):
+                self.count(dict(task, **previous), -1)
+                self.count(task, 1)
+        elif op == "delete":
+            for task in args[0]:
+                self.total -= 1
+                self.count(task, -1)
+        if self.self_check:
+            self.verify()
+
+    def set_day(self, today_ordinal):
+        """Re-bucket overdue and due-today counts for a new day"""
+        self.today_ordinal = today_ordinal
+        self.overdue = sum(count for ordinal, count in self.pending_by_due.items()
+                           if ordinal < today_ordinal)
+        self.due_today = self.pending_by_due.get(today_ordinal, 0)
+
+    @property
+    def pending(self):
+        return self.by_status["Pending"]
+
+    @property
+    def completed(self):
+        return self.by_status["Completed"]
+
+    def snapshot(self):
+        """Return the counters as a plain dict"""
+        return {
+            "total": self.total,
+            "status": {k: v for k, v in self.by_status.items() if v},
+            "priority": {k: v for k, v in self.by_priority.items() if v},
+            "overdue": self.overdue,
+            "due_today": self.due_today,
+        }
+
+    def verify(self):
+        """Recount every task and raise AssertionError on any mismatch"""
+        expected = TaskStats(self.today_ordinal)
+        for task in self.store:
+            expected.total += 1
+            expected.count(task, 1)
+        if expected.snapshot() != self.snapshot():
+            raise AssertionError(f"Task counters out of sync: {self.snapshot()} "
+                                 f"!= {expected.snapshot()}")
+
+def validate_due_date(due_date):
+    """Raise ValueError unless due_date is empty or YYYY-MM-DD"""
+    if due_date and parse_due_date(due_date) is None:
+        raise ValueError("Invalid date format! Use YYYY-MM-DD")
+
+def normalize_repeat(rule, due_date):
+    """Validate a repeat rule against its due date and return it normalized"""
+    rule = " ".join((rule or "").lower().split())
+    if rule:
+        repeat_days(rule)
+        if not due_date:
+            raise ValueError("A repeating task needs a due date!")
+    return rule
+
+def new_task(text, priority="Medium", due_date="", created=None, repeat=""):
+    """Build a validated pending task dict (the id is assigned by the store)"""
+    text = text.strip()
+    if not text:
+        raise ValueError("Please enter a task description!")
+    if priority not in PRIORITIES:
+        raise ValueError(f"Priority must be one of {', '.join(PRIORITIES)}")
+    due_date = due_date.strip()
+    validate_due_date(due_date)
+    repeat = normalize_repeat(repeat, due_date)
+    return {
+        "task": text,
+        "priority": priority,
+        "due_date": due_date,
+        "status": "Pending",
+        "created": created or datetime.now().strftime(TIMESTAMP_FORMAT),
+        "completed_date": None,
+        "repeat": repeat
+    }
+
+def write_json_atomic(filename, data, indent=None):
+    """Write JSON to a temp file, fsync it and rename it into place"""
+    temp_file = filename + ".tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(data, f, indent=indent)
+        count_bytes(os.path.basename(filename), f.tell())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, filename)
+
+def load_json_store(filename):
+    """Load a whole-file tasks.json into a TaskStore"""
+    if not os.path.exists(filename):
+        return TaskStore()
+    with open(filename, 'r') as f:
+        data = json.load(f)
+    # Older files hold a bare list of tasks
+    if isinstance(data, list):
+        return TaskStore(data)
+    return TaskStore(data["tasks"], data.get("next_id", 1))
+
+def task_from_record(record):
+    """Build a validated new task from an imported JSON or CSV record"""
+    task = new_task(record["task"], record.get("priority") or "Medium",
+                    record.get("due_date") or "", record.get("created"),
+                    record.get("repeat") or "")
+    if record.get("status") in ("Pending", "Completed"):
+        task["status"] = record["status"]
+    # CSV has no null, so an empty string means "not set"
+    if record.get("completed_date"):
+        task["completed_date"] = record["completed_date"]
+    return task
+
+def detect_format(path):
+    """Guess the interchange format from a file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    return "json"
+
+def read_task_records(path, file_format=None):
+    """Yield raw task records from a JSON, JSON Lines or CSV file"""
+    file_format = file_format or detect_format(path)
+    if file_format == "jsonl":
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif file_format == "csv":
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            yield from csv.DictReader(f)
+    else:
+        # Plain JSON cannot be streamed; kept for the tasks.json layout
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        yield from (data if isinstance(data, list) else data["tasks"])
+
+def write_task_records(path, tasks, file_format=None, progress=None, progress_every=10000):
+    """Stream tasks to a JSON, JSON Lines or CSV file; return the count"""
+    file_format = file_format or detect_format(path)
+    count = 0
+    temp_file = path + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8', newline='') as f:
+        if file_format == "csv":
+            writer = csv.DictWriter(f, fieldnames=TASK_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            write = writer.writerow
+        elif file_format == "jsonl":
+            write = lambda task: f.write(json.dumps(as_dict(task), separators=(",", ":")) + "\n")
+        else:
+            f.write("[")
+            write = lambda task: f.write(("," if count else "") + "\n    "
+                                         + json.dumps(as_dict(task)))
+        for task in tasks:
+            write(task)
+            count += 1
+            if progress is not None and count % progress_every == 0:
+                progress(count)
+        if file_format == "json":
+            f.write("\n]\n")
+        count_bytes("export", f.tell())
+    os.replace(temp_file, path)
+    if progress is not None:
+        progress(count)
+    return count
+
+def import_task_records(store, records, batch_size=10000, progress=None):
+    """Validate records and add them to the store in batches; return the count"""
+    count = 0
+    batch = []
+    for record in records:
+        batch.append(task_from_record(record))
+        if len(batch) >= batch_size:
+            store.add_many(batch)
+            count += len(batch)
+            batch = []
+            if progress is not None:
+                progress(count)
+    if batch:
+        store.add_many(batch)
+        count += len(batch)
+    if progress is not None:
+        progress(count)
+    return count
+
+def task_row(task, overdue=False, reminded=False):
+    """Build the list row values and tag shown for a task"""
+    status = "✅" if task["status"] == "Completed" else "⏳"
+    
+    # Color coding for priority
+    if task["priority"] == "High":
+        priority_color = "🔴"
+    elif task["priority"] == "Medium":
+        priority_color = "🟡"
+    else:
+        priority_color = "🟢"
+    
+    # Check if overdue
+    due_date_display = task["due_date"] if task["due_date"] else "No due date"
+    if overdue:
+        due_date_display = f"⚠️ {task['due_date']} (OVERDUE)"
+    elif reminded:
+        due_date_display = f"🔔 {task['due_date']}"
+    
+    # Repeating tasks show their rule
+    task_display = task["task"]
+    if task.get("repeat"):
+        task_display = f"🔁 {task['task']} ({task['repeat']})"
+    
+    values = (task["id"], status, task_display,
+              f"{priority_color} {task['priority']}",
+              due_date_display, task["created"])
+    
+    # Apply color based on status
+    tag = "completed" if task["status"] == "Completed" else "pending"
+    return values, tag
+
+class TaskEngine:
+    """Task store, filters, counters and persistence for one task file"""
+
+    def __init__(self, storage="journal", filename="tasks.json", db_filename="tasks.db"):
+        # Storage backend: "journal", "shared", "json" or "sqlite"
+        self.storage = storage
+        self.filename = filename
+        self.db_filename = db_filename
+        if storage == "shared":
+            # A journal several processes append to under a lock file
+            self.journal = SharedTaskJournal(filename)
+        else:
+            self.journal = TaskJournal(filename) if storage == "journal" else None
+        self.shared = storage == "shared"
+        with gc_paused():
+            self.store = self.load()
+        
+        self.today = date.today()
+        self.today_str = self.today.isoformat()
+        self.today_ordinal = self.today.toordinal()
+        
+        # Incrementally maintained counters
+        self.stats = TaskStats(self.today_ordinal, SELF_CHECK).load(self.store)
+        self.store.listeners.append(self.stats.record_change)
+        # Next occurrences of repeating tasks; ids touched by the last day change
+        self.recurrence = RecurrenceScheduler(self.today_ordinal).load(self.store)
+        self.store.listeners.append(self.recurrence.record_change)
+        self.recurring_changed = set()
+        self.reminders = ReminderScheduler().load(self.store)
+        self.store.listeners.append(self.reminders.record_change)
+        
+        # Undo/redo steps, kept next to the data so they survive a restart;
+        # a shared store keeps them per process, for this session only
+        data_file = db_filename if storage == "sqlite" else filename
+        try:
+            self.history = UndoHistory(None if self.shared else data_file + ".history").load()
+        except Exception as e:
+            print(f"Error loading undo history: {e}")
+            self.history = UndoHistory()
+        self.store.listeners.append(self.history.record_change)
+        
+        # Mutations made, and how many of them the data file holds (JSON storage)
+        self.changes = self.saved_changes = 0
+        self.store.listeners.append(self.count_change)
+        
+        # Shared store: id -> task before changes made elsewhere, until polled
+        self.external_changes = {}
+        # Fields of the last edit that overwrote a change made elsewhere
+        self.conflicts = []
+
+    def count_change(self, op, *args):
+        """Store listener counting mutations, so an unchanged JSON file is not rewritten"""
+        self.changes += 1
+
+    def mark_saved(self, changes):
+        """Record that the data file holds the first changes mutations"""
+        self.saved_changes = max(self.saved_changes, changes)
+
+    def load(self):
+        """Open the configured backend and return its store"""
+        if self.journal is not None:
+            try:
+                store = self.journal.load()
+            except Exception as e:
+                print(f"Error loading tasks: {e}")
+                store = TaskStore()
+                self.journal.handle = open(self.journal.journal_file, 'a', encoding='utf-8')
+            store.listeners.append(self.journal.record_change)
+            return store
+        
+        if self.storage == "sqlite":
+            store = SQLiteTaskStore(self.db_filename)
+            if not store.get_meta("imported"):
+                # One-time import of an existing tasks.json (and its journal)
+                try:
+                    journal = TaskJournal(self.filename)
+                    if os.path.exists(self.filename) or os.path.exists(journal.journal_file):
+                        store.import_tasks(journal.load())
+                        journal.close()
+                    store.set_meta("imported", "1")
+                except Exception as e:
+                    print(f"Error importing tasks: {e}")
+            return store
+        
+        try:
+            return load_json_store(self.filename)
+        except Exception as e:
+            print(f"Error loading tasks: {e}")
+            return TaskStore()
+
+    def set_day(self, today):
+        """Advance to a new day; return True if the day changed"""
+        if today == self.today:
+            return False
+        self.today = today
+        self.today_str = today.isoformat()
+        self.today_ordinal = today.toordinal()
+        self.stats.set_day(self.today_ordinal)
+        self.reminders.fired.clear()
+        self.recurring_changed = self.recurrence.set_day(self.today_ordinal)
+        return True
+
+    @contextmanager
+    def change(self, label):
+        """Group store mutations into one undoable step
+
+        On a shared store the step holds the lock and first applies what
+        other processes wrote, so ids and versions follow the shared log.
+        """
+        with self.change_lock(), self.history.command(label):
+            yield
+
+    @contextmanager
+    def change_lock(self):
+        """Hold a shared store's lock, caught up with other processes"""
+        if not self.shared:
+            yield
+            return
+        with self.journal.locked():
+            self.merge_external()
+            yield
+
+    def merge_external(self):
+        """Apply records other processes appended to a shared journal"""
+        # Their changes are already journaled and are not ours to undo
+        muted = (self.journal.record_change, self.history.record_change)
+        listeners = self.store.listeners
+        self.store.listeners = [listener for listener in listeners if listener not in muted]
+        try:
+            before = self.journal.catch_up(self.store)
+        finally:
+            self.store.listeners = listeners
+        for task_id, task in before.items():
+            self.external_changes.setdefault(task_id, task)
+
+    def poll(self):
+        """Pick up changes made by other processes; return {id: task before} for each"""
+        if self.shared and self.journal.changed_on_disk():
+            with self.journal.locked():
+                self.merge_external()
+        changes, self.external_changes = self.external_changes, {}
+        return changes
+
+    def version_of(self, task_id):
+        """Return a task's version stamp on a shared store, or None"""
+        return self.journal.version(task_id) if self.shared else None
+
+    def base_of(self, task_id):
+        """Return a task's fields and version, to pass to edit() as its base"""
+        task = self.store.get(task_id)
+        return dict(as_dict(task), version=self.version_of(task_id)) if task else None
+
+    def add(self, text, priority="Medium", due_date="", repeat=""):
+        """Validate and add a new task"""
+        task = new_task(text, priority, due_date, repeat=repeat)
+        with self.change("Add"):
+            return self.store.add(task)
+
+    def edit(self, task_id, text, priority, due_date, repeat=None, base=None):
+        """Validate and apply an edit to a task (repeat=None leaves the rule alone)
+
+        With base (from base_of) only the fields changed since then are
+        written, merging with changes made elsewhere in the meantime.
+        """
+        due_date = due_date.strip()
+        validate_due_date(due_date)
+        changes = {"task": text.strip(), "priority": priority, "due_date": due_date}
+        if repeat is not None:
+            changes["repeat"] = normalize_repeat(repeat, due_date)
+        elif due_date == "" and (self.store.get(task_id) or {}).get("repeat"):
+            raise ValueError("A repeating task needs a due date!")
+        with self.change("Edit"):
+            task = self.store.get(task_id)
+            if task is None:
+                raise ValueError("This task was deleted in another window!")
+            self.conflicts = []
+            if base is not None:
+                changes = {field: value for field, value in changes.items()
+                           if value != (base.get(field) or "")}
+                if base.get("version") != self.version_of(task_id):
+                    # Both sides changed these fields; this edit wins
+                    self.conflicts = [field for field, value in changes.items()
+                                      if (task.get(field) or "") not in
+                                      ((base.get(field) or ""), value)]
+            if not changes:
+                return task
+            return self.store.update(task_id, **changes)
+
+    def set_status(self, task_id, status):
+        """Mark a task Pending or Completed; completing a repeating task spawns the next one"""
+        tasks = self.set_status_many([task_id], status)
+        if not tasks:
+            raise KeyError(task_id)
+        return tasks[0]
+
+    def set_status_many(self, task_ids, status, **changes):
+        """Mark many tasks Pending or Completed, plus any other field changes, in one store write"""
+        changes.update(status=status, completed_date=None)
+        with self.change(status):
+            if status != "Completed":
+                return self.store.update_many(task_ids, **changes)
+            changes["completed_date"] = datetime.now().strftime(TIMESTAMP_FORMAT)
+            tasks = self.store.get_many(task_ids)
+            rules = {task["id"]: task.get("repeat") for task in tasks if task.get("repeat")}
+            if rules:
+                # The rule moves on to the next instance of each series ("" is no rule already)
+                changes["repeat"] = ""
+            changed = self.store.update_many([task["id"] for task in tasks], **changes)
+            if rules:
+                self.store.add_many([self.next_instance(task, rules[task["id"]])
+                                     for task in changed if task["id"] in rules])
+            return changed
+
+    def next_instance(self, task, rule):
+        """Build the next instance of a completed repeating task"""
+        ordinal = next_occurrence(parse_due_date(task["due_date"]), rule)
+        # Occurrences missed while the task was overdue are not materialized
+        ordinal = occurrence_on_or_after(ordinal, rule, self.today_ordinal)
+        due_date = date.fromordinal(ordinal).isoformat()
+        return new_task(task["task"], task["priority"], due_date, repeat=rule)
+
+    def bulk_update(self, task_ids, status=None, priority=None, due_date=None):
+        """Set status, priority and/or due date on many tasks as one undoable change"""
+        task_ids = list(task_ids)
+        changes = {}
+        if priority is not None:
+            if priority not in PRIORITIES:
+                raise ValueError(f"Priority must be one of {', '.join(PRIORITIES)}")
+            changes["priority"] = priority
+        if due_date is not None:
+            due_date = due_date.strip()
+            validate_due_date(due_date)
+            if not due_date and any(task.get("repeat") for task in self.store.get_many(task_ids)):
+                raise ValueError("A repeating task needs a due date!")
+            changes["due_date"] = due_date
+        with self.change("Bulk edit"):
+            # One store write (and journal record) for every field at once
+            if status is not None:
+                self.set_status_many(task_ids, status, **changes)
+            elif changes:
+                self.store.update_many(task_ids, **changes)
+        return len(task_ids)
+
+    def upcoming(self, days=7):
+        """Return (date, task) for repeating occurrences in the next days, in order"""
+        return [(date.fromordinal(ordinal), self.store.get(task_id))
+                for ordinal, task_id in self.recurrence.upcoming(days)]
+
+    def toggle(self, task_ids):
+        """Flip the status of each task and return the updated tasks"""
+        task_ids = list(task_ids)
+        with self.change("Toggle"):
+            tasks = self.store.get_many(task_ids)
+            to_complete = [task["id"] for task in tasks if task["status"] == "Pending"]
+            to_reopen = [task["id"] for task in tasks if task["status"] != "Pending"]
+            return (self.set_status_many(to_complete, "Completed")
+                    + self.set_status_many(to_reopen, "Pending"))
+
+    def delete(self, task_ids):
+        """Delete tasks by id (ids stay stable and are never reused)"""
+        with self.change("Delete"):
+            return self.store.delete(task_ids)
+
+    def undo(self):
+        """Revert the latest change; return its label, or None"""
+        with self.change_lock():
+            return self.history.undo(self.store)
+
+    def redo(self):
+        """Re-apply the latest undone change; return its label, or None"""
+        with self.change_lock():
+            return self.history.redo(self.store)
+
+    def filter_clause(self, filter_type):
+        """Map a filter name to the (field, value) it selects on"""
+        if filter_type == "Pending":
+            return "status", "Pending"
+        elif filter_type == "Completed":
+            return "status", "Completed"
+        elif filter_type == "High Priority":
+            return "priority", "High"
+        elif filter_type == "Today":
+            return "due_date", self.today_str
+        return None, None
+
+    def select(self, filter_type, query="", order=(), reverse=False):
+        """Return the tasks shown under a filter, search and sort order as a sliceable sequence"""
+        field, value = self.filter_clause(filter_type)
+        if filter_type == "Today" and self.recurrence.today_ids:
+            return self.select_today(query, order, reverse)
+        if query.strip():
+            return self.store.search(query, field, value, order, reverse)
+        if filter_type == "Today" and not order:
+            return self.store.due_on(self.today_ordinal)
+        return self.store.select(field, value, order, reverse)
+
+    def select_today(self, query="", order=(), reverse=False):
+        """Tasks due today plus repeating tasks whose series occurs today"""
+        if query.strip():
+            tasks = self.store.search(query, "due_date", self.today_str)[:]
+            terms = tokenize(query)
+        else:
+            tasks = self.store.select("due_date", self.today_str)[:]
+            terms = None
+        seen = {task["id"] for task in tasks}
+        for task_id in self.recurrence.today_ids - seen:
+            task = self.store.get(task_id)
+            if task is not None and (terms is None or text_matches(task["task"], terms)):
+                tasks.append(task)
+        if order:
+            tasks.sort(key=sort_key(order), reverse=reverse)
+        else:
+            tasks.sort(key=lambda task: task["id"])
+        return tasks
+
+    def matches_filter(self, task, filter_type, query=""):
+        """Check whether a task is shown under a filter and search"""
+        if query.strip() and not text_matches(task["task"], tokenize(query)):
+            return False
+        if filter_type == "Pending":
+            return task["status"] == "Pending"
+        elif filter_type == "Completed":
+            return task["status"] == "Completed"
+        elif filter_type == "High Priority":
+            return task["priority"] == "High"
+        elif filter_type == "Today":
+            return task["due_date"] == self.today_str or task["id"] in self.recurrence.today_ids
+        return True
+
+    def is_overdue(self, task):
+        """Check whether a pending task is past its due date"""
+        due_ordinal = self.store.due_ordinal(task)
+        return (task["status"] == "Pending" and due_ordinal is not None
+                and due_ordinal < self.today_ordinal)
+
+    def compact_if_needed(self):
+        """Fold a long journal into a fresh snapshot in the background"""
+        if self.journal is not None and self.journal.needs_compaction():
+            with self.change_lock():
+                self.journal.compact(self.store)
+
+    def save(self):
+        """Persist all changes synchronously"""
+        self.history.sync()
+        if self.journal is not None:
+            self.journal.sync()
+            self.compact_if_needed()
+        elif self.storage == "sqlite":
+            self.store.commit()
+        else:
+            changes = self.changes
+            write_json_atomic(self.filename, self.snapshot(), indent=4)
+            self.mark_saved(changes)
+
+    def snapshot(self):
+        """Return a copy of every task in the whole-file JSON layout"""
+        return {"next_id": self.store.next_id, "tasks": [as_dict(task) for task in self.store]}
+
+    def import_file(self, path, file_format=None, batch_size=10000, progress=None):
+        """Stream tasks from a file into the store under fresh ids"""
+        with self.change("Import"):
+            count = import_task_records(self.store, read_task_records(path, file_format),
+                                        batch_size, progress)
+        self.save()
+        return count
+
+    def export_file(self, path, file_format=None, progress=None):
+        """Stream every task to a file"""
+        return write_task_records(path, iter(self.store), file_format, progress)
+
+    def close(self):
+        """Save and release files"""
+        self.history.close()
+        if self.journal is not None:
+            self.journal.close()
+        elif self.storage == "sqlite":
+            self.store.close()
+        elif self.changes != self.saved_changes:
+            self.save()
+
+class Workspace:
+    """Named task lists in one directory, opened lazily behind an LRU cache"""
+    DEFAULT_LIST = "Tasks"
+
+    def __init__(self, directory=".", storage="journal", cache_size=8):
+        self.directory = directory
+        self.storage = storage
+        self.cache_size = cache_size
+        self.index_file = os.path.join(directory, "workspace.json")
+        # Name -> open TaskEngine, least recently used first
+        self.engines = OrderedDict()
+        # Name -> {"file": ..., counts..., "mtime": ...} for every list
+        self.headers = {}
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r') as f:
+                self.headers = json.load(f)["lists"]
+        # The original single list keeps its tasks.json
+        self.headers.setdefault(self.DEFAULT_LIST, {"file": "tasks.json"})
+
+    def names(self):
+        """Return the list names in display order"""
+        return sorted(self.headers, key=lambda name: (name != self.DEFAULT_LIST, name.lower()))
+
+    def paths(self, name):
+        """Return the (task file, database) paths of a list"""
+        filename = os.path.join(self.directory, self.headers[name]["file"])
+        return filename, os.path.splitext(filename)[0] + ".db"
+
+    def data_mtime(self, name):
+        """Return the newest modification time of a list's data files"""
+        filename, db_filename = self.paths(name)
+        candidates = (db_filename,) if self.storage == "sqlite" else (filename, filename + ".journal")
+        return max((os.path.getmtime(path) for path in candidates if os.path.exists(path)),
+                   default=0)
+
+    def summary(self, name):
+        """Return {total, pending, completed, high} for a list without loading it if possible"""
+        engine = self.engines.get(name)
+        if engine is None:
+            header = self.headers[name]
+            if "total" in header and header.get("mtime") == self.data_mtime(name):
+                return {key: header[key] for key in ("total", "pending", "completed", "high")}
+            # Missing or stale header (changed outside the workspace): recount
+            # without touching the cache, so the active list is never evicted
+            engine = TaskEngine(self.storage, *self.paths(name))
+            engine.close()
+            self.headers[name].update(self.summary_of(engine), mtime=self.data_mtime(name))
+            self.save_index()
+        return self.summary_of(engine)
+
+    def create(self, name):
+        """Add a new empty list and return its name"""
+        name = name.strip()
+        if not name:
+            raise ValueError("Please enter a list name!")
+        if name in self.headers:
+            raise ValueError(f"A list named {name} already exists")
+        slug = re.sub(r"[^\w-]+", "_", name.lower()).strip("_") or "list"
+        files = {header["file"] for header in self.headers.values()}
+        filename, suffix = f"tasks-{slug}.json", 1
+        while filename in files or os.path.exists(os.path.join(self.directory, filename)):
+            suffix += 1
+            filename = f"tasks-{slug}-{suffix}.json"
+        self.headers[name] = {"file": filename, "total": 0, "pending": 0, "completed": 0,
+                              "high": 0, "mtime": 0}
+        self.save_index()
+        return name
+
+    def open(self, name):
+        """Return the engine for a list, loading it and evicting the oldest if needed"""
+        engine = self.engines.get(name)
+        if engine is not None:
+            self.engines.move_to_end(name)
+            return engine
+        if name not in self.headers:
+            raise KeyError(name)
+        engine = self.engines[name] = TaskEngine(self.storage, *self.paths(name))
+        while len(self.engines) > self.cache_size:
+            self.release(next(iter(self.engines)))
+        return engine
+
+    def release(self, name, save=True):
+        """Close an open list and record its summary header"""
+        engine = self.engines.pop(name)
+        engine.close()
+        self.headers[name].update(self.summary_of(engine), mtime=self.data_mtime(name))
+        if save:
+            self.save_index()
+
+    def summary_of(self, engine):
+        """Return the header counts of an open list"""
+        stats = engine.stats
+        return {"total": stats.total, "pending": stats.pending,
+                "completed": stats.completed, "high": stats.by_priority["High"]}
+
+    def save_index(self):
+        """Atomically rewrite the workspace index"""
+        if self.storage != "shared":
+            write_json_atomic(self.index_file, {"lists": self.headers}, indent=4)
+            return
+        # Keep lists that other processes sharing the workspace created
+        with file_lock(self.index_file + ".lock"):
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'r') as f:
+                    for name, header in json.load(f)["lists"].items():
+                        self.headers.setdefault(name, header)
+            write_json_atomic(self.index_file, {"lists": self.headers}, indent=4)
+
+    def close(self):
+        """Close every open list and save their headers"""
+        for name in list(self.engines):
+            self.release(name, save=False)
+        self.save_index()
+